@@ -1,13 +1,27 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Iterator, List, Optional, Union
+from contextlib import contextmanager
 import uvicorn
 import traceback
+import json
 import logging
+import os
+import secrets
+import threading
+import time
 
 from .services.recommender import RecommenderService
-from .models.recommendation import RecommendationRequest, RecommendationResponse
+from .services.worker_pool import WorkerPool, PoolSaturatedError, PoolTimeoutError
+from .services.metrics import RecommenderMetrics, Timings, collect_timings
+from .services.request_log import RequestLog, RequestLogMiddleware
+from .models.recommendation import (
+    RecommendationRequest, RecommendationResponse, BatchRecommendationRequest, BatchRecommendationResponse,
+    CatalogItem, CatalogItemFields, CatalogChangeResponse,
+    RecommendationPageRequest, RecommendationPage, RecommendationStreamRequest
+)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -28,15 +42,108 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record ranking requests for replay with benchmarks.replay
+request_log = RequestLog(os.environ["RECOMMENDER_REQUEST_LOG"]) if os.getenv("RECOMMENDER_REQUEST_LOG") else None
+if request_log is not None:
+    app.add_middleware(RequestLogMiddleware, log=request_log)
+
 # Initialize recommender service
 try:
-    recommender_service = RecommenderService()
+    recommender_service = RecommenderService.from_env()
     logger.info("RecommenderService initialized successfully")
 except Exception as e:
     logger.error(f"Failed to initialize RecommenderService: {e}")
     logger.error(traceback.format_exc())
     recommender_service = None
 
+# Scoring runs on a bounded pool so CPU-bound work never blocks the event loop
+worker_pool = WorkerPool(
+    kind=os.getenv("RECOMMENDER_POOL", "thread"),
+    max_workers=int(os.getenv("RECOMMENDER_WORKERS", str(os.cpu_count() or 4))),
+    max_pending=int(os.getenv("RECOMMENDER_MAX_PENDING", "64")),
+    timeout=float(os.getenv("RECOMMENDER_TIMEOUT", "10")),
+    service_factory=RecommenderService.from_env
+)
+
+# Handler metrics share the service's registry so /metrics reports both
+api_metrics = recommender_service.metrics if recommender_service is not None else RecommenderMetrics()
+pool_in_flight = api_metrics.gauge("recommender_pool_in_flight", "Scoring calls running or queued on the worker pool")
+cache_entries = api_metrics.gauge("recommender_cache_entries", "Rankings held in the result cache")
+preference_cache_entries = api_metrics.gauge(
+    "recommender_preference_cache_entries", "Resolved preferences held in the match cache", ["category"]
+)
+
+# Send the X-Timing breakdown on every response, not only when the request asks for it
+timing_header_always = os.getenv("RECOMMENDER_TIMING_HEADER", "0") == "1"
+
+@contextmanager
+def track_request(endpoint: str) -> Iterator[Timings]:
+    """Time a handler and count it by status code, yielding the request's stage timings"""
+    start = time.perf_counter()
+    status = 500
+    with collect_timings() as timings:
+        try:
+            yield timings
+            status = 200
+        except HTTPException as e:
+            status = e.status_code
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            timings.add("total", elapsed)
+            api_metrics.request_seconds.observe(elapsed, endpoint=endpoint)
+            api_metrics.requests.inc(endpoint=endpoint, status=str(status))
+
+def json_response(body: Union[str, bytes], http_request: Request, timings: Timings) -> Response:
+    """Pre-serialized JSON body, with the X-Timing header when enabled or requested"""
+    headers = {}
+    if timing_header_always or http_request.headers.get("X-Timing", "0") not in ("", "0"):
+        headers["X-Timing"] = timings.header()
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.on_event("startup")
+def warm_up_indexes():
+    """Build or load every category's index in the background so the first requests are fast"""
+    if recommender_service is None:
+        return
+    
+    def warm_up():
+        try:
+            recommender_service.load_all()
+            logger.info("Recommender indexes ready")
+        except Exception as e:
+            logger.error(f"Failed to warm up recommender indexes: {e}")
+    
+    threading.Thread(target=warm_up, name="index-warm-up", daemon=True).start()
+
+# Incremental catalog changes are folded into a full refit periodically
+compaction_interval = float(os.getenv("RECOMMENDER_COMPACT_INTERVAL", "300"))
+compaction_stop = threading.Event()
+
+@app.on_event("startup")
+def start_compaction():
+    """Periodically refit categories that received incremental updates"""
+    if recommender_service is None or compaction_interval <= 0:
+        return
+    
+    def compact_loop():
+        while not compaction_stop.wait(compaction_interval):
+            try:
+                compacted = recommender_service.compact_pending()
+                if compacted:
+                    logger.info(f"Compacted categories: {compacted}")
+            except Exception as e:
+                logger.error(f"Background compaction failed: {e}")
+    
+    threading.Thread(target=compact_loop, name="index-compaction", daemon=True).start()
+
+@app.on_event("shutdown")
+def shutdown_worker_pool():
+    compaction_stop.set()
+    worker_pool.shutdown()
+    if request_log is not None:
+        request_log.close()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -51,38 +158,242 @@ async def get_categories():
     }
 
 @app.post("/recommend", response_model=RecommendationResponse)
-async def get_recommendations(request: RecommendationRequest):
+async def get_recommendations(request: RecommendationRequest, http_request: Request):
     """Get recommendations based on user preferences"""
+    with track_request("recommend") as timings:
+        try:
+            logger.info(f"Received recommendation request: {request}")
+            
+            if recommender_service is None:
+                raise HTTPException(status_code=500, detail="RecommenderService not initialized")
+            
+            # Includes time queued on the worker pool; the service records its own stages inside.
+            # The service returns the finished RecommendationResponse JSON, assembled from
+            # pre-encoded catalog items, so no models are built or re-validated here.
+            with api_metrics.span("service"):
+                body = await worker_pool.call_service(
+                    recommender_service,
+                    "get_recommendations_json",
+                    source_category=request.source_category,
+                    target_category=request.target_category,
+                    preferences=request.preferences,
+                    limit=request.limit,
+                    filters=request.filters
+                )
+            
+            logger.info(f"Generated recommendations ({len(body)} bytes)")
+        except HTTPException:
+            raise
+        except PoolSaturatedError as e:
+            logger.warning(f"Rejecting recommendation request: {e}")
+            raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+        except PoolTimeoutError as e:
+            logger.warning(f"Recommendation request timed out: {e}")
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error in get_recommendations: {e}")
+            logger.error(traceback.format_exc())
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    return json_response(body, http_request, timings)
+
+@app.post("/recommend/batch", response_model=BatchRecommendationResponse)
+async def get_recommendations_batch(request: BatchRecommendationRequest, http_request: Request):
+    """Get recommendations for many requests in one call"""
+    with track_request("recommend_batch") as timings:
+        try:
+            logger.info(f"Received batch of {len(request.requests)} recommendation requests")
+            
+            if recommender_service is None:
+                raise HTTPException(status_code=500, detail="RecommenderService not initialized")
+            
+            with api_metrics.span("service"):
+                results = await worker_pool.call_service(
+                    recommender_service,
+                    "get_recommendations_batch",
+                    requests=request.requests
+                )
+            
+            with api_metrics.span("response"):
+                response = BatchRecommendationResponse(results=results, total_count=len(results))
+            with api_metrics.span("serialize"):
+                body = response.model_dump_json()
+        except HTTPException:
+            raise
+        except PoolSaturatedError as e:
+            logger.warning(f"Rejecting batch request: {e}")
+            raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+        except PoolTimeoutError as e:
+            logger.warning(f"Batch request timed out: {e}")
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error in get_recommendations_batch: {e}")
+            logger.error(traceback.format_exc())
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    return json_response(body, http_request, timings)
+
+@app.post("/recommend/pages", response_model=RecommendationPage)
+async def get_recommendation_pages(request: RecommendationPageRequest):
+    """First page of a long recommendation list; follow next_cursor for the rest"""
+    # The ranking is retained by the service that computed it, so follow-ups must reach the same one
+    require_thread_pool("Paginated recommendations")
+    body = await call_service(
+        "get_recommendation_page",
+        source_category=request.source_category,
+        target_category=request.target_category,
+        preferences=request.preferences,
+        page_size=request.page_size,
+        filters=request.filters
+    )
+    return Response(content=body, media_type="application/json")
+
+@app.get("/recommend/pages/{cursor}", response_model=RecommendationPage)
+async def get_next_recommendation_page(cursor: str, page_size: int = Query(default=20, ge=1, le=100)):
+    """Following page of a retained ranking; a slice, so cheap enough to serve without the pool"""
+    require_thread_pool("Paginated recommendations")
+    if recommender_service is None:
+        raise HTTPException(status_code=500, detail="RecommenderService not initialized")
+    
     try:
-        logger.info(f"Received recommendation request: {request}")
-        
-        if recommender_service is None:
-            raise HTTPException(status_code=500, detail="RecommenderService not initialized")
-        
-        recommendations = recommender_service.get_recommendations(
-            source_category=request.source_category,
-            target_category=request.target_category,
-            preferences=request.preferences,
-            limit=request.limit
-        )
-        
-        logger.info(f"Generated {len(recommendations)} recommendations")
-        
-        return RecommendationResponse(
-            recommendations=recommendations,
-            source_category=request.source_category,
-            target_category=request.target_category,
-            total_count=len(recommendations)
-        )
-    except Exception as e:
-        logger.error(f"Error in get_recommendations: {e}")
-        logger.error(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        body = recommender_service.get_next_page(cursor, page_size)
+    except ValueError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    return Response(content=body, media_type="application/json")
+
+# Items ranked on their own for the first streamed chunk, so the first bytes go out early
+STREAM_FIRST_CHUNK = 20
+
+@app.post("/recommend/stream")
+async def stream_recommendations(request: RecommendationStreamRequest):
+    """Stream recommendations as NDJSON, one RecommendationItem per line, best first
+    
+    When ranking fails after the first chunk has been sent, the stream ends
+    with an ``{"error": ...}`` line instead of more items.
+    """
+    query = {
+        "source_category": request.source_category,
+        "target_category": request.target_category,
+        "preferences": request.preferences,
+        "filters": request.filters,
+    }
+    
+    # Both passes rank against the same indexes; process workers never see catalog updates
+    if worker_pool.kind == "thread" and request.limit > STREAM_FIRST_CHUNK:
+        query["stream"] = secrets.token_urlsafe(12)
+    
+    # Rank the first chunk before responding, so invalid requests still get an HTTP error status
+    first_size = min(STREAM_FIRST_CHUNK, request.limit)
+    first_chunk = await call_service("get_recommendations_ndjson", limit=first_size, **query)
+    
+    async def chunks():
+        yield first_chunk
+        if request.limit > first_size and first_chunk.count(b"\n") == first_size:
+            # A deeper pass; its first items are exactly the chunk already sent
+            try:
+                yield await worker_pool.call_service(
+                    recommender_service, "get_recommendations_ndjson",
+                    limit=request.limit, offset=first_size, **query
+                )
+            except Exception as e:
+                logger.error(f"Recommendation stream failed after the first chunk: {e}")
+                # The status line is already sent, so the failure is reported in the body
+                yield json.dumps({"error": str(e) or type(e).__name__}).encode() + b"\n"
+    
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+@app.get("/items/{category}/{item_id}/similar", response_model=RecommendationResponse)
+async def get_similar_items(category: str, item_id: str, limit: int = Query(default=5, ge=1, le=20)):
+    """Get items similar to a catalog item within the same category"""
+    recommendations = await call_service(
+        "get_similar_items", status_code=404, category=category, item_id=item_id, limit=limit
+    )
+    
+    return RecommendationResponse(
+        recommendations=recommendations,
+        source_category=category,
+        target_category=category,
+        total_count=len(recommendations)
+    )
+
+async def call_service(method: str, status_code: int = 400, **kwargs):
+    """Run a service method on the worker pool, mapping failures to HTTP errors"""
+    if recommender_service is None:
+        raise HTTPException(status_code=500, detail="RecommenderService not initialized")
+    
+    try:
+        return await worker_pool.call_service(recommender_service, method, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=status_code, detail=str(e))
+    except PoolSaturatedError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+    except PoolTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+def require_thread_pool(feature: str):
+    """Reject features that need the service state shared by every request"""
+    if worker_pool.kind == "process":
+        # Each worker process owns a private service that other requests never see
+        raise HTTPException(status_code=409, detail=f"{feature} require RECOMMENDER_POOL=thread")
+
+async def apply_catalog_change(method: str, status_code: int, **kwargs) -> int:
+    """Run a catalog change on the in-process service, mapping failures to HTTP errors"""
+    require_thread_pool("Catalog updates")
+    return await call_service(method, status_code, **kwargs)
+
+@app.post("/admin/{category}/items", response_model=CatalogChangeResponse, status_code=201)
+async def add_item(category: str, item: CatalogItem):
+    """Add an item to a category without rebuilding it"""
+    total_items = await apply_catalog_change("add_item", 400, category=category, item=item.model_dump())
+    return CatalogChangeResponse(category=category, item_id=item.id, action="added", total_items=total_items)
+
+@app.put("/admin/{category}/items/{item_id}", response_model=CatalogChangeResponse)
+async def update_item(category: str, item_id: str, item: CatalogItemFields):
+    """Replace an item's fields without rebuilding its category"""
+    total_items = await apply_catalog_change(
+        "update_item", 404, category=category, item_id=item_id, item=item.model_dump()
+    )
+    return CatalogChangeResponse(category=category, item_id=item_id, action="updated", total_items=total_items)
+
+@app.delete("/admin/{category}/items/{item_id}", response_model=CatalogChangeResponse)
+async def delete_item(category: str, item_id: str):
+    """Remove an item without rebuilding its category"""
+    total_items = await apply_catalog_change("delete_item", 404, category=category, item_id=item_id)
+    return CatalogChangeResponse(category=category, item_id=item_id, action="deleted", total_items=total_items)
+
+@app.post("/admin/{category}/compact", response_model=CatalogChangeResponse)
+async def compact_category(category: str):
+    """Refit a category now, folding in its incremental changes"""
+    compacted = await apply_catalog_change("compact", 404, category=category)
+    total_items = len(recommender_service.categories[category])
+    # A change landing mid-refit wins; the next compaction picks it up
+    return CatalogChangeResponse(
+        category=category, action="compacted" if compacted else "skipped", total_items=total_items
+    )
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "recommender-api"}
+    """Health check endpoint, including index readiness"""
+    if recommender_service is None:
+        return {"status": "healthy", "service": "recommender-api", "ready": False, "index": {}}
+    
+    index_status = recommender_service.index_status()
+    return {
+        "status": "healthy",
+        "service": "recommender-api",
+        "ready": index_status["ready"],
+        "index": index_status["categories"]
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: request and stage latency histograms, cache, matching and catalog counters"""
+    pool_in_flight.set(worker_pool.in_flight)
+    if recommender_service is not None:
+        cache_entries.set(recommender_service.result_cache.stats()["size"])
+        for category, stats in recommender_service.preference_cache.stats()["categories"].items():
+            preference_cache_entries.set(stats["size"], category=category)
+    return Response(content=api_metrics.render(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
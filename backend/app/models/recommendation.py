@@ -1,5 +1,24 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Any, Optional, Tuple
+
+class RecommendationFilters(BaseModel):
+    """Attributes every recommended item must have; items missing a filtered attribute are left out"""
+    genres: Optional[List[str]] = Field(default=None, min_length=1, description="Allowed genres, case-insensitive")
+    min_year: Optional[int] = Field(default=None, description="Earliest year, inclusive")
+    max_year: Optional[int] = Field(default=None, description="Latest year, inclusive")
+    min_rating: Optional[float] = Field(default=None, description="Lowest rating, inclusive")
+    
+    @model_validator(mode="after")
+    def check_year_range(self) -> "RecommendationFilters":
+        if self.min_year is not None and self.max_year is not None and self.min_year > self.max_year:
+            raise ValueError("min_year must not be after max_year")
+        return self
+    
+    def key(self) -> Optional[Tuple]:
+        """Hashable form for cache keys, None when nothing is filtered"""
+        genres = tuple(sorted({genre.strip().lower() for genre in self.genres})) if self.genres is not None else None
+        key = (genres, self.min_year, self.max_year, self.min_rating)
+        return None if key == (None, None, None, None) else key
 
 class RecommendationRequest(BaseModel):
     """Request model for getting recommendations"""
@@ -7,6 +26,7 @@ class RecommendationRequest(BaseModel):
     target_category: str = Field(..., description="Category to get recommendations for (e.g., 'movies')")
     preferences: List[str] = Field(..., description="List of user preferences in source category")
     limit: int = Field(default=5, ge=1, le=20, description="Number of recommendations to return")
+    filters: Optional[RecommendationFilters] = Field(default=None, description="Only recommend items matching these attributes")
 
 class RecommendationItem(BaseModel):
     """Model for a single recommendation item"""
@@ -46,4 +66,57 @@ class RecommendationResponse(BaseModel):
                 "total_count": 1
             }
         }
-    } 
\ No newline at end of file
+    }
+
+class BatchRecommendationRequest(BaseModel):
+    """Request model for getting recommendations for many requests at once"""
+    requests: List[RecommendationRequest] = Field(..., min_length=1, max_length=1000, description="Recommendation requests to process")
+
+class BatchRecommendationResult(BaseModel):
+    """Outcome of one request in a batch: either a response or an error message"""
+    response: Optional[RecommendationResponse] = None
+    error: Optional[str] = None
+
+class RecommendationPageRequest(BaseModel):
+    """Request for the first page of a long, cursor-paginated recommendation list"""
+    source_category: str = Field(..., description="Category of user preferences (e.g., 'books')")
+    target_category: str = Field(..., description="Category to get recommendations for (e.g., 'movies')")
+    preferences: List[str] = Field(..., description="List of user preferences in source category")
+    page_size: int = Field(default=20, ge=1, le=100, description="Recommendations per page")
+    filters: Optional[RecommendationFilters] = Field(default=None, description="Only recommend items matching these attributes")
+
+class RecommendationPage(RecommendationResponse):
+    """One page of a retained ranking; total_count counts the whole ranking"""
+    next_cursor: Optional[str] = Field(None, description="Cursor of the following page, null on the last page")
+
+class RecommendationStreamRequest(BaseModel):
+    """Request for a streamed NDJSON recommendation list"""
+    source_category: str = Field(..., description="Category of user preferences (e.g., 'books')")
+    target_category: str = Field(..., description="Category to get recommendations for (e.g., 'movies')")
+    preferences: List[str] = Field(..., description="List of user preferences in source category")
+    limit: int = Field(default=100, ge=1, le=1000, description="Number of recommendations to stream")
+    filters: Optional[RecommendationFilters] = Field(default=None, description="Only recommend items matching these attributes")
+
+class BatchRecommendationResponse(BaseModel):
+    """Response model for batch recommendations, in request order"""
+    results: List[BatchRecommendationResult]
+    total_count: int = Field(..., description="Number of requests processed")
+
+class CatalogItemFields(BaseModel):
+    """Editable fields of a catalog item"""
+    title: str = Field(..., min_length=1)
+    description: Optional[str] = None
+    genre: Optional[str] = None
+    rating: Optional[float] = None
+    year: Optional[int] = None
+
+class CatalogItem(CatalogItemFields):
+    """A catalog item to add to a category"""
+    id: str = Field(..., min_length=1)
+
+class CatalogChangeResponse(BaseModel):
+    """Result of an admin change to a category"""
+    category: str
+    item_id: Optional[str] = None
+    action: str
+    total_items: int = Field(..., description="Items in the category after the change")
@@ -0,0 +1,186 @@
+import time
+import numpy as np
+from scipy import sparse
+from typing import Dict, List, Optional, Tuple
+
+from .scoring import top_k_indices
+
+RETRIEVAL_MODES = ("exact", "lsh")
+
+# Items per bucket the automatic bit count aims for
+TARGET_BUCKET_SIZE = 16
+MAX_BITS = 24
+
+
+def default_bits(n_items: int) -> int:
+    """Hash bits per table so that buckets hold about TARGET_BUCKET_SIZE items"""
+    return int(np.clip(np.round(np.log2(max(n_items, 1) / TARGET_BUCKET_SIZE)), 1, MAX_BITS))
+
+
+class RandomProjectionLSH:
+    """Approximate cosine nearest neighbors by random-hyperplane hashing
+
+    Every item is hashed into one bucket per table by the signs of its
+    projections on ``n_bits`` random hyperplanes. A query gathers the items
+    sharing its bucket in each table, plus the ``n_probes`` neighboring
+    buckets whose hash differs in the least certain bit, and ranks only those
+    candidates by exact cosine similarity.
+
+    Recall grows with ``n_tables`` and ``n_probes`` and shrinks with
+    ``n_bits``; query cost moves the other way.
+    """
+
+    def __init__(self, matrix: sparse.csr_matrix, planes: np.ndarray, sorted_codes: np.ndarray,
+                 order: np.ndarray, n_tables: int, n_bits: int, n_probes: int = 2):
+        self.matrix = matrix
+        self.planes = planes
+        self.sorted_codes = sorted_codes
+        self.order = order
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.n_probes = n_probes
+        self._weights = np.left_shift(np.int64(1), np.arange(n_bits, dtype=np.int64))
+
+    @classmethod
+    def build(cls, matrix: sparse.csr_matrix, n_tables: int = 8, n_bits: Optional[int] = None,
+              n_probes: int = 2, seed: int = 0, chunk_size: int = 4096) -> "RandomProjectionLSH":
+        """Hash every row of an L2-normalized matrix"""
+        n_items, n_features = matrix.shape
+        n_bits = default_bits(n_items) if n_bits is None else n_bits
+        if not 1 <= n_bits <= 62:
+            raise ValueError("n_bits must be between 1 and 62")
+
+        rng = np.random.default_rng(seed)
+        planes = rng.standard_normal((n_features, n_tables * n_bits)).astype(np.float32)
+
+        index = cls(matrix, planes, np.zeros((n_tables, 0), dtype=np.int64),
+                    np.zeros((n_tables, 0), dtype=np.int32), n_tables, n_bits, n_probes)
+
+        # Project in row chunks so the dense projections stay small
+        codes = np.empty((n_tables, n_items), dtype=np.int64)
+        for start in range(0, n_items, chunk_size):
+            stop = min(start + chunk_size, n_items)
+            codes[:, start:stop] = index._codes(np.asarray(matrix[start:stop] @ planes)).T
+
+        index.order = np.argsort(codes, axis=1, kind='stable').astype(np.int32)
+        index.sorted_codes = np.take_along_axis(codes, index.order, axis=1)
+        return index
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def _codes(self, projections: np.ndarray) -> np.ndarray:
+        """Bucket code of each row in every table, shape (n_rows, n_tables)"""
+        bits = projections.reshape(len(projections), self.n_tables, self.n_bits) > 0
+        return bits.astype(np.int64) @ self._weights
+
+    def candidates(self, vector: sparse.csr_matrix, n_probes: Optional[int] = None) -> np.ndarray:
+        """Sorted ids of the items sharing a probed bucket with a single query row"""
+        n_probes = self.n_probes if n_probes is None else n_probes
+        projection = np.asarray(vector @ self.planes).reshape(self.n_tables, self.n_bits)
+        codes = self._codes(projection.reshape(1, -1))[0]
+
+        found = []
+        for table in range(self.n_tables):
+            probes = [codes[table]]
+            # Flip the bits whose hyperplane the query lies closest to
+            for bit in np.argsort(np.abs(projection[table]), kind='stable')[:n_probes]:
+                probes.append(codes[table] ^ self._weights[bit])
+
+            table_codes = self.sorted_codes[table]
+            for code in probes:
+                lo = np.searchsorted(table_codes, code, side='left')
+                hi = np.searchsorted(table_codes, code, side='right')
+                if hi > lo:
+                    found.append(self.order[table, lo:hi])
+
+        if not found:
+            return np.zeros(0, dtype=np.int32)
+        return np.unique(np.concatenate(found))
+
+    def query(self, vector: sparse.csr_matrix, k: int,
+              n_probes: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k (ids, cosine similarities) for a single query row, best first"""
+        if vector.nnz == 0:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64)
+
+        candidate_ids = self.candidates(vector, n_probes)
+        similarities = np.asarray((self.matrix[candidate_ids] @ vector.T).todense()).ravel()
+        top = top_k_indices(similarities, k)
+        return candidate_ids[top], similarities[top]
+
+    @property
+    def nbytes(self) -> int:
+        return self.planes.nbytes + self.sorted_codes.nbytes + self.order.nbytes
+
+
+def recall_at_k(index: RandomProjectionLSH, queries: sparse.csr_matrix, k: int = 10,
+                n_probes: Optional[int] = None) -> Dict[str, float]:
+    """Recall@k of the index against exact cosine search, with per-query latencies in milliseconds
+
+    Only exact neighbors with a positive similarity count towards recall.
+    """
+    exact_similarities = (queries @ index.matrix.T).toarray()
+
+    hits = 0
+    relevant = 0
+    exact_ms: List[float] = []
+    approx_ms: List[float] = []
+    for row in range(queries.shape[0]):
+        vector = queries[row]
+
+        start = time.perf_counter()
+        similarities = np.asarray((vector @ index.matrix.T).todense()).ravel()
+        expected = top_k_indices(similarities, k)
+        exact_ms.append((time.perf_counter() - start) * 1000)
+        expected = set(expected[exact_similarities[row, expected] > 0].tolist())
+
+        start = time.perf_counter()
+        found, _ = index.query(vector, k, n_probes)
+        approx_ms.append((time.perf_counter() - start) * 1000)
+
+        hits += len(expected & set(found.tolist()))
+        relevant += len(expected)
+
+    return {
+        "k": k,
+        "queries": queries.shape[0],
+        "recall": hits / relevant if relevant else 1.0,
+        "exact_ms": float(np.mean(exact_ms)) if exact_ms else 0.0,
+        "lsh_ms": float(np.mean(approx_ms)) if approx_ms else 0.0,
+    }
+
+
+def main():
+    """Print recall@k of the LSH backend against exact search for every category
+
+    Usage, from the backend directory::
+
+        python -m app.services.ann --k 10 --tables 4 8 16 --probes 0 2 4
+    """
+    import argparse
+    from .recommender import RecommenderService
+
+    parser = argparse.ArgumentParser(description="Recall@k report for approximate preference matching")
+    parser.add_argument("--k", type=int, default=10, help="Neighbors compared per query")
+    parser.add_argument("--tables", type=int, nargs="+", default=[4, 8, 16], help="Hash tables to try")
+    parser.add_argument("--bits", type=int, default=None, help="Hash bits per table (default: from catalog size)")
+    parser.add_argument("--probes", type=int, nargs="+", default=[0, 2, 4], help="Extra buckets probed per table")
+    parser.add_argument("--queries", type=int, default=200, help="Catalog items used as queries per category")
+    args = parser.parse_args()
+
+    service = RecommenderService()
+    print(f"{'category':<10} {'items':>7} {'tables':>6} {'bits':>4} {'probes':>6} "
+          f"{'recall@' + str(args.k):>9} {'exact ms':>9} {'lsh ms':>8}")
+    for category, store in service.item_stores.items():
+        queries = store.tfidf_matrix[:args.queries]
+        for n_tables in args.tables:
+            index = RandomProjectionLSH.build(store.tfidf_matrix, n_tables=n_tables, n_bits=args.bits)
+            for n_probes in args.probes:
+                report = recall_at_k(index, queries, k=args.k, n_probes=n_probes)
+                print(f"{category:<10} {len(store):>7} {n_tables:>6} {index.n_bits:>4} {n_probes:>6} "
+                      f"{report['recall']:>9.3f} {report['exact_ms']:>9.3f} {report['lsh_ms']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
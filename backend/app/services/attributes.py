@@ -0,0 +1,97 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+from .catalog import Catalog, MISSING_YEAR
+
+
+class AttributeIndex:
+    """Items of one catalog ordered by year, by rating and grouped by genre, for filtering before scoring
+
+    Every filter selects a contiguous run of one of these orders, so the
+    candidates are gathered from the most selective filter alone and only
+    they are checked against the others. The cost follows the size of the
+    filtered result, not the size of the catalog.
+    """
+
+    def __init__(self, catalog: Catalog, year_order: np.ndarray, rating_order: np.ndarray, genre_order: np.ndarray):
+        self.genre_codes = catalog.genre_codes
+        self.years = catalog.years
+        self.ratings = catalog.ratings
+
+        self.year_order = year_order
+        self.sorted_years = self.years[self.year_order]
+        self.rating_order = rating_order
+        self.sorted_ratings = self.ratings[self.rating_order]
+        self.n_rated = int(np.count_nonzero(~np.isnan(self.ratings)))
+
+        # Items of genre code c are genre_order[genre_offsets[c]:genre_offsets[c + 1]]
+        self.genre_order = genre_order
+        counts = np.bincount(self.genre_codes, minlength=len(catalog.genre_names))
+        self.genre_offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.genre_lookup: Dict[str, List[int]] = {}
+        for code, name in enumerate(catalog.genre_names):
+            self.genre_lookup.setdefault((name or "").strip().lower(), []).append(code)
+
+    @classmethod
+    def build(cls, catalog: Catalog) -> "AttributeIndex":
+        # Missing years sort first as MISSING_YEAR, missing (NaN) ratings last
+        return cls(
+            catalog,
+            np.argsort(catalog.years, kind="stable"),
+            np.argsort(catalog.ratings, kind="stable"),
+            np.argsort(catalog.genre_codes, kind="stable"),
+        )
+
+    def __len__(self) -> int:
+        return len(self.years)
+
+    def genre_codes_of(self, genres: Sequence[str]) -> np.ndarray:
+        """Codes of the catalog genres named, compared case-insensitively"""
+        codes = {code for genre in genres for code in self.genre_lookup.get(genre.strip().lower(), ())}
+        return np.asarray(sorted(codes), dtype=np.int64)
+
+    def candidates(self, genres: Optional[Sequence[str]] = None, min_year: Optional[int] = None,
+                   max_year: Optional[int] = None, min_rating: Optional[float] = None) -> Optional[np.ndarray]:
+        """Positions of the items passing every given filter, in catalog order; None when nothing is filtered
+
+        Items without a year or rating never pass a filter on it.
+        """
+        # (size, gather) of each filter's run; only the smallest run is gathered
+        runs = []
+        if genres is not None:
+            codes = self.genre_codes_of(genres)
+            starts, ends = self.genre_offsets[codes], self.genre_offsets[codes + 1]
+            runs.append((int((ends - starts).sum()), lambda: np.concatenate(
+                [self.genre_order[start:end] for start, end in zip(starts, ends)] + [np.zeros(0, dtype=np.int64)]
+            )))
+        if min_year is not None or max_year is not None:
+            first_year = MISSING_YEAR + 1 if min_year is None else max(min_year, MISSING_YEAR + 1)
+            year_low = np.searchsorted(self.sorted_years, first_year)
+            year_high = len(self) if max_year is None else np.searchsorted(self.sorted_years, max_year, side="right")
+            year_high = max(year_low, year_high)
+            runs.append((int(year_high - year_low), lambda: self.year_order[year_low:year_high]))
+        if min_rating is not None:
+            rating_low = np.searchsorted(self.sorted_ratings[:self.n_rated], min_rating)
+            runs.append((int(self.n_rated - rating_low), lambda: self.rating_order[rating_low:self.n_rated]))
+        if not runs:
+            return None
+
+        _, gather = min(runs, key=lambda run: run[0])
+        positions = np.sort(gather())
+
+        # Check the remaining filters on the candidates only
+        keep = np.ones(len(positions), dtype=bool)
+        if genres is not None:
+            allowed = np.zeros(len(self.genre_offsets) - 1, dtype=bool)
+            allowed[codes] = True
+            keep &= allowed[self.genre_codes[positions]]
+        if min_year is not None or max_year is not None:
+            years = self.years[positions]
+            keep &= years != MISSING_YEAR
+            if min_year is not None:
+                keep &= years >= min_year
+            if max_year is not None:
+                keep &= years <= max_year
+        if min_rating is not None:
+            keep &= self.ratings[positions] >= min_rating
+        return positions[keep]
@@ -0,0 +1,128 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from multiprocessing import get_context
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .catalog import Catalog
+from .item_store import ItemStore, combined_texts, new_vectorizer
+from .neighbors import NeighborIndex
+from .scoring import TokenIncidence, TokenVocabulary
+from .title_index import TitleIndex
+
+# Stages of a category build, in the order they run
+BUILD_STAGES = ("vectorize", "tokenize", "title_index", "neighbors")
+
+# Below this many items in total, starting worker processes costs more than building in turn
+PARALLEL_BUILD_MIN_ITEMS = 20000
+
+# Called with a category and its stage timings, in seconds, as each build finishes
+Progress = Callable[[str, Dict[str, float]], None]
+
+
+@contextmanager
+def _stage(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+def index_catalog(catalog: Catalog, vocabulary: TokenVocabulary,
+                  neighbor_k: int) -> Tuple[ItemStore, NeighborIndex, Dict[str, float]]:
+    """Vectorize, tokenize and neighbor-index a catalog, timing each stage
+
+    Builds the same store as ``ItemStore.build``. The neighbor index is
+    computed in row chunks, so memory stays bounded whatever the catalog size.
+    """
+    timings: Dict[str, float] = {}
+    with _stage(timings, "vectorize"):
+        texts = combined_texts(catalog)
+        # Transform exactly as a query would be, so cached vectors match per-request ones
+        vectorizer = new_vectorizer()
+        tfidf_matrix = vectorizer.fit(texts).transform(texts)
+    with _stage(timings, "tokenize"):
+        tokens = TokenIncidence.from_texts(texts, list(catalog.titles), vocabulary)
+    with _stage(timings, "title_index"):
+        title_index = TitleIndex.build(catalog.titles)
+    with _stage(timings, "neighbors"):
+        # Keep only the top-k most similar items per item
+        neighbor_index = NeighborIndex.build(tfidf_matrix, k=neighbor_k)
+    return ItemStore(catalog, vectorizer, tfidf_matrix, tokens, title_index), neighbor_index, timings
+
+
+def _remap_columns(matrix: sparse.csr_matrix, ids: np.ndarray, n_columns: int) -> sparse.csr_matrix:
+    remapped = sparse.csr_matrix(
+        (matrix.data, ids[matrix.indices], matrix.indptr), shape=(matrix.shape[0], n_columns)
+    )
+    remapped.sort_indices()
+    return remapped
+
+
+class BuiltCategory:
+    """Indexes of one category built in a worker process, tokenized with the worker's own vocabulary
+
+    A worker cannot register words in the service's shared TokenVocabulary,
+    so ``tokens`` lists the words of its private one by id. ``store``
+    registers them in the shared vocabulary and renumbers the incidence
+    matrices, so they line up with every other category's.
+    """
+
+    def __init__(self, vectorizer, tfidf_matrix: sparse.csr_matrix, text_matrix: sparse.csr_matrix,
+                 title_matrix: sparse.csr_matrix, tokens: List[str], title_index: TitleIndex,
+                 neighbor_index: NeighborIndex, timings: Dict[str, float]):
+        self.vectorizer = vectorizer
+        self.tfidf_matrix = tfidf_matrix
+        self.text_matrix = text_matrix
+        self.title_matrix = title_matrix
+        self.tokens = tokens
+        self.title_index = title_index
+        self.neighbor_index = neighbor_index
+        self.timings = timings
+
+    def store(self, catalog: Catalog, vocabulary: TokenVocabulary) -> Tuple[ItemStore, NeighborIndex]:
+        """Item store and neighbor index of the category, with word ids from the shared vocabulary"""
+        ids = np.fromiter((vocabulary.add(token) for token in self.tokens), dtype=np.int32, count=len(self.tokens))
+        n_words = len(vocabulary)
+        tokens = TokenIncidence(
+            _remap_columns(self.text_matrix, ids, n_words),
+            _remap_columns(self.title_matrix, ids, n_words),
+            vocabulary
+        )
+        store = ItemStore(catalog, self.vectorizer, self.tfidf_matrix, tokens, self.title_index)
+        return store, self.neighbor_index
+
+
+def _build_in_worker(catalog: Catalog, neighbor_k: int) -> BuiltCategory:
+    vocabulary = TokenVocabulary()
+    store, neighbor_index, timings = index_catalog(catalog, vocabulary, neighbor_k)
+    return BuiltCategory(
+        store.vectorizer, store.tfidf_matrix, store.tokens.text_matrix, store.tokens.title_matrix,
+        sorted(vocabulary.index, key=vocabulary.index.get), store.title_index, neighbor_index, timings
+    )
+
+
+def build_categories(catalogs: Dict[str, Catalog], neighbor_k: int, max_workers: int,
+                     progress: Optional[Progress] = None) -> Dict[str, BuiltCategory]:
+    """Build several categories at once, one worker process per category
+
+    The largest catalogs start first, so the slowest build is not left for
+    last. Workers are spawned rather than forked, because the server calls
+    this from a background thread.
+    """
+    if not catalogs:
+        return {}
+    order = sorted(catalogs, key=lambda category: len(catalogs[category]), reverse=True)
+    built: Dict[str, BuiltCategory] = {}
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(order)), mp_context=get_context("spawn")) as pool:
+        futures = {pool.submit(_build_in_worker, catalogs[category], neighbor_k): category for category in order}
+        for future in as_completed(futures):
+            category = futures[future]
+            built[category] = future.result()
+            if progress is not None:
+                progress(category, built[category].timings)
+    return built
@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class LRUCache:
+    """Thread-safe LRU cache with an optional time-to-live per entry
+
+    ``maxsize=0`` disables caching entirely; ``ttl=None`` keeps entries until
+    they are evicted.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or entry[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float('inf')
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value, or ``default`` when it is missing or expired"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None or (self.ttl is not None and entry[0] <= time.monotonic()):
+            return default
+        return entry[1]
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches the predicate, returning how many were dropped"""
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def normalize_preferences(preferences: Iterable[str]) -> Tuple[str, ...]:
+    """Order-insensitive, trimmed, lowercased and de-duplicated preferences
+
+    Matching and scoring lowercase every preference and aggregate matches
+    with a maximum, so any two requests with the same normalized
+    preferences produce the same ranking.
+    """
+    return tuple(sorted({p.strip().lower() for p in preferences if p.strip()}))
+
+
+class ResultCache:
+    """Cache of full rankings keyed by (source_category, target_category, preferences, index versions)
+
+    Each entry keeps a ranking at least ``depth`` items long, so any request
+    with a smaller ``limit`` is served by slicing. A ranking shorter than the
+    depth it was computed for is complete and serves every limit.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 300.0, depth: int = 20):
+        self.depth = depth
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def key(source_category: str, target_category: str, preferences: Iterable[str], versions: Tuple = (),
+            filters: Optional[Tuple] = None) -> Tuple:
+        """Cache key of a request; ``versions`` ties it to the category indexes it was ranked on"""
+        return (source_category, target_category, normalize_preferences(preferences), versions, filters)
+
+    def get(self, key: Tuple, limit: int) -> Optional[list]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        ranking, computed_depth = entry
+        if limit > len(ranking) and len(ranking) >= computed_depth:
+            # The cached ranking was truncated before this limit
+            return None
+        return ranking[:limit]
+
+    def put(self, key: Tuple, ranking: list, computed_depth: int):
+        self._cache.put(key, (ranking, computed_depth))
+
+    def invalidate_category(self, category: str) -> int:
+        """Drop every ranking that reads from or recommends into a category"""
+        return self._cache.invalidate(lambda key: category in (key[0], key[1]))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+class PreferenceCache:
+    """Resolved matches of single preferences, one bounded LRU per source category
+
+    Entries are keyed by the category index version and the normalized
+    preference, so they are shared by every target category and request and
+    never outlive the index they were matched against.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._caches: Dict[str, LRUCache] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(version: int, preference: str) -> Tuple[int, str]:
+        """Matching lowercases preferences, so case and surrounding whitespace never change the matches"""
+        return (version, preference.strip().lower())
+
+    def _cache(self, category: str) -> LRUCache:
+        with self._lock:
+            cache = self._caches.get(category)
+            if cache is None:
+                cache = self._caches[category] = LRUCache(maxsize=self.maxsize)
+            return cache
+
+    def get(self, category: str, key: Tuple[int, str]) -> Optional[Any]:
+        return self._cache(category).get(key)
+
+    def put(self, category: str, key: Tuple[int, str], value: Any):
+        self._cache(category).put(key, value)
+
+    def invalidate_category(self, category: str) -> int:
+        """Drop every match resolved against a category, returning how many were dropped"""
+        return self._cache(category).invalidate(lambda key: True)
+
+    def clear(self):
+        with self._lock:
+            caches = list(self._caches.values())
+        for cache in caches:
+            cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals across categories, plus each category's own LRU stats"""
+        with self._lock:
+            per_category = {category: cache.stats() for category, cache in self._caches.items()}
+        hits = sum(stats["hits"] for stats in per_category.values())
+        misses = sum(stats["misses"] for stats in per_category.values())
+        return {
+            "size": sum(stats["size"] for stats in per_category.values()),
+            "maxsize": self.maxsize,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "categories": per_category,
+        }
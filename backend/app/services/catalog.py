@@ -0,0 +1,262 @@
+import json
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+# Sentinels for missing numeric fields
+MISSING_YEAR = np.iinfo(np.int32).min
+
+# Files loaded line by line rather than as one JSON array
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+
+class StringColumn:
+    """Immutable column of strings packed into one UTF-8 buffer with int64 offsets
+
+    A million titles cost one bytes object and one offsets array instead of a
+    million Python string objects; values are decoded on access. Missing
+    values are stored as empty strings and flagged in a boolean ``nulls``
+    mask, which is None for a column without any. The buffer may be any
+    bytes-like object, such as a view of a memory-mapped snapshot file.
+    """
+
+    def __init__(self, buffer: bytes, offsets: np.ndarray, nulls: Optional[np.ndarray] = None):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.nulls = nulls if nulls is not None and nulls.any() else None
+
+    @classmethod
+    def from_strings(cls, values: Iterable[Optional[str]]) -> "StringColumn":
+        builder = StringColumnBuilder()
+        for value in values:
+            builder.append(value)
+        return builder.finish()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        return self.raw(idx).decode('utf-8')
+
+    def get(self, idx: int) -> Optional[str]:
+        """One value, or None when it is missing"""
+        if self.nulls is not None and self.nulls[idx]:
+            return None
+        return self[idx]
+
+    def raw(self, idx: int) -> bytes:
+        """Undecoded UTF-8 bytes of one value"""
+        return bytes(self.buffer[self.offsets[idx]:self.offsets[idx + 1]])
+
+    def __iter__(self) -> Iterator[str]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.nbytes + (self.nulls.nbytes if self.nulls is not None else 0)
+
+    def take(self, positions: np.ndarray) -> "StringColumn":
+        """New column holding the strings at the given positions, in that order"""
+        positions = np.asarray(positions, dtype=np.int64)
+        starts = self.offsets[:-1][positions]
+        lengths = self.offsets[1:][positions] - starts
+        offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        # Byte i of the result comes from byte (starts[row] + i - offsets[row]) of this column
+        source = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1], dtype=np.int64)
+        buffer = np.frombuffer(self.buffer, dtype=np.uint8)[source].tobytes()
+        return StringColumn(buffer, offsets, self.nulls[positions] if self.nulls is not None else None)
+
+    @staticmethod
+    def concat(columns: Sequence["StringColumn"]) -> "StringColumn":
+        offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for column in columns:
+            offsets.append(column.offsets[1:] + base)
+            base += len(column.buffer)
+        nulls = None
+        if any(column.nulls is not None for column in columns):
+            nulls = np.concatenate([
+                column.nulls if column.nulls is not None else np.zeros(len(column), dtype=bool) for column in columns
+            ])
+        return StringColumn(b"".join(bytes(column.buffer) for column in columns), np.concatenate(offsets), nulls)
+
+
+class StringColumnBuilder:
+    """Append-only builder for a StringColumn"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._offsets = array('q', [0])
+        self._null_positions: List[int] = []
+
+    def append(self, value: Optional[str]):
+        """Append a value; None is kept as a missing value, distinct from an empty string"""
+        if value is None:
+            self._null_positions.append(len(self._offsets) - 1)
+            value = ''
+        self.append_raw(value.encode('utf-8'))
+
+    def append_raw(self, value: bytes):
+        """Append already UTF-8 encoded bytes"""
+        self._buffer += value
+        self._offsets.append(len(self._buffer))
+
+    def finish(self) -> StringColumn:
+        nulls = None
+        if self._null_positions:
+            nulls = np.zeros(len(self._offsets) - 1, dtype=bool)
+            nulls[self._null_positions] = True
+        return StringColumn(bytes(self._buffer), np.frombuffer(self._offsets, dtype=np.int64).copy(), nulls)
+
+
+class Catalog:
+    """Columnar item catalog of one category
+
+    Ids, titles and descriptions are packed string columns, genres are small
+    integer codes into a list of distinct genre names (None among them when
+    some items have no genre), and years and ratings are NumPy arrays. Rows
+    are addressed by position, which is the item index used by every other
+    index of the category.
+    """
+
+    def __init__(self, ids: StringColumn, titles: StringColumn, descriptions: StringColumn,
+                 genre_codes: np.ndarray, genre_names: List[Optional[str]], years: np.ndarray, ratings: np.ndarray):
+        self.ids = ids
+        self.titles = titles
+        self.descriptions = descriptions
+        self.genre_codes = genre_codes
+        self.genre_names = genre_names
+        self.years = years
+        self.ratings = ratings
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "Catalog":
+        """Build a catalog from item dicts, consuming them one at a time"""
+        ids, titles, descriptions = StringColumnBuilder(), StringColumnBuilder(), StringColumnBuilder()
+        genre_codes = array('H')
+        genre_slots: Dict[Optional[str], int] = {}
+        years = array('i')
+        ratings = array('d')
+
+        for record in records:
+            ids.append(str(record['id']))
+            titles.append(str(record['title']))
+            descriptions.append(_text(record.get('description')))
+            genre = _text(record.get('genre'))
+            genre_codes.append(genre_slots.setdefault(genre, len(genre_slots)))
+            year = record.get('year')
+            years.append(MISSING_YEAR if year is None else int(year))
+            rating = record.get('rating')
+            ratings.append(np.nan if rating is None else float(rating))
+
+        if len(genre_slots) > np.iinfo(np.uint16).max:
+            raise ValueError("Too many distinct genres for 16-bit genre codes")
+
+        return cls(
+            ids.finish(),
+            titles.finish(),
+            descriptions.finish(),
+            np.frombuffer(genre_codes, dtype=np.uint16).copy(),
+            sorted(genre_slots, key=genre_slots.get),
+            np.frombuffer(years, dtype=np.int32).copy(),
+            np.frombuffer(ratings, dtype=np.float64).copy(),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def take(self, positions: np.ndarray) -> "Catalog":
+        """New catalog holding the items at the given positions, in that order"""
+        return Catalog(
+            self.ids.take(positions),
+            self.titles.take(positions),
+            self.descriptions.take(positions),
+            self.genre_codes[positions],
+            self.genre_names,
+            self.years[positions],
+            self.ratings[positions],
+        )
+
+    @staticmethod
+    def concat(catalogs: Sequence["Catalog"]) -> "Catalog":
+        """Items of several catalogs, one after the other, with their genre codes merged"""
+        genre_slots: Dict[Optional[str], int] = {}
+        genre_codes = []
+        for catalog in catalogs:
+            remap = np.asarray(
+                [genre_slots.setdefault(name, len(genre_slots)) for name in catalog.genre_names] or [0],
+                dtype=np.uint16
+            )
+            genre_codes.append(remap[catalog.genre_codes])
+
+        return Catalog(
+            StringColumn.concat([catalog.ids for catalog in catalogs]),
+            StringColumn.concat([catalog.titles for catalog in catalogs]),
+            StringColumn.concat([catalog.descriptions for catalog in catalogs]),
+            np.concatenate(genre_codes),
+            sorted(genre_slots, key=genre_slots.get),
+            np.concatenate([catalog.years for catalog in catalogs]),
+            np.concatenate([catalog.ratings for catalog in catalogs]),
+        )
+
+    def genre(self, idx: int) -> Optional[str]:
+        return self.genre_names[self.genre_codes[idx]]
+
+    @property
+    def genres(self) -> List[Optional[str]]:
+        """Genre of every item, in catalog order"""
+        return [self.genre_names[code] for code in self.genre_codes]
+
+    def record(self, idx: int) -> Dict[str, Any]:
+        """One item as a dict, with missing genre/year/rating/description as None"""
+        year = self.years[idx]
+        rating = self.ratings[idx]
+        return {
+            "id": self.ids[idx],
+            "title": self.titles[idx],
+            "genre": self.genre(idx),
+            "year": None if year == MISSING_YEAR else int(year),
+            "rating": None if np.isnan(rating) else float(rating),
+            "description": self.descriptions.get(idx),
+        }
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        for idx in range(len(self)):
+            yield self.record(idx)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the catalog's columns"""
+        return (
+            self.ids.nbytes + self.titles.nbytes + self.descriptions.nbytes
+            + self.genre_codes.nbytes + self.years.nbytes + self.ratings.nbytes
+        )
+
+
+def _text(value: Optional[Any]) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the items of a JSON Lines file one line at a time"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON: {e}") from e
+
+
+def load_catalog(path: str) -> Catalog:
+    """Load a catalog from a JSON array file or, streaming, from a JSONL/NDJSON file"""
+    if path.endswith(JSONL_SUFFIXES):
+        return Catalog.from_records(iter_jsonl(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        return Catalog.from_records(json.load(f))
@@ -0,0 +1,79 @@
+import itertools
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .catalog import Catalog, StringColumn
+from .item_store import ItemStore
+from .neighbors import NeighborIndex
+from .ann import RandomProjectionLSH
+from .attributes import AttributeIndex
+from .scoring import TokenVocabulary
+from .serialization import encode_items
+
+# Every published index gets a fresh version, across all categories
+_versions = itertools.count(1)
+
+
+class CategoryIndex:
+    """Everything served for one category, published to readers as a single immutable unit
+
+    Requests read a category through one CategoryIndex reference, so a
+    concurrent update, reload or compaction (which publishes a new instance)
+    never mixes old and new catalog rows within a request.
+
+    ``encoded_items`` holds every item's static response fields pre-encoded
+    as JSON; it is computed at construction unless passed in (from a
+    snapshot, or carried over from an index with the same rows), as are the
+    ``attributes`` used to filter recommendations. An index derived by
+    ``updated`` keeps the ``change`` that produced it, the (delta catalog,
+    row order) pair, so other structures can apply the same change.
+    """
+
+    def __init__(self, store: ItemStore, neighbor_index: NeighborIndex,
+                 ann_index: Optional[RandomProjectionLSH] = None, pending_changes: int = 0,
+                 encoded_items: Optional[StringColumn] = None, attributes: Optional[AttributeIndex] = None,
+                 change: Optional[Tuple[Catalog, np.ndarray]] = None):
+        self.store = store
+        self.neighbor_index = neighbor_index
+        self.ann_index = ann_index
+        self.pending_changes = pending_changes
+        self.encoded_items = encoded_items if encoded_items is not None else encode_items(store.catalog)
+        self.attributes = attributes if attributes is not None else AttributeIndex.build(store.catalog)
+        self.change = change
+        self.version = next(_versions)
+
+    @property
+    def catalog(self) -> Catalog:
+        return self.store.catalog
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def updated(self, replaced: Dict[int, Dict[str, Any]], appended: List[Dict[str, Any]],
+                deleted: Sequence[int], vocabulary: TokenVocabulary) -> "CategoryIndex":
+        """Index after replacing, appending and deleting items, without refitting the vectorizer
+
+        Replaced items keep their position; appended items go to the end;
+        deleted positions are removed and later items move up.
+        """
+        n_items = len(self)
+        replaced_positions = sorted(replaced)
+        delta = Catalog.from_records([replaced[idx] for idx in replaced_positions] + list(appended))
+
+        # order[new position] = position in concat([catalog, delta])
+        order = np.arange(n_items, dtype=np.int64)
+        order[replaced_positions] = n_items + np.arange(len(replaced_positions))
+        keep = np.ones(n_items, dtype=bool)
+        keep[list(deleted)] = False
+        order = np.concatenate([order[keep], n_items + len(replaced_positions) + np.arange(len(appended))])
+
+        new_ids = np.full(n_items + len(delta), -1, dtype=np.int64)
+        new_ids[order] = np.arange(len(order))
+
+        store = self.store.updated(delta, order, vocabulary)
+        neighbor_index = self.neighbor_index.updated(new_ids[:n_items], new_ids[n_items:], store.tfidf_matrix)
+        encoded_items = StringColumn.concat([self.encoded_items, encode_items(delta)]).take(order)
+        return CategoryIndex(
+            store, neighbor_index, pending_changes=self.pending_changes + len(delta) + len(deleted),
+            encoded_items=encoded_items, change=(delta, order)
+        )
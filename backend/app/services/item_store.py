@@ -0,0 +1,133 @@
+from bisect import bisect_right
+from functools import cached_property
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from typing import List, Optional
+
+from .scoring import TokenVocabulary, TokenIncidence
+from .title_index import TitleIndex
+from .catalog import Catalog, StringColumn
+
+
+def combined_texts(catalog: Catalog) -> List[str]:
+    """Combined title, genre and description text used for TF-IDF similarity"""
+    return [
+        f"{title} {genre or ''} {description}"
+        for title, genre, description in zip(catalog.titles, catalog.genres, catalog.descriptions)
+    ]
+
+
+def new_vectorizer(**kwargs) -> TfidfVectorizer:
+    return TfidfVectorizer(stop_words='english', max_features=1000, **kwargs)
+
+
+class ItemPositions:
+    """Item id to catalog position lookup by binary search over the ids in sorted order
+
+    ``order`` lists the catalog positions sorted by UTF-8 id, so the lookup
+    is one array instead of a dict of Python strings and can be stored in
+    and memory-mapped from a snapshot. With repeated ids the last position
+    wins, as with a dict.
+    """
+
+    def __init__(self, ids: StringColumn, order: np.ndarray):
+        self.ids = ids
+        self.order = order
+
+    @classmethod
+    def build(cls, ids: StringColumn) -> "ItemPositions":
+        return cls(ids, np.asarray(sorted(range(len(ids)), key=ids.raw), dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def get(self, item_id: str, default: Optional[int] = None) -> Optional[int]:
+        key = item_id.encode('utf-8')
+        slot = bisect_right(self.order, key, key=self.ids.raw)
+        if slot == 0 or self.ids.raw(self.order[slot - 1]) != key:
+            return default
+        return int(self.order[slot - 1])
+
+    def __contains__(self, item_id: str) -> bool:
+        return self.get(item_id) is not None
+
+    def __getitem__(self, item_id: str) -> int:
+        position = self.get(item_id)
+        if position is None:
+            raise KeyError(item_id)
+        return position
+
+
+class ItemStore:
+    """Per-category item representations computed once at build time and shared by every request"""
+
+    def __init__(self, catalog: Catalog, vectorizer: TfidfVectorizer, tfidf_matrix: sparse.csr_matrix,
+                 tokens: TokenIncidence, title_index: Optional[TitleIndex] = None,
+                 positions: Optional[ItemPositions] = None):
+        self.catalog = catalog
+        
+        # Item id lookup
+        self.positions = positions if positions is not None else ItemPositions.build(catalog.ids)
+
+        # TF-IDF vectors for the whole catalog
+        self.vectorizer = vectorizer
+        self.tfidf_matrix = tfidf_matrix
+
+        # Title lookup by substring, word and trigram
+        self.title_index = title_index if title_index is not None else TitleIndex.build(catalog.titles)
+        
+        # Word incidence used for cross-category scoring
+        self.tokens = tokens
+
+    @classmethod
+    def build(cls, catalog: Catalog, vocabulary: TokenVocabulary) -> "ItemStore":
+        """Fit the vectorizer and tokenize the catalog"""
+        texts = combined_texts(catalog)
+
+        # Transform exactly as a query would be, so cached vectors match per-request ones
+        vectorizer = new_vectorizer()
+        tfidf_matrix = vectorizer.fit(texts).transform(texts)
+
+        tokens = TokenIncidence.from_texts(texts, list(catalog.titles), vocabulary)
+        return cls(catalog, vectorizer, tfidf_matrix, tokens)
+
+    def updated(self, delta: Catalog, order: np.ndarray, vocabulary: TokenVocabulary) -> "ItemStore":
+        """Store for ``Catalog.concat([catalog, delta]).take(order)`` without refitting
+
+        Only the delta items are vectorized, with the already fitted
+        vocabulary and IDF weights, and tokenized; every other array is
+        reordered from this store.
+        """
+        n_items = len(self)
+        new_ids = np.full(n_items + len(delta), -1, dtype=np.int64)
+        new_ids[order] = np.arange(len(order))
+        
+        catalog = Catalog.concat([self.catalog, delta]).take(order)
+        delta_texts = combined_texts(delta)
+        delta_matrix = (
+            self.vectorizer.transform(delta_texts) if delta_texts
+            else sparse.csr_matrix((0, self.tfidf_matrix.shape[1]), dtype=self.tfidf_matrix.dtype)
+        )
+        tfidf_matrix = sparse.vstack([self.tfidf_matrix, delta_matrix], format='csr')[order]
+        tokens = TokenIncidence.stack(
+            [self.tokens, TokenIncidence.from_texts(delta_texts, list(delta.titles), vocabulary)], vocabulary
+        ).take(order)
+        title_index = TitleIndex.merge(catalog.titles, [
+            (self.title_index, new_ids[:n_items]),
+            (TitleIndex.build(delta.titles), new_ids[n_items:]),
+        ])
+        return ItemStore(catalog, self.vectorizer, tfidf_matrix, tokens, title_index)
+
+    @cached_property
+    def texts(self) -> List[str]:
+        """Combined text used for TF-IDF similarity, only needed to fit the shared space"""
+        return combined_texts(self.catalog)
+
+    def __len__(self) -> int:
+        return len(self.catalog)
+
+    def word_ids(self, item_idx: int) -> np.ndarray:
+        """Vocabulary ids of the words in an item's title, genre and description"""
+        matrix = self.tokens.text_matrix
+        return matrix.indices[matrix.indptr[item_idx]:matrix.indptr[item_idx + 1]]
@@ -0,0 +1,320 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stage timings of the request being handled; copied into worker threads with the rest of the context
+_current_timings: contextvars.ContextVar[Optional["Timings"]] = contextvars.ContextVar(
+    "recommender_timings", default=None
+)
+
+
+class Timings:
+    """Stage durations of one request, in the order the stages finished"""
+
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+
+    def add(self, stage: str, seconds: float):
+        self.stages.append((stage, seconds))
+
+    def totals(self) -> Dict[str, float]:
+        """Seconds per stage, summing stages that ran more than once"""
+        totals: Dict[str, float] = {}
+        for stage, seconds in self.stages:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def header(self) -> str:
+        """Breakdown in Server-Timing syntax, e.g. ``match;dur=0.412, score;dur=2.108`` (milliseconds)"""
+        return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.totals().items())
+
+
+@contextmanager
+def collect_timings() -> Iterator[Timings]:
+    """Record the spans of the enclosed code, including calls it hands to a WorkerPool thread"""
+    timings = Timings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """A named metric with a fixed set of label names, thread-safe"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if len(labels) != len(self.label_names) or any(name not in labels for name in self.label_names):
+            raise ValueError(f"{self.name} takes labels {list(self.label_names)}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def drain(self) -> Any:
+        """Values recorded since the last drain, resetting them; picklable, for merge in another process"""
+        raise NotImplementedError
+
+    def merge(self, drained: Any):
+        """Add values drained from the same metric of another registry"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+
+
+class Counter(Metric):
+    """Monotonically increasing count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        super().__init__(name, description, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def drain(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, drained: Dict[Tuple[str, ...], float]):
+        with self._lock:
+            for key, amount in drained.items():
+                self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    """Current value per label set"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def drain(self) -> Dict[Tuple[str, ...], float]:
+        # A gauge is a current state, not a delta: it is copied and kept
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, drained: Dict[Tuple[str, ...], float]):
+        with self._lock:
+            self._values.update(drained)
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets, per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: a count per bucket (the last one is +Inf), the sum and the count
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][slot] += 1
+            series[1][0] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def drain(self) -> Dict[Tuple[str, ...], Tuple[List[int], List[float]]]:
+        with self._lock:
+            series, self._series = self._series, {}
+        return series
+
+    def merge(self, drained: Dict[Tuple[str, ...], Tuple[List[int], List[float]]]):
+        with self._lock:
+            for key, (counts, total) in drained.items():
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+                for slot, count in enumerate(counts):
+                    series[0][slot] += count
+                series[1][0] += total[0]
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+
+        lines = []
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Set of metrics rendered together in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, description, labels))
+
+    def gauge(self, name: str, description: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, labels, buckets))
+
+    def drain(self) -> Dict[str, Any]:
+        """Every metric's values since the last drain, by metric name"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.drain() for metric in metrics}
+
+    def merge(self, drained: Dict[str, Any]):
+        """Add the drained values of another registry, such as a worker process's, to this one
+
+        Metrics this registry does not have are ignored.
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+        for name, values in drained.items():
+            if name in metrics:
+                metrics[name].merge(values)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class RecommenderMetrics(MetricsRegistry):
+    """Metrics of one recommender service and the API serving it"""
+
+    def __init__(self):
+        super().__init__()
+        self.stage_seconds = self.histogram(
+            "recommender_stage_seconds", "Time spent in each stage of a request", ["stage"]
+        )
+        self.request_seconds = self.histogram(
+            "recommender_request_seconds", "End-to-end handler latency", ["endpoint"]
+        )
+        self.requests = self.counter(
+            "recommender_requests_total", "Handled API requests", ["endpoint", "status"]
+        )
+        self.cache_lookups = self.counter(
+            "recommender_cache_lookups_total", "Result cache lookups", ["result"]
+        )
+        self.coalesced_requests = self.counter(
+            "recommender_coalesced_requests_total",
+            "Cache misses answered by an identical ranking already being computed"
+        )
+        self.preference_cache_lookups = self.counter(
+            "recommender_preference_cache_lookups_total", "Preference match cache lookups, one per preference",
+            ["result"]
+        )
+        self.preference_matches = self.counter(
+            "recommender_preference_matches_total",
+            "Preferences by the path that matched them: title, tfidf, lsh, fuzzy, word_overlap, none",
+            ["path"]
+        )
+        self.table_lookups = self.counter(
+            "recommender_table_lookups_total",
+            "Rankings looked up in the precomputed tables: hit when served from them, miss when scored live",
+            ["result"]
+        )
+        self.unmatched_requests = self.counter(
+            "recommender_unmatched_requests_total",
+            "Requests where no preference matched and every source item was used as a weak match"
+        )
+        self.fallback_catalogs = self.counter(
+            "recommender_fallback_catalog_loads_total", "Categories loaded from the built-in fallback data",
+            ["category"]
+        )
+        self.build_seconds = self.gauge(
+            "recommender_build_seconds", "Duration of each stage of the last build of a category",
+            ["category", "stage"]
+        )
+        self.catalog_items = self.gauge(
+            "recommender_catalog_items", "Items currently indexed per category", ["category"]
+        )
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one stage, in the histogram and in the current request's timings"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stage_seconds.observe(elapsed, stage=stage)
+            timings = _current_timings.get()
+            if timings is not None:
+                timings.add(stage, elapsed)
@@ -0,0 +1,138 @@
+import numpy as np
+from scipy import sparse
+from typing import Tuple
+
+from .scoring import top_k_indices
+
+
+class NeighborIndex:
+    """Top-k most similar items per row, stored in a compact CSR layout
+
+    Row ``i`` owns ``indices[indptr[i]:indptr[i + 1]]`` (int32 item ids) and
+    the matching ``scores`` (float32 cosine similarities), best first.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, scores: np.ndarray, k: int):
+        self.indptr = indptr
+        self.indices = indices
+        self.scores = scores
+        self.k = k
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.scores.nbytes
+
+    def neighbors(self, item_idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Neighbor ids and scores of one item, best first"""
+        start, end = self.indptr[item_idx], self.indptr[item_idx + 1]
+        return self.indices[start:end], self.scores[start:end]
+
+    @classmethod
+    def build(cls, query_matrix: sparse.spmatrix, item_matrix: sparse.spmatrix = None,
+              k: int = 20, chunk_size: int = 1024, exclude_self: bool = True,
+              max_block_cells: int = 1 << 25) -> "NeighborIndex":
+        """Build the index from L2-normalised row vectors, one chunk of query rows at a time
+
+        Only a (chunk x n_items) block of similarities is materialised at
+        once; the chunk shrinks below ``chunk_size`` for large catalogs so the
+        block never exceeds ``max_block_cells``. When ``item_matrix`` is
+        omitted the index is built item-to-item and ``exclude_self`` drops
+        each item from its own neighbor list. ``k <= 0`` builds an empty index.
+        """
+        if item_matrix is None:
+            item_matrix = query_matrix
+        else:
+            exclude_self = False
+
+        n_queries = query_matrix.shape[0]
+        indptr = np.zeros(n_queries + 1, dtype=np.int64)
+        if k <= 0:
+            return cls(indptr, np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32), 0)
+
+        query_matrix = sparse.csr_matrix(query_matrix)
+        item_matrix_t = sparse.csr_matrix(item_matrix).T.tocsr()
+        chunk_size = max(1, min(chunk_size, max_block_cells // max(item_matrix_t.shape[1], 1)))
+
+        chunk_indices = []
+        chunk_scores = []
+
+        for start in range(0, n_queries, chunk_size):
+            end = min(start + chunk_size, n_queries)
+            similarities = (query_matrix[start:end] @ item_matrix_t).toarray()
+            if exclude_self:
+                rows = np.arange(end - start)
+                similarities[rows, rows + start] = -np.inf
+
+            for row in range(end - start):
+                candidates = top_k_indices(similarities[row], k)
+                row_scores = similarities[row, candidates]
+                keep = row_scores > 0
+                chunk_indices.append(candidates[keep].astype(np.int32))
+                chunk_scores.append(row_scores[keep].astype(np.float32))
+                indptr[start + row + 1] = keep.sum()
+
+        np.cumsum(indptr, out=indptr)
+        indices = np.concatenate(chunk_indices) if chunk_indices else np.zeros(0, dtype=np.int32)
+        scores = np.concatenate(chunk_scores) if chunk_scores else np.zeros(0, dtype=np.float32)
+        return cls(indptr, indices, scores, k)
+
+    def updated(self, new_ids: np.ndarray, changed: np.ndarray, item_matrix: sparse.csr_matrix,
+                chunk_size: int = 1024) -> "NeighborIndex":
+        """Index after a batch of catalog changes, recomputing only what the change touches
+
+        ``new_ids`` maps every old item id to its new id (-1 when the item was
+        deleted or replaced) and ``changed`` lists the new ids of inserted or
+        replaced items, whose rows in ``item_matrix`` hold their new vectors.
+        Changed items get exact neighbor lists; every other item keeps its
+        surviving neighbors and gains any changed item that now ranks in its
+        top k. Lists that lost a neighbor are not refilled until the next
+        full rebuild.
+        """
+        n_items = item_matrix.shape[0]
+        if self.k <= 0:
+            return NeighborIndex.build(item_matrix, k=0)
+        changed = np.asarray(changed, dtype=np.int64)
+        is_changed = np.zeros(n_items, dtype=bool)
+        is_changed[changed] = True
+
+        # Surviving entries of unchanged items
+        old_rows = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.indptr))
+        rows = new_ids[old_rows]
+        ids = new_ids[self.indices]
+        keep = (rows >= 0) & (ids >= 0)
+        rows, ids, scores = [rows[keep]], [ids[keep]], [np.asarray(self.scores)[keep]]
+
+        # Exact lists for changed items
+        changed_index = NeighborIndex.build(item_matrix[changed], item_matrix, k=self.k + 1, chunk_size=chunk_size)
+        for row, item_idx in enumerate(changed):
+            neighbor_ids, neighbor_scores = changed_index.neighbors(row)
+            not_self = neighbor_ids != item_idx
+            rows.append(np.full(not_self.sum(), item_idx, dtype=np.int64))
+            ids.append(neighbor_ids[not_self].astype(np.int64))
+            scores.append(neighbor_scores[not_self])
+
+        # Changed items as candidates for everyone else
+        if len(changed):
+            similarities = sparse.coo_matrix(item_matrix @ item_matrix[changed].T)
+            candidate_rows = similarities.row.astype(np.int64)
+            candidate_ids = changed[similarities.col]
+            keep = (~is_changed[candidate_rows]) & (similarities.data > 0)
+            rows.append(candidate_rows[keep])
+            ids.append(candidate_ids[keep])
+            scores.append(similarities.data[keep].astype(np.float32))
+
+        rows, ids, scores = np.concatenate(rows), np.concatenate(ids), np.concatenate(scores).astype(np.float32)
+
+        # Best first within each row, ties by lowest id, then keep k per row
+        order = np.lexsort((ids, -scores, rows))
+        rows, ids, scores = rows[order], ids[order], scores[order]
+        row_starts = np.searchsorted(rows, rows, side='left')
+        keep = np.arange(len(rows)) - row_starts < self.k
+        rows, ids, scores = rows[keep], ids[keep], scores[keep]
+
+        indptr = np.zeros(n_items + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_items), out=indptr[1:])
+        return NeighborIndex(indptr, ids.astype(np.int32), scores, self.k)
@@ -1,56 +1,340 @@
-import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Any
-import json
+from typing import List, Dict, Any, Optional, Tuple
 import os
+import secrets
+import threading
+import time
 
-from ..models.recommendation import RecommendationItem
+from ..models.recommendation import (
+    RecommendationRequest, RecommendationFilters, RecommendationItem, RecommendationResponse,
+    BatchRecommendationResult
+)
+from .scoring import (
+    TokenVocabulary, tokenize, aggregate_source_weights, rank_targets_batch, title_boost_scores, rank_scores,
+    top_k_indices
+)
+from .item_store import ItemStore
+from .neighbors import NeighborIndex
+from .shared_space import SharedVectorSpace
+from .vectors import VECTOR_DTYPES
+from .cache import LRUCache, PreferenceCache, ResultCache
+from .single_flight import SingleFlight
+from .build import PARALLEL_BUILD_MIN_ITEMS, BuiltCategory, Progress, build_categories, index_catalog
+from .snapshot import IndexSnapshot, content_hash
+from .tables import RecommendationTables, rank_from_table
+from .catalog import Catalog, JSONL_SUFFIXES, load_catalog
+from .ann import RETRIEVAL_MODES, RandomProjectionLSH
+from .category_index import CategoryIndex
+from .metrics import RecommenderMetrics
+from .serialization import encode_ndjson, encode_response
+
+CROSS_CATEGORY_MODES = ("token_overlap", "shared_space")
+
+# Streams kept open between their first and deeper pass, and for how many seconds at most
+MAX_OPEN_STREAMS = 256
+STREAM_TTL = 60.0
+
+# Data file for each category, relative to the backend directory (or, by file
+# name, to the service's data_dir). A JSON Lines file with the same stem
+# (e.g. data/books.jsonl) takes precedence and is streamed.
+DATA_FILES = {
+    "books": "data/books.json",
+    "movies": "data/movies.json",
+    "songs": "data/songs.json",
+    "games": "data/games.json"
+}
 
 class RecommenderService:
     """Service for generating recommendations based on similarity"""
     
-    def __init__(self):
-        self.data = self._load_sample_data()
-        self.vectorizers = {}
-        self.similarity_matrices = {}
-        self._build_similarity_matrices()
-    
-    def _load_sample_data(self) -> Dict[str, pd.DataFrame]:
-        """Load sample datasets for different categories from JSON files"""
-        data = {}
-        
-        # Define data file paths
-        data_files = {
-            "books": "data/books.json",
-            "movies": "data/movies.json",
-            "songs": "data/songs.json", 
-            "games": "data/games.json"
+    def __init__(self, neighbor_k: int = 20, cross_category_mode: str = "token_overlap",
+                 precompute_affinity: bool = False, affinity_k: int = 50,
+                 cache_size: int = 1024, cache_ttl: Optional[float] = 300.0,
+                 index_dir: Optional[str] = None, lazy: bool = False, read_only: bool = False,
+                 retrieval: str = "exact", ann_tables: int = 8, ann_bits: Optional[int] = None,
+                 ann_probes: int = 2, data_dir: Optional[str] = None,
+                 page_max_results: int = 1000, page_cache_size: int = 256, page_ttl: Optional[float] = 120.0,
+                 preference_cache_size: int = 4096, coalesce: bool = True, build_workers: int = 1,
+                 tables_dir: Optional[str] = None, vector_dtype: str = "float64",
+                 svd_components: Optional[int] = None):
+        if cross_category_mode not in CROSS_CATEGORY_MODES:
+            raise ValueError(f"Invalid cross_category_mode. Available: {list(CROSS_CATEGORY_MODES)}")
+        if retrieval not in RETRIEVAL_MODES:
+            raise ValueError(f"Invalid retrieval. Available: {list(RETRIEVAL_MODES)}")
+        if vector_dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Invalid vector_dtype. Available: {list(VECTOR_DTYPES)}")
+        if cross_category_mode != "shared_space" and (vector_dtype != "float64" or svd_components):
+            raise ValueError("vector_dtype and svd_components only apply to cross_category_mode 'shared_space'")
+        if read_only and not index_dir:
+            raise ValueError("read_only requires an index_dir to attach to")
+        
+        self.neighbor_k = neighbor_k
+        self.cross_category_mode = cross_category_mode
+        self.precompute_affinity = precompute_affinity
+        self.affinity_k = affinity_k
+        self.data_dir = data_dir
+        
+        # Storage of the shared space's item vectors: smaller types and an SVD projection trade accuracy for memory
+        # The per-category TF-IDF matrices (matching, similar items, LSH, snapshots) always stay float64
+        self.vector_dtype = vector_dtype
+        self.svd_components = svd_components
+        
+        # Categories are built in this many worker processes at once by load_all
+        self.build_workers = build_workers
+        self.parallel_build_min_items = PARALLEL_BUILD_MIN_ITEMS
+        self.build_timings: Dict[str, Dict[str, float]] = {}
+        
+        # "lsh" trades exactness of preference matching and shared-space scoring for speed
+        self.retrieval = retrieval
+        self.ann_params = {"n_tables": ann_tables, "n_bits": ann_bits, "n_probes": ann_probes}
+        self.result_cache = ResultCache(maxsize=cache_size, ttl=cache_ttl)
+        
+        # Matches of single preferences, shared by every target category
+        self.preference_cache = PreferenceCache(maxsize=preference_cache_size)
+        
+        # Concurrent identical cache misses wait for one ranking instead of each computing it
+        self.in_flight = SingleFlight() if coalesce else None
+        
+        # Deep rankings retained for cursor pagination, keyed by cursor token
+        self.page_max_results = page_max_results
+        self.page_cache = LRUCache(maxsize=page_cache_size, ttl=page_ttl)
+        # Indexes the first pass of each open stream ranked against, until its deeper pass
+        self.stream_views = LRUCache(maxsize=MAX_OPEN_STREAMS, ttl=STREAM_TTL)
+        self.metrics = RecommenderMetrics()
+        self.token_vocabulary = TokenVocabulary()
+        
+        # Each category is published as one immutable CategoryIndex; updates swap in a new one
+        self.categories: Dict[str, CategoryIndex] = {}
+        self.shared_space = None
+        
+        # Categories are built or loaded from the snapshot on first use
+        # read_only workers only attach to snapshots published by a builder
+        self.snapshot = IndexSnapshot(index_dir) if index_dir else None
+        
+        # Precomputed top-N tables answer requests matching a few source items without scoring every target
+        self.tables = RecommendationTables(tables_dir) if tables_dir else None
+        self.read_only = read_only
+        self.index_state = {category: "pending" for category in DATA_FILES}
+        self._build_lock = threading.RLock()
+        
+        if not lazy:
+            self.load_all()
+    
+    @classmethod
+    def from_env(cls) -> "RecommenderService":
+        """Build a service configured from RECOMMENDER_* environment variables"""
+        cache_ttl = float(os.getenv("RECOMMENDER_CACHE_TTL", "300"))
+        page_ttl = float(os.getenv("RECOMMENDER_PAGE_TTL", "120"))
+        return cls(
+            cache_size=int(os.getenv("RECOMMENDER_CACHE_SIZE", "1024")),
+            cache_ttl=cache_ttl if cache_ttl > 0 else None,
+            index_dir=os.getenv("RECOMMENDER_INDEX_DIR") or None,
+            lazy=os.getenv("RECOMMENDER_LAZY_LOAD", "1") == "1",
+            read_only=os.getenv("RECOMMENDER_INDEX_READ_ONLY", "0") == "1",
+            retrieval=os.getenv("RECOMMENDER_RETRIEVAL", "exact"),
+            ann_tables=int(os.getenv("RECOMMENDER_ANN_TABLES", "8")),
+            ann_bits=int(os.environ["RECOMMENDER_ANN_BITS"]) if os.getenv("RECOMMENDER_ANN_BITS") else None,
+            ann_probes=int(os.getenv("RECOMMENDER_ANN_PROBES", "2")),
+            data_dir=os.getenv("RECOMMENDER_DATA_DIR") or None,
+            page_max_results=int(os.getenv("RECOMMENDER_PAGE_MAX_RESULTS", "1000")),
+            page_cache_size=int(os.getenv("RECOMMENDER_PAGE_CACHE_SIZE", "256")),
+            page_ttl=page_ttl if page_ttl > 0 else None,
+            preference_cache_size=int(os.getenv("RECOMMENDER_PREFERENCE_CACHE_SIZE", "4096")),
+            coalesce=os.getenv("RECOMMENDER_COALESCE", "1") == "1",
+            build_workers=int(os.getenv("RECOMMENDER_BUILD_WORKERS") or os.cpu_count() or 1),
+            tables_dir=os.getenv("RECOMMENDER_TABLES_DIR") or None,
+            vector_dtype=os.getenv("RECOMMENDER_VECTOR_DTYPE", "float64"),
+            svd_components=int(os.environ["RECOMMENDER_SVD_COMPONENTS"]) if os.getenv("RECOMMENDER_SVD_COMPONENTS") else None
+        )
+    
+    @property
+    def data(self) -> Dict[str, Catalog]:
+        return {category: index.catalog for category, index in self.categories.items()}
+    
+    @property
+    def item_stores(self) -> Dict[str, ItemStore]:
+        return {category: index.store for category, index in self.categories.items()}
+    
+    @property
+    def neighbor_indexes(self) -> Dict[str, NeighborIndex]:
+        return {category: index.neighbor_index for category, index in self.categories.items()}
+    
+    @property
+    def ann_indexes(self) -> Dict[str, RandomProjectionLSH]:
+        return {
+            category: index.ann_index for category, index in self.categories.items() if index.ann_index is not None
         }
+    
+    @property
+    def vectorizers(self) -> Dict[str, Any]:
+        return {category: index.store.vectorizer for category, index in self.categories.items()}
+    
+    def load_all(self, progress: Optional[Progress] = None):
+        """Build or load every category (and the shared space, when enabled)
+        
+        With ``build_workers`` above one, the categories that need building
+        are built at once in worker processes. ``progress`` is called as each
+        category finishes, with its stage timings in seconds.
+        """
+        with self._build_lock:
+            prebuilt = self._build_parallel(progress)
+            for category in DATA_FILES:
+                if self.index_state[category] == "ready":
+                    continue
+                self._ensure_category(category, prebuilt.get(category))
+                built = prebuilt.get(category, (None, None, None))[1]
+                if progress is not None and built is None:
+                    progress(category, self.build_timings.get(category, {}))
+        self._ensure_shared_space()
+    
+    def _build_parallel(self, progress: Optional[Progress] = None) -> Dict[str, tuple]:
+        """Catalogs of the unbuilt categories, with their indexes when it pays to build them in parallel"""
+        if self.build_workers <= 1 or self.read_only:
+            return {}
+        
+        pending = [category for category in DATA_FILES if self.index_state[category] != "ready"]
+        sources = {category: self._source_stamp(category) for category in pending}
+        if self.snapshot is not None:
+            # Snapshots of unchanged source files are attached without reading the files
+            pending = [
+                category for category in pending if not self.snapshot.is_current(category, source=sources[category])
+            ]
+        catalogs = {category: self._load_category(category) for category in pending}
+        stale = {
+            category: catalog for category, catalog in catalogs.items()
+            if self.snapshot is None or not self.snapshot.is_current(
+                category, content_hash(catalog, {"neighbor_k": self.neighbor_k})
+            )
+        }
+        if len(stale) < 2 or sum(len(catalog) for catalog in stale.values()) < self.parallel_build_min_items:
+            return {category: (catalog, None, sources[category]) for category, catalog in catalogs.items()}
         
-        # Load data from JSON files
-        for category, file_path in data_files.items():
+        for category in stale:
+            self.index_state[category] = "loading"
+        try:
+            built = build_categories(stale, self.neighbor_k, self.build_workers, progress)
+        except Exception:
+            for category in stale:
+                self.index_state[category] = "failed"
+            raise
+        return {category: (catalog, built.get(category), sources[category]) for category, catalog in catalogs.items()}
+    
+    def index_status(self) -> Dict[str, Any]:
+        """Readiness of each category's index"""
+        return {
+            "ready": all(state == "ready" for state in self.index_state.values()),
+            "categories": dict(self.index_state)
+        }
+    
+    def _ensure_category(self, category: str, prebuilt: Optional[tuple] = None):
+        """Make sure a category is loaded and indexed, building it on first use
+        
+        ``prebuilt`` is an already loaded (catalog, BuiltCategory or None,
+        source stamp) triple. Otherwise a current snapshot is attached before
+        the catalog file is read at all.
+        """
+        if self.index_state[category] == "ready":
+            return
+        
+        with self._build_lock:
+            if self.index_state[category] == "ready":
+                return
+            self.index_state[category] = "loading"
             try:
-                # Get the absolute path to the data file
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-                data_file = os.path.join(current_dir, "..", "..", file_path)
-                
-                if os.path.exists(data_file):
-                    with open(data_file, 'r', encoding='utf-8') as f:
-                        items = json.load(f)
-                    data[category] = pd.DataFrame(items)
+                if prebuilt is not None:
+                    index = self._build_category(category, *prebuilt)
                 else:
-                    # Fallback to hardcoded data if file doesn't exist
-                    data[category] = self._get_fallback_data(category)
-                    
-            except Exception as e:
-                print(f"Warning: Could not load {file_path}, using fallback data: {e}")
-                data[category] = self._get_fallback_data(category)
+                    source = self._source_stamp(category)
+                    index = self._attach_unchanged(category, source)
+                    if index is None:
+                        index = self._build_category(category, self._load_category(category), None, source)
+                self._publish(category, index)
+            except Exception:
+                self.index_state[category] = "failed"
+                raise
+            self.index_state[category] = "ready"
+    
+    def _ensure_shared_space(self) -> Optional[SharedVectorSpace]:
+        """Fit the joint vector space once every category is available"""
+        if self.cross_category_mode != "shared_space":
+            return None
+        shared_space = self.shared_space
+        if shared_space is not None:
+            return shared_space
         
-        return data
+        with self._build_lock:
+            for category in DATA_FILES:
+                self._ensure_category(category)
+            if self.shared_space is None:
+                self._build_shared_space()
+            return self.shared_space
     
-    def _get_fallback_data(self, category: str) -> pd.DataFrame:
+    def _publish(self, category: str, index: CategoryIndex):
+        """Atomically replace the index readers see for a category"""
+        with self._build_lock:
+            current = self.categories.get(category)
+            if self.shared_space is not None and current is not None:
+                # Changed rows are projected into the fitted joint space; compaction refits it
+                if index.change is not None and self.shared_space.versions.get(category) == current.version:
+                    self.shared_space = self.shared_space.updated(category, *index.change, index.version)
+                else:
+                    self.shared_space = self.shared_space.replaced(category, index.catalog, index.version)
+            self.categories[category] = index
+        self.metrics.catalog_items.set(len(index), category=category)
+    
+    def _catalog_file(self, category: str) -> Optional[str]:
+        """Path of a category's JSON or JSON Lines file, or None when there is none"""
+        file_path = DATA_FILES[category]
+        
+        # Get the absolute path to the data file
+        if self.data_dir:
+            data_file = os.path.join(self.data_dir, os.path.basename(file_path))
+        else:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            data_file = os.path.join(current_dir, "..", "..", file_path)
+        
+        stem = os.path.splitext(data_file)[0]
+        for candidate in [stem + suffix for suffix in JSONL_SUFFIXES] + [data_file]:
+            if os.path.exists(candidate):
+                return candidate
+        return None
+    
+    def _source_stamp(self, category: str) -> Optional[Dict[str, Any]]:
+        """Catalog file path, size and modification time, with the build parameters, recorded in the snapshot
+        
+        Taken before the file is read, so a file changed while it is being
+        read never gets the stamp of the content that was indexed.
+        """
+        data_file = self._catalog_file(category)
+        if data_file is None:
+            return None
+        stat = os.stat(data_file)
+        return {
+            "file": os.path.abspath(data_file),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "neighbor_k": self.neighbor_k,
+        }
+    
+    def _load_category(self, category: str) -> Catalog:
+        """Load one category from its JSON or JSON Lines file"""
+        file_path = DATA_FILES[category]
+        try:
+            data_file = self._catalog_file(category)
+            if data_file is not None:
+                return load_catalog(data_file)
+            
+            # Fallback to hardcoded data if file doesn't exist
+            self.metrics.fallback_catalogs.inc(category=category)
+            return self._get_fallback_data(category)
+                
+        except Exception as e:
+            print(f"Warning: Could not load {file_path}, using fallback data: {e}")
+            self.metrics.fallback_catalogs.inc(category=category)
+            return self._get_fallback_data(category)
+    
+    def _get_fallback_data(self, category: str) -> Catalog:
         """Fallback data if JSON files are not available"""
         
         if category == "books":
@@ -64,7 +348,7 @@ class RecommenderService:
                 {"id": "book_7", "title": "Brave New World", "genre": "Sci-Fi", "year": 1932, "rating": 3.9, "description": "Dystopian science fiction"},
                 {"id": "book_8", "title": "The Alchemist", "genre": "Fantasy", "year": 1988, "rating": 3.9, "description": "Philosophical novel"},
             ]
-            return pd.DataFrame(books_data)
+            return Catalog.from_records(books_data)
             
         elif category == "movies":
             movies_data = [
@@ -77,7 +361,7 @@ class RecommenderService:
                 {"id": "movie_7", "title": "The Godfather", "genre": "Crime", "year": 1972, "rating": 9.2, "description": "Epic crime drama"},
                 {"id": "movie_8", "title": "Titanic", "genre": "Romance", "year": 1997, "rating": 7.9, "description": "Epic romance disaster"},
             ]
-            return pd.DataFrame(movies_data)
+            return Catalog.from_records(movies_data)
             
         elif category == "songs":
             songs_data = [
@@ -90,7 +374,7 @@ class RecommenderService:
                 {"id": "song_7", "title": "Smells Like Teen Spirit", "genre": "Rock", "year": 1991, "rating": 4.5, "description": "Grunge anthem"},
                 {"id": "song_8", "title": "Yesterday", "genre": "Pop", "year": 1965, "rating": 4.4, "description": "Beatles classic"},
             ]
-            return pd.DataFrame(songs_data)
+            return Catalog.from_records(songs_data)
             
         elif category == "games":
             games_data = [
@@ -103,90 +387,274 @@ class RecommenderService:
                 {"id": "game_7", "title": "Portal", "genre": "Puzzle", "year": 2007, "rating": 4.6, "description": "Innovative puzzle game"},
                 {"id": "game_8", "title": "Red Dead Redemption 2", "genre": "Adventure", "year": 2018, "rating": 4.7, "description": "Western adventure game"},
             ]
-            return pd.DataFrame(games_data)
+            return Catalog.from_records(games_data)
         
-        return pd.DataFrame()
+        return Catalog.from_records([])
     
-    def _build_similarity_matrices(self):
-        """Build similarity matrices for each category"""
-        for category, df in self.data.items():
-            # Create a new vectorizer for each category
-            vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
-            
-            # Combine title, genre, and description for similarity calculation
-            text_data = df['title'] + ' ' + df['genre'] + ' ' + df['description'].fillna('')
-            
-            # Create TF-IDF vectors
-            tfidf_matrix = vectorizer.fit_transform(text_data)
-            
-            # Store vectorizer for this category
-            self.vectorizers[category] = vectorizer
-            
-            # Calculate cosine similarity
-            similarity_matrix = cosine_similarity(tfidf_matrix, tfidf_matrix)
+    def _build_category(self, category: str, catalog: Catalog, built: Optional[BuiltCategory] = None,
+                        source: Optional[Dict[str, Any]] = None) -> CategoryIndex:
+        """Build the item store and neighbor index of one category, or load them from the snapshot"""
+        expected_hash = content_hash(catalog, {"neighbor_k": self.neighbor_k})
+        
+        if self.snapshot is None:
+            index = CategoryIndex(*self._index_category(category, catalog, built))
+        else:
+            index = self._attach_category(category, catalog, expected_hash, built, source)
+        
+        return self._with_ann(index)
+    
+    def _attach_unchanged(self, category: str, source: Optional[Dict[str, Any]]) -> Optional[CategoryIndex]:
+        """A category's published snapshot, catalog included, when its file has not changed since it was written"""
+        if self.snapshot is None or source is None:
+            return None
+        with self.snapshot.lock():
+            self.snapshot.load_vocabulary(self.token_vocabulary)
+            index = self.snapshot.load_category(category, self.token_vocabulary, source=source)
+        return self._with_ann(index) if index is not None else None
+    
+    def _with_ann(self, index: CategoryIndex) -> CategoryIndex:
+        """Attach the LSH index of a category when approximate retrieval is enabled"""
+        if self.retrieval == "lsh":
+            index.ann_index = RandomProjectionLSH.build(index.store.tfidf_matrix, **self.ann_params)
+        return index
+    
+    def _index_category(self, category: str, catalog: Catalog, built: Optional[BuiltCategory] = None) -> tuple:
+        """Vectorize, tokenize and neighbor-index a catalog in memory, or take in a worker process's build"""
+        if built is None:
+            store, neighbor_index, timings = index_catalog(catalog, self.token_vocabulary, self.neighbor_k)
+        else:
+            start = time.perf_counter()
+            store, neighbor_index = built.store(catalog, self.token_vocabulary)
+            timings = dict(built.timings, merge=time.perf_counter() - start)
+        
+        self.build_timings[category] = timings
+        for stage, seconds in timings.items():
+            self.metrics.build_seconds.set(seconds, category=category, stage=stage)
+        return store, neighbor_index
+    
+    def _attach_category(self, category: str, catalog: Catalog, expected_hash: str,
+                         built: Optional[BuiltCategory] = None,
+                         source: Optional[Dict[str, Any]] = None) -> CategoryIndex:
+        """Map a category's published snapshot, building and publishing it first when stale"""
+        with self.snapshot.lock():
+            self.snapshot.load_vocabulary(self.token_vocabulary)
+            loaded = self.snapshot.load_category(category, self.token_vocabulary, expected_hash)
+        if loaded is not None:
+            return loaded
+        
+        if self.read_only:
+            raise ValueError(f"No up-to-date snapshot of {category} in {self.snapshot.directory}")
+        
+        with self.snapshot.lock(exclusive=True):
+            # Another process may have published it while we waited for the lock
+            self.snapshot.load_vocabulary(self.token_vocabulary)
+            loaded = self.snapshot.load_category(category, self.token_vocabulary, expected_hash)
+            if loaded is not None:
+                return loaded
             
-            self.similarity_matrices[category] = similarity_matrix
+            index = CategoryIndex(*self._index_category(category, catalog, built))
+            self.snapshot.save_category(category, index, self.token_vocabulary, expected_hash, source)
+        
+        # Serve from the published files so this process shares pages with the other workers
+        loaded = self.snapshot.load_category(category, self.token_vocabulary, expected_hash)
+        return loaded if loaded is not None else index
+    
+    def _build_shared_space(self):
+        """Fit the joint cross-category vector space when that mode is enabled"""
+        if self.cross_category_mode != "shared_space":
+            return
+        
+        self.shared_space = self._fit_shared_space(dict(self.categories))
+    
+    def _refit_shared_space(self) -> bool:
+        """Refit the joint space without blocking readers, swapping it in unless a category changed meanwhile"""
+        if self.shared_space is None:
+            return False
+        categories = dict(self.categories)
+        shared_space = self._fit_shared_space(categories)
+        
+        with self._build_lock:
+            if self.shared_space is None or any(self.categories[category] is not index
+                                                for category, index in categories.items()):
+                return False
+            self.shared_space = shared_space
+        self.result_cache.clear()
+        return True
+    
+    def _fit_shared_space(self, categories: Dict[str, CategoryIndex]) -> SharedVectorSpace:
+        shared_space = SharedVectorSpace(
+            {category: index.store.texts for category, index in categories.items()},
+            versions={category: index.version for category, index in categories.items()},
+            vector_dtype=self.vector_dtype,
+            svd_components=self.svd_components
+        )
+        if self.precompute_affinity:
+            shared_space.precompute_affinity(k=self.affinity_k)
+        elif self.retrieval == "lsh":
+            shared_space.build_ann(k=self.affinity_k, **self.ann_params)
+        return shared_space
+    
+    def reload_category(self, category: str):
+        """Reload one category from disk and rebuild everything derived from it"""
+        if category not in DATA_FILES:
+            raise ValueError(f"Invalid category. Available: {list(DATA_FILES.keys())}")
+        
+        with self._build_lock:
+            self.index_state[category] = "pending"
+            self._ensure_category(category)
+        self.result_cache.invalidate_category(category)
+        self.preference_cache.invalidate_category(category)
+    
+    def _validate_category(self, category: str):
+        if category not in DATA_FILES:
+            raise ValueError(f"Invalid category. Available: {list(DATA_FILES.keys())}")
+        self._ensure_category(category)
+    
+    def add_item(self, category: str, item: Dict[str, Any]) -> int:
+        """Add an item to a category without refitting it, returning the category's item count"""
+        self._validate_category(category)
+        item = self._validated_item(item)
+        with self._build_lock:
+            if item["id"] in self.categories[category].store.positions:
+                raise ValueError(f"Item '{item['id']}' already exists in category '{category}'")
+            return self._apply_changes(category, appended=[item])
+    
+    def update_item(self, category: str, item_id: str, item: Dict[str, Any]) -> int:
+        """Replace an item in place without refitting its category"""
+        self._validate_category(category)
+        item = self._validated_item({**item, "id": item_id})
+        with self._build_lock:
+            item_idx = self._item_position(category, item_id)
+            return self._apply_changes(category, replaced={item_idx: item})
+    
+    def delete_item(self, category: str, item_id: str) -> int:
+        """Remove an item from a category without refitting it"""
+        self._validate_category(category)
+        with self._build_lock:
+            item_idx = self._item_position(category, item_id)
+            return self._apply_changes(category, deleted=[item_idx])
+    
+    def _validated_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        for field in ("id", "title"):
+            if not str(item.get(field) or "").strip():
+                raise ValueError(f"Item field '{field}' is required")
+        return item
+    
+    def _item_position(self, category: str, item_id: str) -> int:
+        item_idx = self.categories[category].store.positions.get(item_id)
+        if item_idx is None:
+            raise ValueError(f"Unknown item '{item_id}' in category '{category}'")
+        return item_idx
+    
+    def _apply_changes(self, category: str, replaced: Optional[Dict[int, Dict[str, Any]]] = None,
+                       appended: Optional[List[Dict[str, Any]]] = None,
+                       deleted: Optional[List[int]] = None) -> int:
+        """Publish the current index of a category with a batch of item changes merged in"""
+        with self._build_lock:
+            index = self.categories[category].updated(
+                replaced or {}, appended or [], deleted or [], self.token_vocabulary
+            )
+            self._publish(category, self._with_ann(index))
+        self.result_cache.invalidate_category(category)
+        self.preference_cache.invalidate_category(category)
+        return len(index)
     
-    def _find_similar_items(self, preference: str, source_df: pd.DataFrame, source_vectorizer) -> List[tuple]:
-        """Find similar items for a preference, even if not exact match"""
+    def compact(self, category: str) -> bool:
+        """Refit a category from its current catalog, folding in every incremental change
         
-        # First try exact match
-        matching_items = source_df[source_df['title'].str.contains(preference, case=False, na=False)]
+        The refit runs without blocking readers or updates; it is only
+        published if no other change landed meanwhile and returns whether it was.
+        In ``shared_space`` mode the joint space is then refitted the same way.
+        """
+        compacted = self._compact(category)
+        if compacted:
+            self._refit_shared_space()
+        return compacted
+    
+    def _compact(self, category: str) -> bool:
+        self._validate_category(category)
+        current = self.categories[category]
+        store, neighbor_index = self._index_category(category, current.catalog)
+        
+        with self._build_lock:
+            if self.categories[category] is not current:
+                return False
+            # Same rows as before the refit, so the encoded items, attributes and shared-space rows carry over
+            self._publish(
+                category, self._with_ann(CategoryIndex(
+                    store, neighbor_index, encoded_items=current.encoded_items, attributes=current.attributes,
+                    change=(Catalog.from_records([]), np.arange(len(current)))
+                ))
+            )
+        self.result_cache.invalidate_category(category)
+        self.preference_cache.invalidate_category(category)
+        return True
+    
+    def compact_pending(self, min_changes: int = 1) -> List[str]:
+        """Compact every category with at least ``min_changes`` changes since its last refit"""
+        compacted = [
+            category for category, index in list(self.categories.items())
+            if index.pending_changes >= min_changes and self._compact(category)
+        ]
+        if compacted:
+            self._refit_shared_space()
+        return compacted
+    
+    def _match_preference(self, preference: str, store: ItemStore,
+                          ann_index: Optional[RandomProjectionLSH] = None) -> Tuple[str, List[tuple]]:
+        """Similar items of a preference and the matching path that found them"""
+        
+        # First try exact match on title substrings
+        matching_items = store.title_index.substring_matches(preference)
         
-        if not matching_items.empty:
+        if len(matching_items) > 0:
             # Use exact matches
-            results = []
-            for _, item in matching_items.iterrows():
-                item_idx = source_df.index.get_loc(item.name)
-                results.append((item_idx, 1.0))
-            return results
+            return "title", [(int(item_idx), 1.0) for item_idx in matching_items]
         
         # If no exact match, use TF-IDF similarity
         try:
             # Create vector for the preference
-            preference_vector = source_vectorizer.transform([preference])
+            preference_vector = store.vectorizer.transform([preference])
             
-            # Get all source items as vectors
-            source_text = source_df['title'] + ' ' + source_df['genre'] + ' ' + source_df['description'].fillna('')
-            source_vectors = source_vectorizer.transform(source_text)
+            if ann_index is not None:
+                # Only rank the items hashed close to the preference
+                top_indices, top_similarities = ann_index.query(preference_vector, 3)
+                results = [(idx, similarity) for idx, similarity in zip(top_indices, top_similarities) if similarity > 0.1]
+            else:
+                # Calculate similarities against the precomputed catalog vectors
+                similarities = cosine_similarity(preference_vector, store.tfidf_matrix)[0]
+                
+                # Get top 3 most similar items, ties to the later item as a reversed argsort would
+                top_indices = len(similarities) - 1 - top_k_indices(similarities[::-1], 3)
+                results = [(idx, similarities[idx]) for idx in top_indices if similarities[idx] > 0.1]
             
-            # Calculate similarities
-            similarities = cosine_similarity(preference_vector, source_vectors)[0]
+            path = "lsh" if ann_index is not None else "tfidf"
             
-            # Get top 3 most similar items
-            top_indices = np.argsort(similarities)[::-1][:3]
-            results = [(idx, similarities[idx]) for idx in top_indices if similarities[idx] > 0.1]
+            # Fall back to typo-tolerant title candidates when nothing is close enough
+            if not results:
+                results = store.title_index.fuzzy_matches(preference)
+                path = "fuzzy" if results else "none"
             
-            return results
+            return path, results
             
         except Exception as e:
-            # Fallback to simple text similarity
-            results = []
-            for idx, item in source_df.iterrows():
-                item_text = f"{item['title']} {item['genre']} {item['description']}".lower()
-                preference_lower = preference.lower()
-                
-                # Simple word overlap similarity
-                item_words = set(item_text.split())
-                pref_words = set(preference_lower.split())
-                
-                if pref_words:
-                    overlap = len(item_words.intersection(pref_words))
-                    similarity = overlap / len(pref_words)
-                    if similarity > 0:
-                        results.append((idx, similarity))
+            # Fallback to simple word overlap similarity
+            pref_words = tokenize(preference)
+            if not pref_words:
+                return "word_overlap", []
             
-            # Sort by similarity and return top 3
-            results.sort(key=lambda x: x[1], reverse=True)
-            return results[:3]
+            similarities = store.tokens.overlap_counts(pref_words) / len(pref_words)
+            
+            # Return the top 3 by similarity
+            order = top_k_indices(similarities, 3)
+            return "word_overlap", [(idx, similarities[idx]) for idx in order if similarities[idx] > 0]
     
-    def get_recommendations(self, source_category: str, target_category: str, 
-                          preferences: List[str], limit: int = 5) -> List[RecommendationItem]:
-        """Get recommendations based on user preferences"""
+    def _validate_request(self, source_category: str, target_category: str, preferences: List[str]) -> List[str]:
+        """Validate a request and return its non-empty, trimmed preferences"""
         
         # Validate categories
-        if source_category not in self.data or target_category not in self.data:
-            raise ValueError(f"Invalid category. Available: {list(self.data.keys())}")
+        if source_category not in DATA_FILES or target_category not in DATA_FILES:
+            raise ValueError(f"Invalid category. Available: {list(DATA_FILES.keys())}")
         
         # Validate preferences
         if not preferences or len(preferences) == 0:
@@ -197,91 +665,384 @@ class RecommenderService:
         if not valid_preferences:
             raise ValueError("At least one non-empty preference is required")
         
-        # Find similar items in source category based on preferences
-        source_df = self.data[source_category]
-        target_df = self.data[target_category]
+        self._ensure_category(source_category)
+        self._ensure_category(target_category)
+        
+        return valid_preferences
+    
+    def _request_view(self, source_category: str, target_category: str) -> tuple:
+        """Source index, target index and shared space of one request, consistent with each other"""
+        source_index, target_index = self.categories[source_category], self.categories[target_category]
+        shared_space = self._ensure_shared_space()
+        if shared_space is not None and (
+                shared_space.versions.get(source_category) != source_index.version
+                or shared_space.versions.get(target_category) != target_index.version):
+            # A category was updated after the joint space was fitted; nothing is published while we hold the lock
+            with self._build_lock:
+                source_index, target_index = self.categories[source_category], self.categories[target_category]
+                shared_space = self._ensure_shared_space()
+        return source_index, target_index, shared_space
+    
+    def get_recommendations(self, source_category: str, target_category: str, 
+                          preferences: List[str], limit: int = 5,
+                          filters: Optional[RecommendationFilters] = None) -> List[RecommendationItem]:
+        """Get recommendations based on user preferences"""
+        
+        ranking, view = self._ranking(source_category, target_category, preferences, limit, filters)
+        with self.metrics.span("build_items"):
+            return self._build_items(view[1].catalog, ranking)
+    
+    def get_recommendations_json(self, source_category: str, target_category: str,
+                                 preferences: List[str], limit: int = 5,
+                                 filters: Optional[RecommendationFilters] = None) -> bytes:
+        """Recommendations as the JSON of a RecommendationResponse, assembled from pre-encoded items
+        
+        Produces the same bytes as serializing the models built from
+        ``get_recommendations`` without constructing them.
+        """
+        ranking, view = self._ranking(source_category, target_category, preferences, limit, filters)
+        with self.metrics.span("serialize"):
+            return encode_response(view[1].encoded_items, ranking, source_category, target_category)
+    
+    def _ranking(self, source_category: str, target_category: str,
+                 preferences: List[str], limit: int, filters: Optional[RecommendationFilters] = None,
+                 view: Optional[tuple] = None) -> tuple:
+        """Top ``limit`` (target_idx, score) pairs of one request and the request view they refer to
+        
+        ``view`` ranks against an earlier request view instead of the current one.
+        """
+        
+        with self.metrics.span("validate"):
+            valid_preferences = self._validate_request(source_category, target_category, preferences)
+            if view is None:
+                view = self._request_view(source_category, target_category)
+        
+        # Serve repeated requests from a cached, deeper ranking
+        with self.metrics.span("cache"):
+            cache_key = self.result_cache.key(
+                source_category, target_category, valid_preferences, (view[0].version, view[1].version),
+                filters.key() if filters is not None else None
+            )
+            cached = self.result_cache.get(cache_key, limit)
+        self.metrics.cache_lookups.inc(result="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached, view
+        
+        depth = max(limit, self.result_cache.depth)
         
-        # Get vectorizers for both categories
-        source_vectorizer = self.vectorizers[source_category]
-        target_vectorizer = self.vectorizers[target_category]
+        def rank() -> list:
+            ranking = self._rank_batch(
+                source_category, target_category, [valid_preferences], depth, view,
+                self._filter_candidates(view[1], filters)
+            )[0]
+            if depth == self.result_cache.depth:
+                # Deep rankings for pages and streams would crowd out the short ones
+                self.result_cache.put(cache_key, ranking, depth)
+            return ranking
         
-        # Calculate similarity scores for preferences
+        if self.in_flight is None:
+            ranking = rank()
+        else:
+            ranking, shared = self.in_flight.do(cache_key + (depth,), rank)
+            if shared:
+                self.metrics.coalesced_requests.inc()
+        return ranking[:limit], view
+    
+    def get_recommendation_page(self, source_category: str, target_category: str,
+                                preferences: List[str], page_size: int = 20,
+                                filters: Optional[RecommendationFilters] = None) -> bytes:
+        """First page of a deep ranking, as the JSON of a RecommendationPage
+        
+        The ranking, up to ``page_max_results`` items, is computed once and
+        kept for a while; ``next_cursor`` fetches each following page as a
+        slice of it.
+        """
+        ranking, view = self._ranking(
+            source_category, target_category, preferences, self.page_max_results, filters
+        )
+        
+        token = secrets.token_urlsafe(12)
+        self.page_cache.put(token, (
+            source_category, target_category, view[1].version,
+            np.asarray([idx for idx, _ in ranking], dtype=np.int32),
+            np.asarray([score for _, score in ranking], dtype=np.float64)
+        ))
+        return self._encode_page(token, 0, page_size)
+    
+    def get_next_page(self, cursor: str, page_size: int = 20) -> bytes:
+        """The page a cursor points to, as the JSON of a RecommendationPage"""
+        token, _, offset = cursor.rpartition(".")
+        if not token or not offset.isdigit():
+            raise ValueError("Invalid cursor")
+        return self._encode_page(token, int(offset), page_size)
+    
+    def _encode_page(self, token: str, offset: int, page_size: int) -> bytes:
+        retained = self.page_cache.get(token)
+        if retained is None:
+            raise ValueError("Cursor expired or unknown, request the first page again")
+        source_category, target_category, version, ids, scores = retained
+        
+        target_index = self.categories[target_category]
+        if target_index.version != version or offset > len(ids):
+            raise ValueError("Cursor expired or unknown, request the first page again")
+        
+        end = min(offset + page_size, len(ids))
+        ranking = list(zip(ids[offset:end].tolist(), scores[offset:end].tolist()))
+        with self.metrics.span("serialize"):
+            return encode_response(
+                target_index.encoded_items, ranking, source_category, target_category,
+                total_count=len(ids), next_cursor=f"{token}.{end}" if end < len(ids) else None
+            )
+    
+    def get_recommendations_ndjson(self, source_category: str, target_category: str,
+                                   preferences: List[str], limit: int = 100, offset: int = 0,
+                                   filters: Optional[RecommendationFilters] = None,
+                                   stream: Optional[str] = None) -> bytes:
+        """Ranked items ``offset`` to ``limit`` as NDJSON, one RecommendationItem per line
+        
+        Ranking is exact, so a shallow ranking is a prefix of a deeper one:
+        a stream can send the first items from a cheap shallow pass and the
+        rest, from ``offset`` on, from a deeper pass. Passes naming the same
+        ``stream`` rank against the indexes of its first pass (``offset`` 0),
+        so an update published in between cannot repeat or skip items.
+        """
+        view = None
+        if stream is not None and offset > 0:
+            view = self.stream_views.pop(stream)
+            if view is None:
+                raise ValueError("Stream expired, request it again")
+        ranking, view = self._ranking(source_category, target_category, preferences, limit, filters, view)
+        if stream is not None and offset == 0:
+            self.stream_views.put(stream, view)
+        with self.metrics.span("serialize"):
+            return encode_ndjson(view[1].encoded_items, ranking[offset:])
+    
+    def get_recommendations_batch(self, requests: List[RecommendationRequest]) -> List[BatchRecommendationResult]:
+        """Get recommendations for many requests, scoring each source/target pair together
+        
+        Invalid requests produce an error entry instead of failing the batch;
+        results are returned in request order.
+        """
+        results: List[Optional[BatchRecommendationResult]] = [None] * len(requests)
+        
+        # Group cache misses by category pair and filters, then by normalized preferences
+        groups: Dict[tuple, Dict[tuple, List[int]]] = {}
+        group_filters: Dict[tuple, Optional[RecommendationFilters]] = {}
+        group_preferences: Dict[tuple, List[str]] = {}
+        views: Dict[tuple, tuple] = {}
+        
+        for position, request in enumerate(requests):
+            try:
+                valid_preferences = self._validate_request(
+                    request.source_category, request.target_category, request.preferences
+                )
+            except ValueError as e:
+                results[position] = BatchRecommendationResult(error=str(e))
+                continue
+            
+            pair = (request.source_category, request.target_category)
+            if pair not in views:
+                views[pair] = self._request_view(*pair)
+            source_index, target_index, _ = views[pair]
+            
+            filter_key = request.filters.key() if request.filters is not None else None
+            cache_key = self.result_cache.key(
+                request.source_category, request.target_category, valid_preferences,
+                (source_index.version, target_index.version), filter_key
+            )
+            cached = self.result_cache.get(cache_key, request.limit)
+            self.metrics.cache_lookups.inc(result="miss" if cached is None else "hit")
+            if cached is not None:
+                results[position] = self._batch_result(request, self._build_items(target_index.catalog, cached))
+                continue
+            
+            groups.setdefault(pair + (filter_key,), {}).setdefault(cache_key, []).append(position)
+            group_filters.setdefault(pair + (filter_key,), request.filters)
+            group_preferences.setdefault(cache_key, valid_preferences)
+        
+        for group, keyed_positions in groups.items():
+            source_category, target_category = group[:2]
+            cache_keys = list(keyed_positions)
+            depth = max(
+                [self.result_cache.depth] + [requests[p].limit for key in cache_keys for p in keyed_positions[key]]
+            )
+            view = views[(source_category, target_category)]
+            rankings = self._rank_batch(
+                source_category, target_category, [group_preferences[key] for key in cache_keys], depth, view,
+                self._filter_candidates(view[1], group_filters[group])
+            )
+            
+            with self.metrics.span("build_items"):
+                for cache_key, ranking in zip(cache_keys, rankings):
+                    self.result_cache.put(cache_key, ranking, depth)
+                    for position in keyed_positions[cache_key]:
+                        results[position] = self._batch_result(
+                            requests[position], self._build_items(view[1].catalog, ranking[:requests[position].limit])
+                        )
+        
+        return results
+    
+    def _batch_result(self, request: RecommendationRequest,
+                      recommendations: List[RecommendationItem]) -> BatchRecommendationResult:
+        return BatchRecommendationResult(response=RecommendationResponse(
+            recommendations=recommendations,
+            source_category=request.source_category,
+            target_category=request.target_category,
+            total_count=len(recommendations)
+        ))
+    
+    def _resolve_preferences(self, source_category: str, source_index: CategoryIndex,
+                             valid_preferences: List[str]) -> List[tuple]:
+        """Match preferences to (source_idx, score) pairs in the source category"""
+        source_store = source_index.store
+        
+        # Calculate similarity scores for preferences, reusing matches of preferences seen before
         preference_scores = []
         
         for preference in valid_preferences:
-            similar_items = self._find_similar_items(preference, source_df, source_vectorizer)
-            preference_scores.extend(similar_items)
+            key = self.preference_cache.key(source_index.version, preference)
+            matched = self.preference_cache.get(source_category, key)
+            self.metrics.preference_cache_lookups.inc(result="miss" if matched is None else "hit")
+            if matched is None:
+                path, similar_items = self._match_preference(preference, source_store, source_index.ann_index)
+                matched = (path, tuple(similar_items))
+                self.preference_cache.put(source_category, key, matched)
+            self.metrics.preference_matches.inc(path=matched[0])
+            preference_scores.extend(matched[1])
         
         # If no similar items found, use all items with low scores
         if not preference_scores:
-            for idx in range(len(source_df)):
+            self.metrics.unmatched_requests.inc()
+            for idx in range(len(source_store)):
                 preference_scores.append((idx, 0.1))
         
-        # Calculate cross-category similarity
-        recommendations = []
+        return preference_scores
+    
+    def _filter_candidates(self, target_index: CategoryIndex,
+                           filters: Optional[RecommendationFilters]) -> Optional[np.ndarray]:
+        """Target positions passing the filters, or None to rank every target"""
+        if filters is None or filters.key() is None:
+            return None
+        with self.metrics.span("filter"):
+            return target_index.attributes.candidates(
+                filters.genres, filters.min_year, filters.max_year, filters.min_rating
+            )
+    
+    def _rank_batch(self, source_category: str, target_category: str,
+                    batch_preferences: List[List[str]], limit: int,
+                    view: Optional[tuple] = None, candidates: Optional[np.ndarray] = None) -> List[List[tuple]]:
+        """Compute the top ranked (target_idx, score) pairs for each list of validated preferences
         
-        for target_idx, target_item in target_df.iterrows():
-            target_text = f"{target_item['title']} {target_item['genre']} {target_item['description']}"
-            
-            total_score = 0
-            max_score = 0
-            
-            for source_idx, source_score in preference_scores:
-                source_item = source_df.iloc[source_idx]
-                source_text = f"{source_item['title']} {source_item['genre']} {source_item['description']}"
-                
-                # Check for exact title matches first (highest priority)
-                for preference in valid_preferences:
-                    preference_lower = preference.lower()
-                    target_title_lower = target_item['title'].lower()
-                    
-                    # If preference contains a word that matches target title, give high score
-                    pref_words = set(preference_lower.split())
-                    target_words = set(target_title_lower.split())
-                    
-                    # Check for word overlap between preference and target title
-                    title_overlap = len(pref_words.intersection(target_words))
-                    if title_overlap > 0:
-                        # Boost score significantly for title matches
-                        title_score = min(0.9, 0.3 + (title_overlap * 0.2))
-                        max_score = max(max_score, title_score)
-                
-                # Use improved text similarity approach for cross-category
-                source_words = set(source_text.lower().split())
-                target_words = set(target_text.lower().split())
-                
-                # Calculate improved similarity
-                intersection = len(source_words.intersection(target_words))
-                union = len(source_words.union(target_words))
-                
-                # Use both Jaccard and word overlap similarity
-                jaccard_similarity = intersection / union if union > 0 else 0
-                overlap_similarity = intersection / len(source_words) if len(source_words) > 0 else 0
-                
-                # Combine similarities with better weighting
-                combined_similarity = (jaccard_similarity * 0.4) + (overlap_similarity * 0.6)
-                
-                # Apply source score as weight
-                weighted_score = combined_similarity * source_score
-                total_score += weighted_score
-                max_score = max(max_score, weighted_score)
-            
-            # Use the maximum score found (better than average)
-            final_score = max_score if max_score > 0 else (total_score / len(preference_scores) if preference_scores else 0)
-            
-            if final_score > 0:
-                recommendations.append({
-                    'id': target_item['id'],
-                    'title': target_item['title'],
-                    'description': target_item['description'],
-                    'genre': target_item['genre'],
-                    'rating': target_item['rating'],
-                    'year': target_item['year'],
-                    'similarity_score': float(final_score),
-                    'metadata': {}
-                })
-        
-        # Sort by similarity score and return top recommendations
-        recommendations.sort(key=lambda x: x['similarity_score'], reverse=True)
-        
-        return [RecommendationItem(**rec) for rec in recommendations[:limit]] 
\ No newline at end of file
+        ``candidates`` restricts ranking to those target positions; only
+        they are scored, so narrower filters make requests cheaper.
+        """
+        source_index, target_index, shared_space = view or self._request_view(source_category, target_category)
+        if candidates is not None and len(candidates) == 0:
+            return [[] for _ in batch_preferences]
+        
+        with self.metrics.span("match"):
+            batch_preference_scores = [
+                self._resolve_preferences(source_category, source_index, valid_preferences)
+                for valid_preferences in batch_preferences
+            ]
+        
+        rankings: List[Optional[tuple]] = [None] * len(batch_preferences)
+        table = None
+        if self.tables is not None and shared_space is None:
+            table = self.tables.table(source_category, target_category, source_index, target_index)
+        if table is not None:
+            with self.metrics.span("table"):
+                for row, (preference_scores, preferences) in enumerate(zip(batch_preference_scores, batch_preferences)):
+                    rankings[row] = rank_from_table(
+                        table, source_index.store.tokens, target_index.store.tokens,
+                        preference_scores, preferences, limit, candidates
+                    )
+                    self.metrics.table_lookups.inc(result="miss" if rankings[row] is None else "hit")
+        
+        # Requests the tables cannot answer exactly are scored live
+        live = [row for row, ranking in enumerate(rankings) if ranking is None]
+        if live:
+            with self.metrics.span("score"):
+                scored = self._top_targets_batch(
+                    source_category, target_category,
+                    [batch_preference_scores[row] for row in live], [batch_preferences[row] for row in live],
+                    limit, source_index, target_index, shared_space, candidates
+                )
+            for row, ranking in zip(live, scored):
+                rankings[row] = ranking
+        
+        return [list(zip(top.tolist(), top_scores.tolist())) for top, top_scores in rankings]
+    
+    def _top_targets_batch(self, source_category: str, target_category: str,
+                           batch_preference_scores: List[List[tuple]], batch_preferences: List[List[str]],
+                           limit: int, source_index: CategoryIndex, target_index: CategoryIndex,
+                           shared_space: Optional[SharedVectorSpace],
+                           candidates: Optional[np.ndarray] = None) -> List[tuple]:
+        """Top ``limit`` (target indices, scores) against the matched source items, one entry per request"""
+        source_store = source_index.store
+        
+        # Score only the candidate rows; positions are mapped back to the catalog at the end
+        target_tokens = target_index.store.tokens if candidates is None else target_index.store.tokens.take(candidates)
+        
+        if shared_space is None:
+            # Word-set similarity over the token-incidence matrices, stopping once the top k is settled
+            rankings = rank_targets_batch(
+                source_store.tokens, target_tokens, batch_preference_scores, batch_preferences, limit
+            )
+        else:
+            # Cosine similarity in the joint TF-IDF space, plus the same title boost
+            scores = shared_space.score_batch(
+                source_category,
+                target_category,
+                [aggregate_source_weights(preference_scores) for preference_scores in batch_preference_scores],
+                candidates
+            )
+            boosts = title_boost_scores(target_tokens, [
+                preferences if preference_scores else []
+                for preferences, preference_scores in zip(batch_preferences, batch_preference_scores)
+            ])
+            rankings = []
+            for row in np.maximum(scores, boosts):
+                top = rank_scores(row, limit)
+                rankings.append((top, row[top]))
+        
+        if candidates is None:
+            return rankings
+        return [(candidates[top], top_scores) for top, top_scores in rankings]
+    
+    def get_similar_items(self, category: str, item_id: str, limit: int = 5) -> List[RecommendationItem]:
+        """Get the items most similar to a catalog item within its own category"""
+        
+        if category not in DATA_FILES:
+            raise ValueError(f"Invalid category. Available: {list(DATA_FILES.keys())}")
+        
+        self._ensure_category(category)
+        index = self.categories[category]
+        item_idx = index.store.positions.get(item_id)
+        if item_idx is None:
+            raise ValueError(f"Unknown item '{item_id}' in category '{category}'")
+        
+        neighbor_ids, neighbor_scores = index.neighbor_index.neighbors(item_idx)
+        catalog = index.catalog
+        
+        return [
+            self._build_item(catalog, neighbor_idx, neighbor_score)
+            for neighbor_idx, neighbor_score in zip(neighbor_ids[:limit], neighbor_scores[:limit])
+        ]
+    
+    def _build_items(self, catalog: Catalog, ranking: List[tuple]) -> List[RecommendationItem]:
+        return [self._build_item(catalog, target_idx, score) for target_idx, score in ranking]
+    
+    def _build_item(self, catalog: Catalog, item_idx: int, score: float) -> RecommendationItem:
+        """Build a response item for one catalog row"""
+        item = catalog.record(item_idx)
+        return RecommendationItem(
+            id=item['id'],
+            title=item['title'],
+            description=item['description'],
+            genre=item['genre'],
+            rating=item['rating'],
+            year=item['year'],
+            similarity_score=float(score),
+            metadata={}
+        )
@@ -0,0 +1,103 @@
+import json
+import secrets
+import threading
+import time
+from typing import Any, Dict, Iterator, Sequence
+
+# Requests recorded by default: every POST that ranks recommendations
+RECORDED_PATHS = ("/recommend", "/recommend/batch", "/recommend/pages", "/recommend/stream")
+
+
+class RequestLog:
+    """Append-only JSON Lines log of API requests, one entry per line
+
+    Each entry is ``{"request_id", "time", "method", "path", "body",
+    "status", "duration_ms"}``: ``time`` is the Unix time the request
+    arrived, so a replay can reproduce the recorded arrival pattern, and
+    ``body`` is the parsed JSON body (or the raw text when it is not JSON).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def record(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_request_log(path: str) -> Iterator[Dict[str, Any]]:
+    """Entries of a request log in file order, skipping blank and truncated lines"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # The last line of a log still being written may be cut short
+                continue
+            if isinstance(entry, dict) and "path" in entry:
+                yield entry
+
+
+class RequestLogMiddleware:
+    """ASGI middleware recording matching requests to a RequestLog
+
+    A plain ASGI wrapper rather than a BaseHTTPMiddleware: the body is
+    copied as the application reads it, so streamed responses and the
+    handlers themselves are left untouched.
+    """
+
+    def __init__(self, app, log: RequestLog, paths: Sequence[str] = RECORDED_PATHS):
+        self.app = app
+        self.log = log
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        status = 500
+
+        async def recording_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def recording_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        arrived = time.time()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            raw = b"".join(chunks).decode('utf-8', errors='replace')
+            try:
+                body = json.loads(raw)
+            except json.JSONDecodeError:
+                body = raw
+            self.log.record({
+                "request_id": secrets.token_hex(8),
+                "time": round(arrived, 6),
+                "method": scope["method"],
+                "path": scope["path"],
+                "body": body,
+                "status": status,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            })
@@ -0,0 +1,253 @@
+import threading
+import numpy as np
+from scipy import sparse
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+class TokenVocabulary:
+    """Shared token vocabulary used to build comparable incidence matrices across categories"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        # Catalog updates and background compaction may register tokens concurrently
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add(self, token: str) -> int:
+        """Return the id of a token, registering it if it is new"""
+        token_id = self.index.get(token)
+        if token_id is None:
+            with self._lock:
+                token_id = self.index.setdefault(token, len(self.index))
+        return token_id
+
+    def incidence(self, token_sets: Iterable[Iterable[str]], grow: bool = True) -> sparse.csr_matrix:
+        """Build a binary (documents x vocabulary) CSR matrix from token sets
+
+        Tokens that are not in the vocabulary are registered when ``grow`` is
+        true and silently dropped otherwise.
+        """
+        indptr = [0]
+        indices: List[int] = []
+        for tokens in token_sets:
+            if grow:
+                ids = {self.add(token) for token in tokens}
+            else:
+                ids = {self.index[token] for token in tokens if token in self.index}
+            indices.extend(sorted(ids))
+            indptr.append(len(indices))
+
+        data = np.ones(len(indices), dtype=np.float64)
+        return sparse.csr_matrix(
+            (data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(self.index)),
+        )
+
+
+def tokenize(text: str) -> set:
+    """Lowercase whitespace tokenization used by cross-category scoring"""
+    return set(text.lower().split())
+
+
+def _align(matrix: sparse.csr_matrix, n_columns: int) -> sparse.csr_matrix:
+    """Pad a CSR matrix with empty columns so it matches a grown vocabulary"""
+    if matrix.shape[1] == n_columns:
+        return matrix
+    return sparse.csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], n_columns))
+
+
+class TokenIncidence:
+    """Precomputed token-incidence matrices for one category"""
+
+    def __init__(self, text_matrix: sparse.csr_matrix, title_matrix: sparse.csr_matrix, vocabulary: TokenVocabulary):
+        self.vocabulary = vocabulary
+        self.text_matrix = text_matrix
+        self.title_matrix = title_matrix
+        self.text_sizes = np.diff(self.text_matrix.indptr).astype(np.float64)
+
+    @classmethod
+    def from_texts(cls, texts: Sequence[str], titles: Sequence[str], vocabulary: TokenVocabulary) -> "TokenIncidence":
+        """Tokenize item texts and titles, registering new words in the vocabulary"""
+        return cls(
+            vocabulary.incidence(tokenize(text) for text in texts),
+            vocabulary.incidence(tokenize(title) for title in titles),
+            vocabulary
+        )
+
+    @classmethod
+    def stack(cls, parts: Sequence["TokenIncidence"], vocabulary: TokenVocabulary) -> "TokenIncidence":
+        """Rows of several incidences, one after the other"""
+        n_words = len(vocabulary)
+        return cls(
+            sparse.vstack([_align(part.text_matrix, n_words) for part in parts], format='csr'),
+            sparse.vstack([_align(part.title_matrix, n_words) for part in parts], format='csr'),
+            vocabulary
+        )
+
+    def take(self, positions: np.ndarray) -> "TokenIncidence":
+        return TokenIncidence(self.text_matrix[positions], self.title_matrix[positions], self.vocabulary)
+
+    def __len__(self) -> int:
+        return self.text_matrix.shape[0]
+
+    def overlap_counts(self, tokens: Iterable[str]) -> np.ndarray:
+        """Number of the given words that appear in each item's text"""
+        query = self.vocabulary.incidence([tokens], grow=False)
+        text_matrix = _align(self.text_matrix, query.shape[1])
+        return (text_matrix @ query.T).toarray().ravel()
+
+
+def aggregate_source_weights(preference_scores: Sequence[Tuple[int, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Collapse (source_idx, score) pairs to unique sources keeping the best score
+
+    Scores only ever enter the ranking through a maximum, so a duplicated
+    source contributes exactly its highest weight.
+    """
+    best: Dict[int, float] = {}
+    for source_idx, source_score in preference_scores:
+        source_idx = int(source_idx)
+        if source_score > best.get(source_idx, float('-inf')):
+            best[source_idx] = source_score
+    indices = np.fromiter(best.keys(), dtype=np.int64, count=len(best))
+    weights = np.fromiter(best.values(), dtype=np.float64, count=len(best))
+    return indices, weights
+
+
+def cross_category_similarity(source: TokenIncidence, target: TokenIncidence,
+                              source_indices: np.ndarray) -> np.ndarray:
+    """Word-set similarity of every target item to each of the given sources
+
+    For each (source, target) pair the similarity is
+    ``0.4 * jaccard + 0.6 * |S & T| / |S|`` over lowercased word sets.
+    Returns a dense (n_sources x n_targets) array.
+    """
+    n_columns = len(source.vocabulary)
+    source_rows = _align(source.text_matrix, n_columns)[source_indices]
+    target_matrix = _align(target.text_matrix, n_columns)
+
+    intersection = (source_rows @ target_matrix.T).toarray()
+    source_sizes = source.text_sizes[source_indices][:, None]
+    union = source_sizes + target.text_sizes[None, :] - intersection
+
+    jaccard = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+    overlap = np.divide(intersection, source_sizes, out=np.zeros_like(intersection), where=source_sizes > 0)
+
+    return (jaccard * 0.4) + (overlap * 0.6)
+
+
+def title_boost_scores(target: TokenIncidence, batch_preferences: Sequence[Sequence[str]]) -> np.ndarray:
+    """Boost for targets whose title shares words with a preference, one row per request
+
+    Each shared word adds 0.2 on top of a 0.3 base, capped at 0.9; the best
+    preference of each request wins. All preferences of the batch go
+    through a single sparse product.
+    """
+    vocabulary = target.vocabulary
+    boosts = np.zeros((len(batch_preferences), len(target)), dtype=np.float64)
+    counts = [len(preferences) for preferences in batch_preferences]
+    if not sum(counts) or len(target) == 0:
+        return boosts
+
+    preference_matrix = vocabulary.incidence(
+        (tokenize(p) for preferences in batch_preferences for p in preferences), grow=False
+    )
+    # Align to the query's width: the vocabulary may keep growing while we score
+    title_matrix = _align(target.title_matrix, preference_matrix.shape[1])
+
+    title_overlap = (preference_matrix @ title_matrix.T).toarray()
+    preference_boosts = np.where(title_overlap > 0, np.minimum(0.9, 0.3 + (title_overlap * 0.2)), 0.0)
+
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    for row, (start, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+        if end > start:
+            boosts[row] = preference_boosts[start:end].max(axis=0)
+    return boosts
+
+
+def max_weighted_rows(similarities: np.ndarray, row_positions: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Best weighted similarity per target over a subset of rows, floored at zero"""
+    if len(row_positions) == 0:
+        return np.zeros(similarities.shape[1], dtype=np.float64)
+    weighted = similarities[row_positions] * weights[:, None]
+    return np.maximum(weighted.max(axis=0), 0.0)
+
+
+# Upper bound of cross_category_similarity (jaccard and overlap are both at most 1), with rounding slack
+SIMILARITY_BOUND = 1.0 + 1e-9
+
+
+def rank_targets_batch(source: TokenIncidence, target: TokenIncidence,
+                       batch_preference_scores: Sequence[Sequence[Tuple[int, float]]],
+                       batch_preferences: Sequence[Sequence[str]], limit: int,
+                       block_size: int = 32) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Top ``limit`` (target indices, scores) of each request, best first, same order as rank_scores
+
+    Sources are visited by decreasing weight, a block at a time. A source
+    adds at most its weight to any target, so once the current k-th best
+    score exceeds the next weight no remaining source can enter or reorder
+    the top k and scoring stops early. Similarity rows are computed only
+    for visited sources and shared across the batch.
+    """
+    n_targets = len(target)
+    matched = [bool(preference_scores) for preference_scores in batch_preference_scores]
+    boosts = title_boost_scores(target, [
+        preferences if has_match else [] for preferences, has_match in zip(batch_preferences, matched)
+    ])
+
+    similarity_rows: Dict[int, np.ndarray] = {}
+    rankings = []
+    for row, preference_scores in enumerate(batch_preference_scores):
+        scores = boosts[row]
+        if matched[row] and n_targets:
+            source_indices, source_weights = aggregate_source_weights(preference_scores)
+            order = np.lexsort((source_indices, -source_weights))
+            source_indices, source_weights = source_indices[order], source_weights[order]
+            k = min(limit, n_targets)
+
+            for start in range(0, len(source_indices), block_size):
+                kth_best = np.partition(scores, n_targets - k)[n_targets - k]
+                if kth_best > source_weights[start] * SIMILARITY_BOUND:
+                    break
+
+                block = source_indices[start:start + block_size]
+                missing = np.asarray([idx for idx in block if idx not in similarity_rows], dtype=np.int64)
+                if len(missing):
+                    for idx, similarities in zip(missing, cross_category_similarity(source, target, missing)):
+                        similarity_rows[int(idx)] = similarities
+
+                weighted = np.stack([similarity_rows[int(idx)] for idx in block])
+                weighted *= source_weights[start:start + block_size, None]
+                scores = np.maximum(scores, weighted.max(axis=0))
+
+        top = rank_scores(scores, limit)
+        rankings.append((top, scores[top]))
+    return rankings
+
+
+def rank_scores(scores: np.ndarray, limit: int) -> np.ndarray:
+    """Indices of the best positive scores, ties kept in catalog order"""
+    top = top_k_indices(scores, limit)
+    return top[scores[top] > 0]
+
+
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest values, best first with ties broken by lowest index
+
+    Uses a partial selection so only the k winners are ever sorted.
+    """
+    n_values = len(values)
+    k = min(k, n_values)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if k < n_values:
+        threshold = values[np.argpartition(-values, k - 1)[k - 1]]
+        above = np.flatnonzero(values > threshold)
+        ties = np.flatnonzero(values == threshold)[:k - len(above)]
+        candidates = np.concatenate([above, ties])
+    else:
+        candidates = np.arange(n_values)
+
+    return candidates[np.lexsort((candidates, -values[candidates]))]
@@ -0,0 +1,71 @@
+from typing import Any, List, Optional, Sequence, Tuple
+
+import pydantic_core
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional; pydantic-core's encoder writes the same bytes
+    orjson = None
+
+from .catalog import Catalog, StringColumn, StringColumnBuilder
+
+# Fields of a RecommendationItem that come from the catalog, in the model's field order
+STATIC_FIELDS = ("id", "title", "description", "genre", "rating", "year")
+
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON of plain values, formatted exactly as Pydantic's model_dump_json formats them"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return pydantic_core.to_json(value)
+
+
+def encode_items(catalog: Catalog) -> StringColumn:
+    """Static fields of every item pre-encoded as a JSON object body without braces
+
+    Each value is ``"id":...,"title":...,"description":...,"genre":...,"rating":...,"year":...``,
+    so a response only has to append the similarity score and metadata.
+    """
+    builder = StringColumnBuilder()
+    for idx in range(len(catalog)):
+        record = catalog.record(idx)
+        builder.append_raw(dumps({field: record[field] for field in STATIC_FIELDS})[1:-1])
+    return builder.finish()
+
+
+def encode_items_json(items: StringColumn, ranking: Sequence[Tuple[int, float]]) -> List[bytes]:
+    """JSON of the RecommendationItem of every (item position, score) pair"""
+    # One encoder call for every score; floats never contain commas
+    scores = dumps([float(score) for _, score in ranking])[1:-1].split(b",") if ranking else []
+    return [
+        b"{" + items.raw(idx) + b',"similarity_score":' + score + b',"metadata":{}}'
+        for (idx, _), score in zip(ranking, scores)
+    ]
+
+
+def encode_response(items: StringColumn, ranking: Sequence[Tuple[int, float]],
+                    source_category: str, target_category: str,
+                    total_count: Optional[int] = None, **extra: Any) -> bytes:
+    """JSON of a RecommendationResponse assembled from pre-encoded items
+
+    Byte-identical to building the RecommendationItem and RecommendationResponse
+    models and calling ``model_dump_json()``, without constructing or
+    validating either model. ``extra`` fields are appended in order, for
+    models that extend RecommendationResponse.
+    """
+    parts = encode_items_json(items, ranking)
+    chunks = [
+        b'{"recommendations":[', b",".join(parts),
+        b'],"source_category":', dumps(source_category),
+        b',"target_category":', dumps(target_category),
+        b',"total_count":', dumps(len(parts) if total_count is None else total_count),
+    ]
+    for field, value in extra.items():
+        chunks.append(b',"' + field.encode() + b'":' + dumps(value))
+    chunks.append(b"}")
+    return b"".join(chunks)
+
+
+def encode_ndjson(items: StringColumn, ranking: Sequence[Tuple[int, float]]) -> bytes:
+    """One RecommendationItem JSON object per line"""
+    return b"".join(part + b"\n" for part in encode_items_json(items, ranking))
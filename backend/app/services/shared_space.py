@@ -0,0 +1,278 @@
+import copy
+import time
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ann import RandomProjectionLSH
+from .catalog import Catalog
+from .item_store import combined_texts
+from .neighbors import NeighborIndex
+from .scoring import max_weighted_rows, rank_scores
+from .vectors import ItemVectors
+
+
+class SharedVectorSpace:
+    """TF-IDF space fitted jointly on every catalog so items of different categories are comparable
+
+    Source->target scoring is a single sparse product between rows of two
+    category matrices. Optionally, a truncated affinity table of the top
+    target items per source item is precomputed for every category pair,
+    turning scoring into a gather over a few precomputed rows. Without one,
+    per-category LSH indexes can restrict each source item to its
+    approximate top-k target items instead of scoring every target.
+
+    Item vectors are stored as ``vector_dtype``. With ``svd_components``
+    they are first projected onto that many TruncatedSVD components, fitted
+    on every catalog, and re-normalized, so scoring is a dense product in a
+    small space instead of a sparse one over the whole vocabulary. Only
+    this space is compressed; each category's own TF-IDF matrix, used for
+    preference matching, similar items and per-category LSH, stays float64.
+
+    Catalog changes are projected into the fitted space (``updated``,
+    ``replaced``) rather than refitting it; the vocabulary, IDF weights
+    and SVD stay those of the last fit until the space is refitted.
+    """
+
+    def __init__(self, texts: Dict[str, List[str]], max_features: int = 5000,
+                 versions: Optional[Dict[str, int]] = None, vector_dtype: str = "float64",
+                 svd_components: Optional[int] = None):
+        # Versions of the category indexes the space was fitted or last projected on
+        self.versions = versions or {}
+        self.vector_dtype = vector_dtype
+        self.vectorizer = TfidfVectorizer(stop_words='english', max_features=max_features)
+        self.vectorizer.fit([text for category_texts in texts.values() for text in category_texts])
+
+        matrices = {
+            category: self.vectorizer.transform(category_texts)
+            for category, category_texts in texts.items()
+        }
+        self.reduction = None
+        if svd_components:
+            stacked = sparse.vstack(list(matrices.values()), format='csr')
+            n_components = max(1, min(svd_components, stacked.shape[1] - 1))
+            self.reduction = TruncatedSVD(n_components=n_components, random_state=0).fit(stacked)
+            matrices = {
+                category: normalize(self.reduction.transform(matrix))
+                for category, matrix in matrices.items()
+            }
+        self.vectors = {
+            category: ItemVectors.compress(matrix, vector_dtype)
+            for category, matrix in matrices.items()
+        }
+        self.affinity: Dict[Tuple[str, str], NeighborIndex] = {}
+        self.ann: Dict[str, RandomProjectionLSH] = {}
+        self.ann_k = 50
+        self.ann_params: Dict[str, Any] = {}
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the item vectors of every category"""
+        return sum(vectors.nbytes for vectors in self.vectors.values())
+
+    def precompute_affinity(self, k: int = 50, chunk_size: int = 1024):
+        """Precompute the top-k target items of every source item for all category pairs"""
+        for source_category, source_vectors in self.vectors.items():
+            source_matrix = source_vectors.expanded()
+            for target_category, target_vectors in self.vectors.items():
+                self.affinity[(source_category, target_category)] = NeighborIndex.build(
+                    source_matrix, target_vectors.expanded(), k=k, chunk_size=chunk_size
+                )
+
+    def build_ann(self, k: int = 50, n_tables: int = 8, n_bits: Optional[int] = None, n_probes: int = 2):
+        """Hash every category for approximate top-k target retrieval
+
+        The LSH indexes rank candidates against their own sparse copy of the
+        expanded vectors.
+        """
+        self.ann_k = k
+        self.ann_params = {"n_tables": n_tables, "n_bits": n_bits, "n_probes": n_probes}
+        self.ann = {
+            category: RandomProjectionLSH.build(
+                sparse.csr_matrix(vectors.expanded()), n_tables=n_tables, n_bits=n_bits, n_probes=n_probes
+            )
+            for category, vectors in self.vectors.items()
+        }
+
+    def _project(self, texts: List[str]) -> ItemVectors:
+        """Vectors of new texts in the fitted space, in its storage type"""
+        if not texts:
+            # Neither the vectorizer nor the SVD accept an empty batch
+            width = self.reduction.n_components if self.reduction is not None else len(self.vectorizer.vocabulary_)
+            matrix = np.zeros((0, width)) if self.reduction is not None else sparse.csr_matrix((0, width))
+        elif self.reduction is not None:
+            matrix = normalize(self.reduction.transform(self.vectorizer.transform(texts)))
+        else:
+            matrix = self.vectorizer.transform(texts)
+        return ItemVectors.compress(matrix, self.vector_dtype)
+
+    def updated(self, category: str, delta: Catalog, order: np.ndarray, version: int) -> "SharedVectorSpace":
+        """Space with a category's rows changed to ``concat([rows, delta]).take(order)``, without refitting
+
+        Only the delta items are projected. Affinity tables involving the
+        category are dropped, so its pairs are scored by product until the
+        next refit; its LSH index is rebuilt.
+        """
+        vectors = ItemVectors.stack([self.vectors[category], self._project(combined_texts(delta))]).take(order)
+        return self._with_vectors(category, vectors, version)
+
+    def replaced(self, category: str, catalog: Catalog, version: int) -> "SharedVectorSpace":
+        """Space with every row of a category projected from a new catalog, without refitting"""
+        return self._with_vectors(category, self._project(combined_texts(catalog)), version)
+
+    def _with_vectors(self, category: str, vectors: ItemVectors, version: int) -> "SharedVectorSpace":
+        space = copy.copy(self)
+        space.vectors = {**self.vectors, category: vectors}
+        space.versions = {**self.versions, category: version}
+        space.affinity = {pair: table for pair, table in self.affinity.items() if category not in pair}
+        if category in self.ann:
+            space.ann = {
+                **self.ann,
+                category: RandomProjectionLSH.build(sparse.csr_matrix(vectors.expanded()), **self.ann_params)
+            }
+        return space
+
+    def score_batch(self, source_category: str, target_category: str,
+                    batch_sources: List[Tuple[np.ndarray, np.ndarray]],
+                    target_positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """Best weighted cosine similarity of every target item, one row per (indices, weights) request
+
+        Without an affinity table the similarities of the union of all
+        requested source items are computed in one sparse product, against
+        only the ``target_positions`` items when given.
+        """
+        if target_positions is not None:
+            table = self.affinity.get((source_category, target_category))
+            if table is None and target_category not in self.ann:
+                return self._score_product(source_category, target_category, batch_sources, target_positions)
+            return self.score_batch(source_category, target_category, batch_sources)[:, target_positions]
+
+        n_targets = len(self.vectors[target_category])
+        scores = np.zeros((len(batch_sources), n_targets), dtype=np.float64)
+        if n_targets == 0:
+            return scores
+
+        table = self.affinity.get((source_category, target_category))
+        if table is not None:
+            for row, (source_indices, source_weights) in enumerate(batch_sources):
+                for source_idx, weight in zip(source_indices, source_weights):
+                    target_ids, target_scores = table.neighbors(source_idx)
+                    np.maximum.at(scores[row], target_ids, target_scores.astype(np.float64) * weight)
+            return scores
+
+        ann_index = self.ann.get(target_category)
+        if ann_index is not None:
+            source_matrix = self.ann[source_category].matrix
+            retrieved = {}
+            for row, (source_indices, source_weights) in enumerate(batch_sources):
+                for source_idx, weight in zip(source_indices, source_weights):
+                    if source_idx not in retrieved:
+                        retrieved[source_idx] = ann_index.query(source_matrix[source_idx], self.ann_k)
+                    target_ids, target_scores = retrieved[source_idx]
+                    np.maximum.at(scores[row], target_ids, target_scores * weight)
+            return scores
+
+        return self._score_product(source_category, target_category, batch_sources)
+
+    def _score_product(self, source_category: str, target_category: str,
+                       batch_sources: List[Tuple[np.ndarray, np.ndarray]],
+                       target_positions: Optional[np.ndarray] = None) -> np.ndarray:
+        target_vectors = self.vectors[target_category]
+        n_targets = len(target_vectors) if target_positions is None else len(target_positions)
+        scores = np.zeros((len(batch_sources), n_targets), dtype=np.float64)
+        if n_targets == 0:
+            return scores
+        union = np.unique(np.concatenate([indices for indices, _ in batch_sources] + [np.zeros(0, dtype=np.int64)]))
+        similarities = target_vectors.similarities(self.vectors[source_category].expanded(union), target_positions)
+        for row, (source_indices, source_weights) in enumerate(batch_sources):
+            scores[row] = max_weighted_rows(similarities, np.searchsorted(union, source_indices), source_weights)
+        return scores
+
+
+def storage_report(texts: Dict[str, List[str]], configs: List[Tuple[str, Optional[int]]], k: int = 10,
+                   n_queries: int = 200, seed: int = 0) -> List[Dict[str, Any]]:
+    """Memory, recall@k, score error and scoring time of each (vector_dtype, svd_components) configuration
+
+    Every configuration ranks the same sampled source items against a target
+    category and is compared with the float64 sparse space: recall is the
+    share of its top-k targets found, and the score error the mean absolute
+    difference of their scores. It measures the shared space only, the one
+    place these settings apply.
+    """
+    reference = SharedVectorSpace(texts)
+    categories = [category for category, category_texts in texts.items() if category_texts]
+    rng = np.random.default_rng(seed)
+    queries = []
+    for _ in range(n_queries):
+        source, target = rng.choice(len(categories), size=2, replace=len(categories) < 2)
+        queries.append((categories[source], categories[target], int(rng.integers(len(texts[categories[source]])))))
+
+    def rank(space: SharedVectorSpace) -> Tuple[List[Tuple[np.ndarray, np.ndarray]], float]:
+        rankings = []
+        start = time.perf_counter()
+        for source, target, source_idx in queries:
+            scores = space.score_batch(source, target, [(np.array([source_idx]), np.array([1.0]))])[0]
+            rankings.append((rank_scores(scores, k), scores))
+        return rankings, (time.perf_counter() - start) / max(len(queries), 1) * 1000
+
+    expected, _ = rank(reference)
+    report = []
+    for vector_dtype, svd_components in configs:
+        if vector_dtype == "float64" and not svd_components:
+            space = reference
+        else:
+            space = SharedVectorSpace(texts, vector_dtype=vector_dtype, svd_components=svd_components)
+        actual, query_ms = rank(space)
+        recalls, errors = [], []
+        for (expected_top, expected_scores), (actual_top, actual_scores) in zip(expected, actual):
+            if len(expected_top):
+                recalls.append(len(np.intersect1d(expected_top, actual_top)) / len(expected_top))
+                errors.append(np.abs(actual_scores[expected_top] - expected_scores[expected_top]).mean())
+        report.append({
+            "vector_dtype": vector_dtype,
+            "svd_components": svd_components or None,
+            "bytes": space.nbytes,
+            "memory_ratio": space.nbytes / reference.nbytes if reference.nbytes else 1.0,
+            "recall": float(np.mean(recalls)) if recalls else 1.0,
+            "score_error": float(np.mean(errors)) if errors else 0.0,
+            "query_ms": query_ms,
+        })
+    return report
+
+
+def main():
+    """Print memory and accuracy of reduced-precision and SVD-projected vectors against full precision
+
+    Usage, from the backend directory::
+
+        python -m app.services.shared_space --dtypes float64 float32 float16 int8 --svd 0 64 128
+    """
+    import argparse
+    import os
+    from .recommender import RecommenderService
+    from .vectors import VECTOR_DTYPES
+
+    parser = argparse.ArgumentParser(description="Memory and accuracy report for shared-space vector storage")
+    parser.add_argument("--dtypes", nargs="+", default=list(VECTOR_DTYPES), choices=VECTOR_DTYPES,
+                        help="Vector storage types to try")
+    parser.add_argument("--svd", type=int, nargs="+", default=[0, 64, 128],
+                        help="TruncatedSVD components to try (0: no projection)")
+    parser.add_argument("--k", type=int, default=10, help="Targets compared per query")
+    parser.add_argument("--queries", type=int, default=200, help="Source items ranked per configuration")
+    parser.add_argument("--data-dir", default=os.getenv("RECOMMENDER_DATA_DIR"), help="Catalog directory")
+    args = parser.parse_args()
+
+    service = RecommenderService(data_dir=args.data_dir)
+    texts = {category: index.store.texts for category, index in service.categories.items()}
+    configs = [(dtype, svd) for svd in args.svd for dtype in args.dtypes]
+    print(f"{'dtype':<8} {'svd':>5} {'MB':>9} {'memory':>7} {'recall@' + str(args.k):>9} {'score err':>10} {'ms':>7}")
+    for row in storage_report(texts, configs, k=args.k, n_queries=args.queries):
+        print(f"{row['vector_dtype']:<8} {row['svd_components'] or '-':>5} {row['bytes'] / 1e6:>9.2f} "
+              f"{row['memory_ratio']:>6.1%} {row['recall']:>9.3f} {row['score_error']:>10.5f} {row['query_ms']:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
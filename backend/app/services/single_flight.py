@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one computation
+
+    The first caller of a key runs the function; callers arriving while it
+    runs wait for it and receive the same result, or the same exception.
+    A call that was cancelled does not fail its waiters: they retry, and one
+    of them runs the function again.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Result of ``fn()`` for ``key`` and whether it was shared from another caller's call
+
+        ``timeout`` bounds how long a waiting caller blocks; it raises
+        concurrent.futures.TimeoutError and leaves the running call alone.
+        """
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self._calls[key] = Future()
+                    self.leaders += 1
+                else:
+                    self.followers += 1
+
+            if leader:
+                return self._run(key, future, fn), False
+
+            try:
+                return future.result(timeout), True
+            except CancelledError:
+                # The running call was cancelled, not failed; compute it again
+                continue
+
+    def _run(self, key: Hashable, future: Future, fn: Callable[[], Any]) -> Any:
+        try:
+            result = fn()
+        except CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            # Later callers start a fresh call; the outcome above is already delivered to waiters
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
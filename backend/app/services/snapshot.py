@@ -0,0 +1,355 @@
+import hashlib
+import json
+import os
+import shutil
+from contextlib import contextmanager
+import numpy as np
+from scipy import sparse
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock; snapshots are then single-process only
+    fcntl = None
+
+from .scoring import TokenVocabulary, TokenIncidence
+from .item_store import ItemStore, ItemPositions, new_vectorizer
+from .neighbors import NeighborIndex
+from .title_index import TitleIndex, PostingLists
+from .attributes import AttributeIndex
+from .category_index import CategoryIndex
+from .catalog import Catalog, StringColumn
+
+# Bump whenever the on-disk layout or the way any stored array is computed changes
+SNAPSHOT_VERSION = 4
+
+VOCABULARY_FILE = "tokens.json"
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+
+
+def content_hash(catalog: Catalog, params: Dict[str, Any]) -> str:
+    """Hash of a category's catalog and the build parameters its index depends on"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"version": SNAPSHOT_VERSION, **params}, sort_keys=True).encode('utf-8'))
+    for column in (catalog.ids, catalog.titles, catalog.descriptions):
+        digest.update(column.offsets.tobytes())
+        digest.update(column.buffer)
+        if column.nulls is not None:
+            digest.update(np.flatnonzero(column.nulls).tobytes())
+    digest.update(json.dumps(catalog.genre_names).encode('utf-8'))
+    for array in (catalog.genre_codes, catalog.years, catalog.ratings):
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _save_csr(directory: str, name: str, matrix: sparse.csr_matrix):
+    np.save(os.path.join(directory, f"{name}_data.npy"), matrix.data)
+    np.save(os.path.join(directory, f"{name}_indices.npy"), matrix.indices)
+    np.save(os.path.join(directory, f"{name}_indptr.npy"), matrix.indptr)
+
+
+def _load_array(directory: str, name: str, mmap: bool) -> np.ndarray:
+    return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r' if mmap else None)
+
+
+def _save_postings(directory: str, name: str, postings: PostingLists):
+    with open(os.path.join(directory, f"{name}_keys.json"), 'w', encoding='utf-8') as f:
+        json.dump(postings.keys, f)
+    np.save(os.path.join(directory, f"{name}_offsets.npy"), postings.offsets)
+    np.save(os.path.join(directory, f"{name}_postings.npy"), postings.postings)
+
+
+def _load_postings(directory: str, name: str, mmap: bool) -> PostingLists:
+    with open(os.path.join(directory, f"{name}_keys.json"), 'r', encoding='utf-8') as f:
+        keys = json.load(f)
+    return PostingLists(
+        keys,
+        _load_array(directory, f"{name}_offsets", mmap),
+        _load_array(directory, f"{name}_postings", mmap),
+    )
+
+
+def _save_strings(directory: str, name: str, column: StringColumn):
+    np.save(os.path.join(directory, f"{name}_buffer.npy"), np.frombuffer(column.buffer, dtype=np.uint8))
+    np.save(os.path.join(directory, f"{name}_offsets.npy"), column.offsets)
+    if column.nulls is not None:
+        np.save(os.path.join(directory, f"{name}_nulls.npy"), column.nulls)
+
+
+def _load_strings(directory: str, name: str, mmap: bool) -> StringColumn:
+    nulls = None
+    if os.path.exists(os.path.join(directory, f"{name}_nulls.npy")):
+        nulls = _load_array(directory, f"{name}_nulls", mmap)
+    return StringColumn(
+        memoryview(_load_array(directory, f"{name}_buffer", mmap)),
+        _load_array(directory, f"{name}_offsets", mmap),
+        nulls
+    )
+
+
+def _save_catalog(directory: str, catalog: Catalog):
+    for name in ("ids", "titles", "descriptions"):
+        _save_strings(directory, f"catalog_{name}", getattr(catalog, name))
+    with open(os.path.join(directory, "catalog_genre_names.json"), 'w', encoding='utf-8') as f:
+        json.dump(catalog.genre_names, f)
+    for name in ("genre_codes", "years", "ratings"):
+        np.save(os.path.join(directory, f"catalog_{name}.npy"), getattr(catalog, name))
+
+
+def _load_catalog(directory: str, mmap: bool) -> Catalog:
+    with open(os.path.join(directory, "catalog_genre_names.json"), 'r', encoding='utf-8') as f:
+        genre_names = json.load(f)
+    return Catalog(
+        _load_strings(directory, "catalog_ids", mmap),
+        _load_strings(directory, "catalog_titles", mmap),
+        _load_strings(directory, "catalog_descriptions", mmap),
+        _load_array(directory, "catalog_genre_codes", mmap),
+        genre_names,
+        _load_array(directory, "catalog_years", mmap),
+        _load_array(directory, "catalog_ratings", mmap),
+    )
+
+
+def _load_csr(directory: str, name: str, shape: Tuple[int, int], mmap: bool) -> sparse.csr_matrix:
+    return sparse.csr_matrix(
+        (
+            _load_array(directory, f"{name}_data", mmap),
+            _load_array(directory, f"{name}_indices", mmap),
+            _load_array(directory, f"{name}_indptr", mmap),
+        ),
+        shape=shape,
+        copy=False,
+    )
+
+
+def _is_current(manifest: Optional[Dict[str, Any]], expected_hash: Optional[str],
+                source: Optional[Dict[str, Any]]) -> bool:
+    if manifest is None or manifest.get("version") != SNAPSHOT_VERSION:
+        return False
+    return ((expected_hash is not None and manifest.get("content_hash") == expected_hash)
+            or (source is not None and manifest.get("source") == source))
+
+
+class IndexSnapshot:
+    """On-disk snapshot of the per-category indexes
+
+    Layout::
+
+        <directory>/tokens.json              shared token vocabulary, append-only
+        <directory>/<category>/manifest.json version, content hash, source file and shapes
+        <directory>/<category>/catalog_*     catalog columns (string buffers, offsets, numeric arrays)
+        <directory>/<category>/*.npy         TF-IDF, token-incidence, neighbor, item id,
+                                             encoded item and attribute arrays
+
+    Arrays are loaded memory-mapped read-only by default, so startup cost
+    does not depend on catalog size and every worker process attached to the
+    same snapshot shares one copy of the pages through the OS page cache.
+    The catalog itself is served from the snapshot too: a process whose
+    source file still has the size and modification time recorded in the
+    manifest attaches without parsing the JSON at all.
+
+    Writers hold an exclusive file lock while building and publishing, so
+    when several workers start at once a single one builds each stale
+    category and the others attach to its result.
+    """
+
+    def __init__(self, directory: str, mmap: bool = True):
+        self.directory = directory
+        self.mmap = mmap
+
+    def _category_dir(self, category: str) -> str:
+        return os.path.join(self.directory, category)
+
+    @contextmanager
+    def lock(self, exclusive: bool = False) -> Iterator[None]:
+        """Hold the snapshot-wide lock: shared for readers, exclusive for a builder"""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load_vocabulary(self, vocabulary: TokenVocabulary):
+        """Extend a vocabulary with tokens published since it was last synced
+
+        The on-disk vocabulary is append-only, so a process whose tokens are
+        a prefix of it can keep every word id it has already handed out.
+        """
+        path = os.path.join(self.directory, VOCABULARY_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            tokens = json.load(f)
+
+        known = len(vocabulary)
+        if known > len(tokens) or any(vocabulary.index.get(token) != idx for idx, token in enumerate(tokens[:known])):
+            raise ValueError(f"Token vocabulary in {self.directory} does not extend the in-memory vocabulary")
+        for token in tokens[known:]:
+            vocabulary.add(token)
+
+    def save_vocabulary(self, vocabulary: TokenVocabulary):
+        os.makedirs(self.directory, exist_ok=True)
+        tokens = sorted(vocabulary.index, key=vocabulary.index.get)
+        path = os.path.join(self.directory, VOCABULARY_FILE)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(tokens, f)
+        os.replace(f"{path}.tmp", path)
+
+    def read_manifest(self, category: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self._category_dir(category), MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def is_current(self, category: str, expected_hash: Optional[str] = None,
+                   source: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether the snapshot holds an up-to-date build of a category
+
+        It is when the manifest has the catalog's content hash, or was
+        written from a source file with the same ``source`` stamp (path,
+        size, modification time and build parameters).
+        """
+        return _is_current(self.read_manifest(category), expected_hash, source)
+
+    def load_category(self, category: str, vocabulary: TokenVocabulary, expected_hash: Optional[str] = None,
+                      source: Optional[Dict[str, Any]] = None) -> Optional[CategoryIndex]:
+        """Load a category's catalog and indexes, or None when the snapshot is missing or stale"""
+        manifest = self.read_manifest(category)
+        if (not _is_current(manifest, expected_hash, source)
+                or max(manifest["vocabulary_size"], manifest["title_vocabulary_size"]) > len(vocabulary)):
+            return None
+
+        directory = self._category_dir(category)
+        n_items = manifest["n_items"]
+        catalog = _load_catalog(directory, self.mmap)
+
+        with open(os.path.join(directory, "tfidf_terms.json"), 'r', encoding='utf-8') as f:
+            terms = json.load(f)
+        vectorizer = new_vectorizer(vocabulary={term: idx for idx, term in enumerate(terms)})
+        vectorizer.idf_ = np.load(os.path.join(directory, "tfidf_idf.npy"))
+        tfidf_matrix = _load_csr(directory, "tfidf", (n_items, len(terms)), self.mmap)
+
+        tokens = TokenIncidence(
+            _load_csr(directory, "text", (n_items, manifest["vocabulary_size"]), self.mmap),
+            _load_csr(directory, "title", (n_items, manifest["title_vocabulary_size"]), self.mmap),
+            vocabulary
+        )
+
+        title_index = TitleIndex(
+            catalog.titles,
+            _load_postings(directory, "title_tokens", self.mmap),
+            _load_postings(directory, "title_grams", self.mmap)
+        )
+
+        neighbor_index = NeighborIndex(
+            _load_array(directory, "neighbors_indptr", self.mmap),
+            _load_array(directory, "neighbors_indices", self.mmap),
+            _load_array(directory, "neighbors_scores", self.mmap),
+            manifest["neighbor_k"]
+        )
+        positions = ItemPositions(catalog.ids, _load_array(directory, "id_order", self.mmap))
+        attributes = AttributeIndex(
+            catalog,
+            _load_array(directory, "year_order", self.mmap),
+            _load_array(directory, "rating_order", self.mmap),
+            _load_array(directory, "genre_order", self.mmap)
+        )
+        return CategoryIndex(
+            ItemStore(catalog, vectorizer, tfidf_matrix, tokens, title_index, positions),
+            neighbor_index,
+            encoded_items=_load_strings(directory, "encoded_items", self.mmap),
+            attributes=attributes
+        )
+
+    def save_category(self, category: str, index: CategoryIndex, vocabulary: TokenVocabulary,
+                      expected_hash: str, source: Optional[Dict[str, Any]] = None):
+        """Write a category's catalog and indexes, replacing any previous snapshot of it
+
+        ``source`` stamps the file the catalog was read from, so later
+        processes can attach without reading it.
+        """
+        target = self._category_dir(category)
+        staging = f"{target}.tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        store, neighbor_index = index.store, index.neighbor_index
+
+        _save_catalog(staging, store.catalog)
+        np.save(os.path.join(staging, "id_order.npy"), store.positions.order)
+        _save_strings(staging, "encoded_items", index.encoded_items)
+        np.save(os.path.join(staging, "year_order.npy"), index.attributes.year_order)
+        np.save(os.path.join(staging, "rating_order.npy"), index.attributes.rating_order)
+        np.save(os.path.join(staging, "genre_order.npy"), index.attributes.genre_order)
+
+        terms = sorted(store.vectorizer.vocabulary_, key=store.vectorizer.vocabulary_.get)
+        with open(os.path.join(staging, "tfidf_terms.json"), 'w', encoding='utf-8') as f:
+            json.dump(terms, f)
+        np.save(os.path.join(staging, "tfidf_idf.npy"), store.vectorizer.idf_)
+        _save_csr(staging, "tfidf", store.tfidf_matrix)
+        _save_csr(staging, "text", store.tokens.text_matrix)
+        _save_csr(staging, "title", store.tokens.title_matrix)
+        _save_postings(staging, "title_tokens", store.title_index.tokens)
+        _save_postings(staging, "title_grams", store.title_index.grams)
+        np.save(os.path.join(staging, "neighbors_indptr.npy"), neighbor_index.indptr)
+        np.save(os.path.join(staging, "neighbors_indices.npy"), neighbor_index.indices)
+        np.save(os.path.join(staging, "neighbors_scores.npy"), neighbor_index.scores)
+
+        # The vocabulary must be on disk before any manifest that references it
+        self.save_vocabulary(vocabulary)
+
+        # Manifest goes last: a snapshot without one is never loaded
+        manifest = {
+            "version": SNAPSHOT_VERSION,
+            "category": category,
+            "content_hash": expected_hash,
+            "source": source,
+            "n_items": len(store),
+            "vocabulary_size": store.tokens.text_matrix.shape[1],
+            "title_vocabulary_size": store.tokens.title_matrix.shape[1],
+            "neighbor_k": neighbor_index.k,
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(target, ignore_errors=True)
+        os.rename(staging, target)
+
+
+def main():
+    """Build (or refresh) the snapshot of every category
+
+    Usage, from the backend directory::
+
+        python -m app.services.snapshot path/to/index
+    """
+    import argparse
+    from .recommender import RecommenderService
+
+    parser = argparse.ArgumentParser(description="Build the recommender index snapshot")
+    parser.add_argument("index_dir", help="Directory to write the snapshot to")
+    parser.add_argument("--neighbor-k", type=int, default=20, help="Neighbors kept per item")
+    parser.add_argument("--build-workers", type=int, default=os.cpu_count() or 1,
+                        help="Categories built at once in worker processes")
+    args = parser.parse_args()
+
+    def report(category: str, timings: Dict[str, float]):
+        stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items())
+        print(f"{category}: built ({stages})" if timings else f"{category}: up to date")
+
+    service = RecommenderService(neighbor_k=args.neighbor_k, index_dir=args.index_dir, lazy=True,
+                                 build_workers=args.build_workers)
+    service.load_all(progress=report)
+    for category, store in service.item_stores.items():
+        print(f"{category}: {len(store)} items")
+    print(f"Snapshot written to {args.index_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .catalog import Catalog
+from .category_index import CategoryIndex
+from .neighbors import NeighborIndex
+from .scoring import (
+    TokenIncidence, aggregate_source_weights, cross_category_similarity, rank_scores, title_boost_scores
+)
+from .snapshot import content_hash
+
+# Bump whenever the on-disk layout or the way the stored similarities are computed changes
+TABLES_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+
+# Requests matching more source items than this are scored live: merging their rows costs more than it saves
+MAX_TABLE_SOURCES = 1024
+
+# Relative error allowed for similarities stored as float32
+SCORE_TOLERANCE = 1e-6
+
+# Called with a source and target category and the seconds their table took to build
+TableProgress = Callable[[str, str, float], None]
+
+
+def catalog_hash(catalog: Catalog) -> str:
+    """Hash of the catalog contents a table was built from"""
+    return content_hash(catalog, {"tables": TABLES_VERSION})
+
+
+def build_table(source: TokenIncidence, target: TokenIncidence, top_n: int,
+                max_block_cells: int = 1 << 25) -> NeighborIndex:
+    """Top ``top_n`` targets of every source item by word-set similarity, in the NeighborIndex layout
+
+    Only a (chunk x n_targets) block of similarities is materialised at once.
+    Rows keep the positive similarities only, best first with ties in catalog
+    order, so a row shorter than ``top_n`` lists every target it can reach.
+    """
+    n_sources, n_targets = len(source), len(target)
+    indptr = np.zeros(n_sources + 1, dtype=np.int64)
+    chunk_size = max(1, max_block_cells // max(n_targets, 1))
+
+    chunk_indices = []
+    chunk_scores = []
+    for start in range(0, n_sources, chunk_size):
+        end = min(start + chunk_size, n_sources)
+        similarities = cross_category_similarity(source, target, np.arange(start, end))
+        for row in range(end - start):
+            top = rank_scores(similarities[row], top_n)
+            chunk_indices.append(top.astype(np.int32))
+            chunk_scores.append(similarities[row, top].astype(np.float32))
+            indptr[start + row + 1] = len(top)
+
+    np.cumsum(indptr, out=indptr)
+    indices = np.concatenate(chunk_indices) if chunk_indices else np.zeros(0, dtype=np.int32)
+    scores = np.concatenate(chunk_scores) if chunk_scores else np.zeros(0, dtype=np.float32)
+    return NeighborIndex(indptr, indices, scores, top_n)
+
+
+def rank_from_table(table: NeighborIndex, source: TokenIncidence, target: TokenIncidence,
+                    preference_scores: Sequence[Tuple[int, float]], preferences: Sequence[str], limit: int,
+                    candidates: Optional[np.ndarray] = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Top ``limit`` (target indices, scores) of one request from the table rows of its sources
+
+    The stored rows bound the score of every target they list, and a target
+    missing from a full row scores at most the source's weight times that
+    row's last similarity. Only targets whose bounds reach the k-th best
+    lower bound are rescored exactly, so scores and ties match
+    ``rank_targets_batch``. When the k-th best exact score does not beat
+    every unscored target's bound the ranking could be incomplete and None
+    is returned, for the caller to score live. ``candidates`` restricts the
+    ranking to those target positions, as filters do.
+    """
+    source_indices, source_weights = aggregate_source_weights(preference_scores)
+    if not len(source_indices) or len(source_indices) > MAX_TABLE_SOURCES:
+        return None
+
+    # Best weighted stored similarity of every listed target, plus the title boosted ones
+    starts, ends = table.indptr[source_indices], table.indptr[source_indices + 1]
+    lengths = ends - starts
+    entries = np.concatenate([table.indices[start:end] for start, end in zip(starts, ends)] + [np.zeros(0, np.int32)])
+    entry_scores = np.concatenate(
+        [table.scores[start:end] for start, end in zip(starts, ends)] + [np.zeros(0, np.float32)]
+    ).astype(np.float64) * np.repeat(source_weights, lengths)
+    boosts = title_boost_scores(target, [preferences])[0]
+    listed, inverse = np.unique(np.concatenate([entries, np.flatnonzero(boosts)]), return_inverse=True)
+    stored = np.zeros(len(listed), dtype=np.float64)
+    np.maximum.at(stored, inverse[:len(entries)], entry_scores)
+    if candidates is not None:
+        allowed = np.isin(listed, candidates, assume_unique=True)
+        listed, stored = listed[allowed], stored[allowed]
+
+    # Targets missing from a full row score at most its weighted last similarity there
+    full = lengths >= table.k
+    tails = np.zeros(len(source_indices), dtype=np.float64)
+    tails[full] = table.scores[ends[full] - 1]
+    bound = float((tails * source_weights).max()) * (1 + SCORE_TOLERANCE)
+
+    lower = np.maximum(boosts[listed], stored * (1 - SCORE_TOLERANCE))
+    upper = np.maximum(np.maximum(boosts[listed], stored * (1 + SCORE_TOLERANCE)), bound)
+    kth_lower = np.partition(lower, len(lower) - limit)[len(lower) - limit] if 0 < limit <= len(lower) else 0.0
+    rescored = upper >= kth_lower
+
+    kept = listed[rescored]
+    scores = boosts[kept]
+    if len(kept):
+        weighted = cross_category_similarity(source, target.take(kept), source_indices)
+        weighted *= source_weights[:, None]
+        scores = np.maximum(scores, weighted.max(axis=0))
+
+    top = rank_scores(scores, limit)
+    ceiling = max(bound, float(upper[~rescored].max()) if not rescored.all() else 0.0)
+    complete = scores[top[-1]] > ceiling if len(top) == limit and limit > 0 else ceiling <= 0
+    if not complete:
+        return None
+    return kept[top], scores[top]
+
+
+class RecommendationTables:
+    """Precomputed top-N target tables for every source/target category pair
+
+    Layout::
+
+        <directory>/manifest.json                      version, top_n and a content hash per category
+        <directory>/<source>__<target>_indptr.npy      row offsets, one row per source item
+        <directory>/<source>__<target>_indices.npy     int32 target positions, best first
+        <directory>/<source>__<target>_scores.npy      float32 similarities
+
+    Arrays are loaded memory-mapped. A pair's table is only used while
+    both categories still hold the catalogs it was built from; after an
+    update or a reload with new data it is ignored until rebuilt.
+    """
+
+    def __init__(self, directory: str, mmap: bool = True):
+        self.directory = directory
+        self.mmap = mmap
+        self._manifest: Optional[Dict] = None
+        self._tables: Dict[Tuple[str, str], NeighborIndex] = {}
+        # category -> (CategoryIndex version, whether the tables match it)
+        self._current: Dict[str, Tuple[int, bool]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _pair_name(source_category: str, target_category: str) -> str:
+        return f"{source_category}__{target_category}"
+
+    def _load(self) -> Dict:
+        with self._lock:
+            if self._manifest is None:
+                path = os.path.join(self.directory, MANIFEST_FILE)
+                manifest = {}
+                if os.path.exists(path):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        manifest = json.load(f)
+                if manifest.get("version") != TABLES_VERSION:
+                    manifest = {"categories": {}, "pairs": []}
+                for source_category, target_category in manifest["pairs"]:
+                    name = self._pair_name(source_category, target_category)
+                    arrays = [
+                        np.load(os.path.join(self.directory, f"{name}_{part}.npy"), mmap_mode='r' if self.mmap else None)
+                        for part in ("indptr", "indices", "scores")
+                    ]
+                    self._tables[(source_category, target_category)] = NeighborIndex(*arrays, manifest["top_n"])
+                self._manifest = manifest
+            return self._manifest
+
+    def reload(self):
+        """Pick up tables rebuilt since they were first loaded"""
+        with self._lock:
+            self._manifest = None
+            self._tables = {}
+            self._current = {}
+
+    def _is_current(self, category: str, index: CategoryIndex) -> bool:
+        cached = self._current.get(category)
+        if cached is not None and cached[0] == index.version:
+            return cached[1]
+        expected = self._load()["categories"].get(category)
+        current = (expected is not None and expected["n_items"] == len(index.catalog)
+                   and expected["content_hash"] == catalog_hash(index.catalog))
+        self._current[category] = (index.version, current)
+        return current
+
+    def table(self, source_category: str, target_category: str,
+              source_index: CategoryIndex, target_index: CategoryIndex) -> Optional[NeighborIndex]:
+        """Table of a category pair, or None when there is none or it is stale"""
+        self._load()
+        table = self._tables.get((source_category, target_category))
+        if table is None or not self._is_current(source_category, source_index):
+            return None
+        if not self._is_current(target_category, target_index):
+            return None
+        return table
+
+    def save(self, categories: Dict[str, CategoryIndex], top_n: int, progress: Optional[TableProgress] = None):
+        """Build the table of every ordered category pair and replace the directory with them"""
+        staging = f"{self.directory.rstrip(os.sep)}.tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        pairs = []
+        for source_category, source_index in categories.items():
+            for target_category, target_index in categories.items():
+                start = time.perf_counter()
+                table = build_table(source_index.store.tokens, target_index.store.tokens, top_n)
+                name = self._pair_name(source_category, target_category)
+                np.save(os.path.join(staging, f"{name}_indptr.npy"), table.indptr)
+                np.save(os.path.join(staging, f"{name}_indices.npy"), table.indices)
+                np.save(os.path.join(staging, f"{name}_scores.npy"), table.scores)
+                pairs.append([source_category, target_category])
+                if progress is not None:
+                    progress(source_category, target_category, time.perf_counter() - start)
+
+        # Manifest goes last: tables without one are never loaded
+        manifest = {
+            "version": TABLES_VERSION,
+            "top_n": top_n,
+            "categories": {
+                category: {"content_hash": catalog_hash(index.catalog), "n_items": len(index.catalog)}
+                for category, index in categories.items()
+            },
+            "pairs": pairs,
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.rename(staging, self.directory)
+        self.reload()
+
+
+def main():
+    """Precompute the recommendation tables of every category pair
+
+    Usage, from the backend directory::
+
+        python -m app.services.tables path/to/tables --top-n 100
+    """
+    import argparse
+    from .recommender import RecommenderService
+
+    parser = argparse.ArgumentParser(description="Precompute the top-N recommendation tables")
+    parser.add_argument("tables_dir", help="Directory to write the tables to")
+    parser.add_argument("--top-n", type=int, default=100, help="Targets kept per source item")
+    parser.add_argument("--index-dir", default=None, help="Index snapshot to load the categories from")
+    parser.add_argument("--build-workers", type=int, default=os.cpu_count() or 1,
+                        help="Categories built at once in worker processes")
+    args = parser.parse_args()
+
+    service = RecommenderService(index_dir=args.index_dir, lazy=True, build_workers=args.build_workers)
+    service.load_all()
+
+    def report(source_category: str, target_category: str, seconds: float):
+        print(f"{source_category} -> {target_category}: {seconds:.2f}s")
+
+    RecommendationTables(args.tables_dir).save(service.categories, args.top_n, progress=report)
+    print(f"Tables written to {args.tables_dir}")
+
+
+if __name__ == "__main__":
+    main()
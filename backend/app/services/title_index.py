@@ -0,0 +1,168 @@
+import numpy as np
+from collections import defaultdict
+from typing import Dict, List, Sequence, Set, Tuple
+
+# Longest character n-gram indexed; shorter queries are answered by a single posting list
+GRAM_SIZE = 3
+
+
+def _grams(text: str, size: int) -> Set[str]:
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _padded(text: str) -> str:
+    # Pad words so trigrams also capture where words start and end
+    return f" {' '.join(text.split())} "
+
+
+class PostingLists:
+    """Sorted item-id posting lists for string keys, stored as one flat int32 array"""
+
+    def __init__(self, keys: List[str], offsets: np.ndarray, postings: np.ndarray):
+        self.keys = keys
+        self.offsets = offsets
+        self.postings = postings
+        self._slots: Dict[str, int] = {key: slot for slot, key in enumerate(keys)}
+
+    @classmethod
+    def from_dict(cls, index: Dict[str, List[int]]) -> "PostingLists":
+        keys = sorted(index)
+        lists = [np.asarray(sorted(set(index[key])), dtype=np.int32) for key in keys]
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(ids) for ids in lists])
+        postings = np.concatenate(lists) if lists else np.zeros(0, dtype=np.int32)
+        return cls(keys, offsets, postings)
+
+    @classmethod
+    def merge(cls, parts: Sequence[Tuple["PostingLists", np.ndarray]]) -> "PostingLists":
+        """Union of several posting lists after renumbering their item ids
+
+        Each part comes with an array mapping its item ids to the new ids;
+        ids mapped to -1 are dropped. Keys left without postings disappear.
+        """
+        keys = sorted({key for postings, _ in parts for key in postings.keys})
+        slot_of = {key: slot for slot, key in enumerate(keys)}
+
+        all_slots = []
+        all_ids = []
+        for postings, new_ids in parts:
+            key_slots = np.asarray([slot_of[key] for key in postings.keys], dtype=np.int64)
+            slots = np.repeat(key_slots, np.diff(postings.offsets))
+            ids = np.asarray(new_ids, dtype=np.int64)[postings.postings]
+            keep = ids >= 0
+            all_slots.append(slots[keep])
+            all_ids.append(ids[keep])
+
+        slots = np.concatenate(all_slots) if all_slots else np.zeros(0, dtype=np.int64)
+        ids = np.concatenate(all_ids) if all_ids else np.zeros(0, dtype=np.int64)
+        order = np.lexsort((ids, slots))
+        slots, ids = slots[order], ids[order]
+
+        counts = np.bincount(slots, minlength=len(keys))
+        present = np.flatnonzero(counts)
+        offsets = np.zeros(len(present) + 1, dtype=np.int64)
+        np.cumsum(counts[present], out=offsets[1:])
+        return cls([keys[slot] for slot in present], offsets, ids.astype(np.int32))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._slots
+
+    def get(self, key: str, default=None):
+        slot = self._slots.get(key)
+        if slot is None:
+            return default
+        return self.postings[self.offsets[slot]:self.offsets[slot + 1]]
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        posting = self.get(key)
+        if posting is None:
+            raise KeyError(key)
+        return posting
+
+
+class TitleIndex:
+    """Inverted indexes over lowercased titles for substring and typo-tolerant lookup
+
+    Titles are indexed by whitespace token and by every character n-gram up
+    to trigrams of the word-padded title. A substring query intersects the
+    posting lists of its trigrams (smallest first) and only verifies the
+    surviving candidates, so lookups touch posting lists rather than the
+    whole catalog.
+    """
+
+    def __init__(self, titles: Sequence[str], tokens: PostingLists, grams: PostingLists):
+        self.titles = titles
+        self.tokens = tokens
+        self.grams = grams
+
+    @classmethod
+    def build(cls, titles: Sequence[str]) -> "TitleIndex":
+        tokens = defaultdict(list)
+        grams = defaultdict(list)
+        for idx, title in enumerate(titles):
+            title = str(title).lower()
+            for token in title.split():
+                tokens[token].append(idx)
+            for size in range(1, GRAM_SIZE + 1):
+                for gram in _grams(_padded(title), size):
+                    grams[gram].append(idx)
+
+        return cls(titles, PostingLists.from_dict(tokens), PostingLists.from_dict(grams))
+
+    @classmethod
+    def merge(cls, titles: Sequence[str], parts: Sequence[Tuple["TitleIndex", np.ndarray]]) -> "TitleIndex":
+        """Combine indexes of several item ranges into one index over ``titles``"""
+        return cls(
+            titles,
+            PostingLists.merge([(index.tokens, new_ids) for index, new_ids in parts]),
+            PostingLists.merge([(index.grams, new_ids) for index, new_ids in parts]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def token_matches(self, token: str) -> np.ndarray:
+        """Items whose title contains the whole word"""
+        return self.tokens.get(token.lower(), np.zeros(0, dtype=np.int32))
+
+    def substring_matches(self, query: str) -> np.ndarray:
+        """Items whose title contains the query as a case-insensitive substring, in catalog order"""
+        query = query.lower()
+        if not query:
+            return np.arange(len(self.titles), dtype=np.int32)
+        if len(query) <= GRAM_SIZE and query == query.strip():
+            return self.grams.get(query, np.zeros(0, dtype=np.int32))
+
+        postings = []
+        for gram in _grams(query, min(len(query), GRAM_SIZE)):
+            posting = self.grams.get(gram)
+            if posting is None:
+                return np.zeros(0, dtype=np.int32)
+            postings.append(posting)
+
+        postings.sort(key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+
+        return np.asarray([idx for idx in candidates if query in str(self.titles[idx]).lower()], dtype=np.int32)
+
+    def fuzzy_matches(self, query: str, limit: int = 3, min_similarity: float = 0.6) -> List[Tuple[int, float]]:
+        """Typo-tolerant candidates ranked by the share of query trigrams found in each title"""
+        query_grams = _grams(_padded(query.lower()), GRAM_SIZE)
+        if not query_grams:
+            return []
+
+        postings = [self.grams[gram] for gram in query_grams if gram in self.grams]
+        if not postings:
+            return []
+
+        candidates, shared = np.unique(np.concatenate(postings), return_counts=True)
+        similarities = shared / len(query_grams)
+        keep = similarities >= min_similarity
+        candidates, similarities = candidates[keep], similarities[keep]
+
+        order = np.lexsort((candidates, -similarities))[:limit]
+        return [(int(candidates[i]), float(similarities[i])) for i in order]
@@ -0,0 +1,178 @@
+import numpy as np
+from scipy import sparse
+from typing import Optional, Sequence, Union
+
+# Storage types for item vectors, from exact to most compact
+VECTOR_DTYPES = ("float64", "float32", "float16", "int8")
+
+# Rows of a dense matrix expanded to float32 at a time while scoring
+BLOCK_ROWS = 16384
+
+Matrix = Union[sparse.csr_matrix, np.ndarray]
+
+
+def _row_lengths(matrix: sparse.csr_matrix) -> np.ndarray:
+    return np.diff(matrix.indptr)
+
+
+def _take_rows(matrix: sparse.csr_matrix, positions: np.ndarray) -> tuple:
+    """Positions in ``data``/``indices`` of the given rows, and the row pointer of their submatrix"""
+    starts = matrix.indptr[positions]
+    lengths = matrix.indptr[np.asarray(positions) + 1] - starts
+    indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(matrix.indptr.dtype)
+    take = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+    return take, indptr
+
+
+def _dense_float32(values: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    expanded = values.astype(np.float32)
+    if scales is not None:
+        expanded *= scales[:, None]
+    return expanded
+
+
+def _row_scales(matrix: Matrix) -> np.ndarray:
+    """Per-row scale mapping each row's largest magnitude to 127"""
+    if sparse.issparse(matrix):
+        lengths = _row_lengths(matrix)
+        peaks = np.zeros(matrix.shape[0], dtype=np.float64)
+        nonempty = lengths > 0
+        if nonempty.any():
+            # Empty rows hold no data, so each segment runs exactly over one non-empty row
+            peaks[nonempty] = np.maximum.reduceat(np.abs(matrix.data), matrix.indptr[:-1][nonempty])
+    else:
+        peaks = np.abs(matrix).max(axis=1) if matrix.shape[1] else np.zeros(matrix.shape[0])
+    return (peaks / 127).astype(np.float32)
+
+
+class ItemVectors:
+    """Item vectors of one category, stored compactly and expanded to float32 for scoring
+
+    Sparse TF-IDF rows keep their sparsity pattern and only store smaller
+    values; dense rows (after a TruncatedSVD projection) are scored with
+    float32 BLAS products a block of rows at a time. ``int8`` stores each
+    row as ``round(v / scale)`` with one float32 scale per row, so every
+    row keeps its full int8 range. ``float64`` keeps the vectors exactly
+    as given and scores them in float64.
+    """
+
+    def __init__(self, values: Matrix, scales: Optional[np.ndarray] = None):
+        self.values = values
+        self.scales = scales
+
+    @classmethod
+    def compress(cls, matrix: Matrix, dtype: str = "float64") -> "ItemVectors":
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Invalid vector dtype. Available: {list(VECTOR_DTYPES)}")
+        if dtype == "float64":
+            return cls(matrix)
+
+        scales = None
+        if sparse.issparse(matrix):
+            matrix = sparse.csr_matrix(matrix)
+            data = matrix.data
+            if dtype == "int8":
+                scales = _row_scales(matrix)
+                row_scales = np.repeat(scales, _row_lengths(matrix)).astype(np.float64)
+                data = np.divide(data, row_scales, out=np.zeros_like(data), where=row_scales > 0)
+                data = np.rint(data)
+            values = sparse.csr_matrix(
+                (data.astype(dtype), matrix.indices, matrix.indptr), shape=matrix.shape
+            )
+        else:
+            values = np.asarray(matrix)
+            if dtype == "int8":
+                scales = _row_scales(values)
+                divisors = scales.astype(np.float64)[:, None]
+                values = np.rint(np.divide(values, divisors, out=np.zeros_like(values), where=divisors > 0))
+            values = values.astype(dtype)
+        return cls(values, scales)
+
+    @staticmethod
+    def stack(parts: Sequence["ItemVectors"]) -> "ItemVectors":
+        """Rows of several vector sets of the same storage type, one after the other"""
+        scales = None
+        if parts[0].scales is not None:
+            scales = np.concatenate([part.scales for part in parts])
+        if not sparse.issparse(parts[0].values):
+            return ItemVectors(np.concatenate([part.values for part in parts]), scales)
+
+        # Built from the raw arrays, as scipy cannot stack float16 matrices
+        indptr = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for part in parts:
+            indptr.append(part.values.indptr[1:].astype(np.int64) + base)
+            base += part.values.nnz
+        values = sparse.csr_matrix(
+            (
+                np.concatenate([part.values.data for part in parts]),
+                np.concatenate([part.values.indices for part in parts]),
+                np.concatenate(indptr),
+            ),
+            shape=(sum(len(part) for part in parts), parts[0].values.shape[1])
+        )
+        return ItemVectors(values, scales)
+
+    def take(self, positions: np.ndarray) -> "ItemVectors":
+        """Vectors of the rows at the given positions, in that order, in the same storage type"""
+        scales = self.scales[positions] if self.scales is not None else None
+        if not sparse.issparse(self.values):
+            return ItemVectors(self.values[positions], scales)
+        take, indptr = _take_rows(self.values, positions)
+        values = sparse.csr_matrix(
+            (self.values.data[take], self.values.indices[take], indptr), shape=(len(positions), self.values.shape[1])
+        )
+        return ItemVectors(values, scales)
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        if sparse.issparse(self.values):
+            size = self.values.data.nbytes + self.values.indices.nbytes + self.values.indptr.nbytes
+        else:
+            size = self.values.nbytes
+        return size + (self.scales.nbytes if self.scales is not None else 0)
+
+    def expanded(self, positions: Optional[np.ndarray] = None) -> Matrix:
+        """Rows (all, or the given positions) in the type they are scored in"""
+        if self.values.dtype == np.float64:
+            return self.values if positions is None else self.values[positions]
+        scales = None
+        if self.scales is not None:
+            scales = self.scales if positions is None else self.scales[positions]
+
+        if sparse.issparse(self.values):
+            # scipy cannot index float16 matrices, so rows are gathered from the raw arrays
+            data, indices, indptr = self.values.data, self.values.indices, self.values.indptr
+            if positions is not None:
+                take, indptr = _take_rows(self.values, positions)
+                data, indices = data[take], indices[take]
+            data = data.astype(np.float32)
+            if scales is not None:
+                data *= np.repeat(scales, np.diff(indptr))
+            return sparse.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, self.values.shape[1]))
+        return _dense_float32(self.values if positions is None else self.values[positions], scales)
+
+    def similarities(self, queries: Matrix, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """Dot products of each query row with every item (or the given positions), as a dense array"""
+        if sparse.issparse(self.values):
+            return (queries @ self.expanded(positions).T).toarray()
+
+        if self.values.dtype == np.float64:
+            return queries @ self.expanded(positions).T
+
+        # Only one block of rows is expanded to float32 at a time
+        n_items = len(self) if positions is None else len(positions)
+        result = np.empty((queries.shape[0], n_items), dtype=np.float32)
+        for start in range(0, n_items, BLOCK_ROWS):
+            block = slice(start, min(start + BLOCK_ROWS, n_items))
+            rows = block if positions is None else positions[block]
+            scales = self.scales[rows] if self.scales is not None else None
+            result[:, block] = queries @ _dense_float32(self.values[rows], scales).T
+        return result
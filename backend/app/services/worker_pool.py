@@ -0,0 +1,132 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+POOL_KINDS = ("thread", "process")
+
+# Service instance owned by each process-pool worker
+_worker_service = None
+
+
+class PoolSaturatedError(Exception):
+    """Raised when every worker is busy and the pending queue is full"""
+
+
+class PoolTimeoutError(Exception):
+    """Raised when a submitted call does not finish within the per-request timeout"""
+
+
+def _init_worker(service_factory: Callable[[], Any]):
+    global _worker_service
+    _worker_service = service_factory()
+
+
+def _call_worker_service(method: str, kwargs: dict):
+    """Result of a service call, and the worker's metrics recorded since its previous call"""
+    result = getattr(_worker_service, method)(**kwargs)
+    return result, _worker_service.metrics.drain()
+
+
+class WorkerPool:
+    """Bounded thread or process pool for CPU-bound service calls
+
+    At most ``max_workers`` calls run at once and at most ``max_pending``
+    more wait in the queue; further submissions fail fast with
+    PoolSaturatedError. Callers await results with a per-call timeout so the
+    event loop is never blocked by scoring.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, max_pending: int = 64,
+                 timeout: Optional[float] = 10.0, service_factory: Optional[Callable[[], Any]] = None):
+        if kind not in POOL_KINDS:
+            raise ValueError(f"Invalid pool kind. Available: {list(POOL_KINDS)}")
+        if kind == "process" and service_factory is None:
+            raise ValueError("A service_factory is required for a process pool")
+
+        self.kind = kind
+        self.service_factory = service_factory
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        """Create the executor on first use so a shut-down pool can be reused"""
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, initializer=_init_worker, initargs=(self.service_factory,)
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="recommender")
+            return self._executor
+
+    @property
+    def in_flight(self) -> int:
+        """Calls currently running or queued"""
+        return self._in_flight
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturatedError(
+                f"All {self.max_workers} workers busy and {self.max_pending} requests queued"
+            )
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            if self.kind == "thread":
+                # Carry context variables (such as the request's stage timings) into the worker thread
+                future = self._get_executor().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+            else:
+                future = self._get_executor().submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        # The slot is held until the work itself finishes, even if the caller gives up
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise PoolTimeoutError(f"Request did not complete within {self.timeout}s")
+
+    async def call_service(self, service: Any, method: str, **kwargs):
+        """Call a RecommenderService method on the pool
+
+        Thread pools call the shared in-process service; process pools call
+        the service instance built by each worker's initializer, and merge
+        the metrics it recorded into ``service.metrics``, so /metrics counts
+        the work of every process.
+        """
+        if self.kind == "process":
+            result, drained = await self.run(_call_worker_service, method, kwargs)
+            if service is not None:
+                service.metrics.merge(drained)
+            return result
+        return await self.run(getattr(service, method), **kwargs)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1 @@
+"""Performance benchmarks for the recommender service, run from the backend directory"""
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+import os
+import platform
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx is only needed to replay logs, not to serve them
+    httpx = None
+
+from app.services.request_log import read_request_log
+from .run import compare, git_commit, percentiles
+from .synthetic import sample_queries
+
+# Replays are compared on these metrics; for all of them lower is better except throughput
+REPLAY_METRICS = [
+    ("throughput_rps", "req/s", True),
+    ("latency_ms.p50", "p50 ms", False),
+    ("latency_ms.p95", "p95 ms", False),
+    ("latency_ms.p99", "p99 ms", False),
+    ("error_rate", "error rate", False),
+]
+
+# Lookup counters of /metrics whose hit ratio is reported, by the name it is reported under
+LOOKUP_COUNTERS = {
+    "result_cache": "recommender_cache_lookups_total",
+    "preference_cache": "recommender_preference_cache_lookups_total",
+    "tables": "recommender_table_lookups_total",
+}
+
+_LOOKUP_SAMPLE = re.compile(r'^(\w+)\{result="(\w+)"\} (\S+)$', re.MULTILINE)
+
+
+def write_sample_log(path: str, n_requests: int, seed: int = 0, rate: float = 50.0):
+    """Write a request log of seeded synthetic /recommend requests arriving ``rate`` times a second"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for position, query in enumerate(sample_queries(n_requests, seed)):
+            f.write(json.dumps({
+                "request_id": f"sample-{position:06d}",
+                "time": position / rate,
+                "method": "POST",
+                "path": "/recommend",
+                "body": query,
+            }) + "\n")
+
+
+def lookup_counts(metrics_text: str) -> Dict[str, Dict[str, float]]:
+    """Hit and miss counts of every ``{result=...}`` counter in a /metrics page"""
+    counts: Dict[str, Dict[str, float]] = {}
+    for name, result, value in _LOOKUP_SAMPLE.findall(metrics_text):
+        counts.setdefault(name, {})[result] = float(value)
+    return counts
+
+
+def hit_ratios(before: Dict[str, Dict[str, float]], after: Dict[str, Dict[str, float]]) -> Dict[str, Optional[float]]:
+    """Hit ratio of each lookup counter over a replay, None when it saw no lookups"""
+    ratios = {}
+    for label, name in LOOKUP_COUNTERS.items():
+        delta = {
+            result: after.get(name, {}).get(result, 0.0) - before.get(name, {}).get(result, 0.0)
+            for result in ("hit", "miss")
+        }
+        total = delta["hit"] + delta["miss"]
+        ratios[label] = delta["hit"] / total if total else None
+    return ratios
+
+
+async def replay(client, entries: List[Dict[str, Any]], concurrency: int = 8, rate: Optional[float] = None,
+                 speed: Optional[float] = None) -> Tuple[List[Dict[str, Any]], float]:
+    """Send logged requests, returning one sample per request and the seconds the replay took
+
+    Without ``rate`` or ``speed`` the replay is closed-loop: ``concurrency``
+    requests are kept in flight. With ``rate`` requests are due at a fixed
+    rate per second, and with ``speed`` at their recorded arrival times,
+    sped up by that factor. Paced requests wait for a free slot when
+    ``concurrency`` are already in flight, and their latency is measured
+    from when they were due, so a server falling behind shows up in it.
+    """
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    first_time = entries[0].get("time", 0.0) if entries else 0.0
+    samples: List[Dict[str, Any]] = [{} for _ in entries]
+    start = loop.time()
+
+    async def send(position: int, entry: Dict[str, Any]):
+        due = None
+        if rate:
+            due = start + position / rate
+        elif speed:
+            due = start + (entry.get("time", first_time) - first_time) / speed
+        if due is not None:
+            await asyncio.sleep(max(0.0, due - loop.time()))
+
+        async with slots:
+            began = loop.time() if due is None else due
+            body = entry.get("body")
+            if isinstance(body, (dict, list)):
+                content = {"json": body}
+            else:
+                content = {"content": body or "", "headers": {"Content-Type": "application/json"}}
+            try:
+                response = await client.request(entry.get("method", "POST"), entry["path"], **content)
+                status, error = response.status_code, None
+            except httpx.HTTPError as e:
+                status, error = None, type(e).__name__
+            samples[position] = {"latency_ms": (loop.time() - began) * 1000, "status": status, "error": error}
+
+    await asyncio.gather(*(send(position, entry) for position, entry in enumerate(entries)))
+    return samples, loop.time() - start
+
+
+def summarize(samples: List[Dict[str, Any]], elapsed: float,
+              lookups: Optional[Dict[str, Optional[float]]] = None) -> Dict[str, Any]:
+    """Throughput, latency percentiles, errors by status and hit ratios of one replay"""
+    errors = Counter(
+        sample["error"] if sample["status"] is None else str(sample["status"])
+        for sample in samples if sample["status"] is None or sample["status"] >= 400
+    )
+    return {
+        "requests": len(samples),
+        "duration_s": elapsed,
+        "throughput_rps": len(samples) / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": percentiles([sample["latency_ms"] for sample in samples if sample["status"] is not None]),
+        "errors": dict(errors),
+        "error_rate": sum(errors.values()) / len(samples) if samples else 0.0,
+        "hit_ratio": lookups or {},
+    }
+
+
+async def run_replay(client, entries: List[Dict[str, Any]], concurrency: int = 8, rate: Optional[float] = None,
+                     speed: Optional[float] = None, warmup: int = 0) -> Dict[str, Any]:
+    """Replay a log through a client: the first ``warmup`` entries unmeasured, then the rest"""
+    async with client:
+        if warmup:
+            await replay(client, entries[:warmup], concurrency)
+        before = lookup_counts((await client.get("/metrics")).text)
+        samples, elapsed = await replay(client, entries[warmup:], concurrency, rate, speed)
+        after = lookup_counts((await client.get("/metrics")).text)
+    return summarize(samples, elapsed, hit_ratios(before, after))
+
+
+def in_process_client(timeout: float):
+    """Client calling the FastAPI app directly, with every category indexed as the startup warm-up would"""
+    from app.main import app, recommender_service
+
+    # Per-request INFO logs would dominate the timings
+    logging.getLogger("app.main").setLevel(logging.WARNING)
+    if recommender_service is not None:
+        recommender_service.load_all()
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay", timeout=timeout)
+
+
+def main():
+    """Replay a request log against the API and report throughput, latency, errors and cache hit ratios
+
+    Usage, from the backend directory::
+
+        python -m benchmarks.replay requests.jsonl --concurrency 16
+        python -m benchmarks.replay requests.jsonl --url http://localhost:8000 --rate 200
+        python -m benchmarks.replay sample.jsonl --sample 2000 --compare baseline_replay.json
+
+    Record a log from a running server with ``RECOMMENDER_REQUEST_LOG``.
+    Without ``--url`` the app is served in this process, configured from
+    the same RECOMMENDER_* environment variables as the server.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a recorded request log against the recommender API")
+    parser.add_argument("log", help="JSON Lines request log to replay")
+    parser.add_argument("--url", default=None, help="Server to replay against; the app runs in-process when omitted")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--rate", type=float, default=None, help="Send requests at this fixed rate per second")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="Send requests at their recorded arrival times, sped up by this factor")
+    parser.add_argument("--warmup", type=int, default=0, help="Leading requests sent before measuring")
+    parser.add_argument("--limit", type=int, default=None, help="Replay at most this many requests")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before a request counts as failed")
+    parser.add_argument("--sample", type=int, default=None,
+                        help="First write this many synthetic requests to the log")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for --sample requests")
+    parser.add_argument("--output", default="replay_results.json", help="JSON results file to write")
+    parser.add_argument("--compare", default=None, help="Earlier results file to diff against")
+    args = parser.parse_args()
+
+    if httpx is None:
+        parser.error("Replaying needs httpx: pip install httpx")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if args.rate and args.speed:
+        parser.error("Use either --rate or --speed, not both")
+
+    if args.sample:
+        write_sample_log(args.log, args.sample, args.seed)
+    entries = list(read_request_log(args.log))
+    if args.limit is not None:
+        entries = entries[:args.warmup + args.limit]
+    if len(entries) <= args.warmup:
+        parser.error(f"{args.log} has no requests left to measure after --warmup")
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        client = in_process_client(args.timeout)
+    result = asyncio.run(run_replay(client, entries, args.concurrency, args.rate, args.speed, args.warmup))
+
+    latency = result["latency_ms"]
+    ratios = ", ".join(
+        f"{label} {ratio:.1%}" for label, ratio in result["hit_ratio"].items() if ratio is not None
+    )
+    print(f"{result['requests']} requests in {result['duration_s']:.2f}s: {result['throughput_rps']:.1f} req/s, "
+          f"p50/p95/p99 {latency['p50']:.2f}/{latency['p95']:.2f}/{latency['p99']:.2f} ms, "
+          f"errors {result['error_rate']:.2%} {result['errors'] or ''}".rstrip())
+    print(f"Hit ratios: {ratios or 'no lookups'}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": {"replay": result},
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print("\n".join(compare(json.load(f), report, REPLAY_METRICS)))
+
+
+if __name__ == "__main__":
+    main()
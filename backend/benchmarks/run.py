@@ -0,0 +1,280 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows has no getrusage; peak RSS is then not reported
+    resource = None
+
+from app.models.recommendation import RecommendationRequest
+from app.services.recommender import RecommenderService
+from .synthetic import SIZES, sample_queries, write_catalogs
+
+# Results are compared on these metrics; for all of them lower is better except throughput
+COMPARED_METRICS = [
+    ("build_s", "build s", False),
+    ("query_ms.p50", "p50 ms", False),
+    ("query_ms.p95", "p95 ms", False),
+    ("query_ms.p99", "p99 ms", False),
+    ("json_ms.p50", "json p50 ms", False),
+    ("batch_rps", "batch req/s", True),
+    ("peak_rss_mb", "peak RSS MB", False),
+]
+
+
+def parse_size(value: str) -> int:
+    """Items per category from a label such as ``100k`` or a plain number"""
+    if value.lower() in SIZES:
+        return SIZES[value.lower()]
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid size '{value}'. Use a number or one of {list(SIZES)}")
+
+
+def size_label(n_items: int) -> str:
+    for label, size in SIZES.items():
+        if size == n_items:
+            return label
+    return str(n_items)
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    if not samples_ms:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    samples = np.asarray(samples_ms)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99),
+            "mean": float(samples.mean()), "max": float(samples.max())}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def index_bytes(service: RecommenderService) -> int:
+    """Approximate memory held by the catalogs and their main indexes"""
+    total = 0
+    for index in service.categories.values():
+        matrix = index.store.tfidf_matrix
+        total += index.catalog.nbytes + index.neighbor_index.nbytes
+        total += matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        if index.ann_index is not None:
+            total += index.ann_index.nbytes
+    return total
+
+
+def run_size(data_dir: str, n_items: int, n_queries: int, batch_size: int, neighbor_k: int,
+             retrieval: str, seed: int, time_budget: float, build_workers: int = 1) -> Dict[str, Any]:
+    """Benchmark one catalog size; meant to run in a fresh process so peak RSS is its own
+
+    The latency and throughput phases each stop once they have run for
+    ``time_budget`` seconds, so large catalogs report on fewer requests
+    rather than running for hours.
+    """
+    rss_start = peak_rss_mb()
+
+    # Startup: build every category's index from the data files, with caching off
+    service = RecommenderService(neighbor_k=neighbor_k, cache_size=0, lazy=True,
+                                 retrieval=retrieval, data_dir=data_dir, build_workers=build_workers)
+    start = time.perf_counter()
+    service.load_all()
+    build_s = time.perf_counter() - start
+    rss_after_build = peak_rss_mb()
+
+    queries = sample_queries(n_queries, seed)
+    for query in queries[:min(10, len(queries))]:
+        service.get_recommendations(**query)
+
+    # Single-query latency
+    latencies_ms = []
+    empty = 0
+    phase_start = time.perf_counter()
+    for query in queries:
+        start = time.perf_counter()
+        recommendations = service.get_recommendations(**query)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        empty += not recommendations
+        if time.perf_counter() - phase_start > time_budget:
+            break
+
+    # The same queries answered as pre-encoded response JSON, as the API serves them
+    json_ms = []
+    phase_start = time.perf_counter()
+    for query in queries[:len(latencies_ms)]:
+        start = time.perf_counter()
+        service.get_recommendations_json(**query)
+        json_ms.append((time.perf_counter() - start) * 1000)
+        if time.perf_counter() - phase_start > time_budget:
+            break
+
+    # Batch throughput
+    requests = [RecommendationRequest(**query) for query in queries]
+    batched = 0
+    start = time.perf_counter()
+    for offset in range(0, len(requests), batch_size):
+        batch = requests[offset:offset + batch_size]
+        service.get_recommendations_batch(batch)
+        batched += len(batch)
+        if time.perf_counter() - start > time_budget:
+            break
+    batch_elapsed = time.perf_counter() - start
+
+    return {
+        "n_items": n_items,
+        "neighbor_k": neighbor_k,
+        "retrieval": retrieval,
+        "build_workers": build_workers,
+        "build_s": build_s,
+        "build_s_by_category": {
+            category: sum(timings.values()) for category, timings in service.build_timings.items()
+        },
+        "build_stages_s": service.build_timings,
+        "index_mb": index_bytes(service) / (1024 * 1024),
+        "queries": len(latencies_ms),
+        "empty_results": empty,
+        "query_ms": percentiles(latencies_ms),
+        "json_ms": percentiles(json_ms),
+        "batch_size": batch_size,
+        "batch_requests": batched,
+        "batch_rps": batched / batch_elapsed if batch_elapsed > 0 else 0.0,
+        "rss_start_mb": rss_start,
+        "rss_after_build_mb": rss_after_build,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metric(result: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = result
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            compared_metrics: List[tuple] = COMPARED_METRICS) -> List[str]:
+    """Table of relative changes between two results files, one line per size and metric
+
+    Changes are signed so that positive always means worse.
+    """
+    lines = [f"{'size':<6} {'metric':<12} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for label, result in current["results"].items():
+        base_result = baseline["results"].get(label)
+        if base_result is None:
+            continue
+        for path, name, higher_is_better in compared_metrics:
+            before, after = metric(base_result, path), metric(result, path)
+            if before is None or after is None:
+                continue
+            worse_by = before - after if higher_is_better else after - before
+            change = worse_by / before * 100 if before else 0.0
+            lines.append(f"{label:<6} {name:<12} {before:>10.2f} {after:>10.2f} {change:>+7.1f}%")
+    return lines
+
+
+def main():
+    """Run the benchmark suite and write a JSON results file
+
+    Usage, from the backend directory::
+
+        python -m benchmarks.run --sizes 1k 100k 1m --output results.json
+        python -m benchmarks.run --sizes 1k --compare baseline.json
+
+    Each size runs in a fresh process so peak memory is measured per size.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark index build, query latency, throughput and memory")
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), help="Items per category: 1k, 100k, 1m or a number")
+    parser.add_argument("--queries", type=int, default=500, help="Requests timed per size")
+    parser.add_argument("--batch-size", type=int, default=100, help="Requests per batch call")
+    parser.add_argument("--time-budget", type=float, default=120.0,
+                        help="Seconds after which the latency and throughput phases stop early")
+    parser.add_argument("--neighbor-k", type=int, default=20, help="Neighbors kept per item")
+    parser.add_argument("--max-neighbor-items", type=int, default=SIZES["100k"],
+                        help="Skip the all-pairs neighbor index above this many items per category")
+    parser.add_argument("--retrieval", default="exact", help="Preference matching: exact or lsh")
+    parser.add_argument("--build-workers", type=int, default=os.cpu_count() or 1,
+                        help="Categories built at once in worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for catalogs and queries")
+    parser.add_argument("--data-dir", default=os.path.join("benchmarks", "data"),
+                        help="Where generated catalogs are kept between runs")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file to write")
+    parser.add_argument("--compare", default=None, help="Earlier results file to diff against")
+    args = parser.parse_args()
+
+    try:
+        sizes = [parse_size(size) for size in args.sizes]
+    except ValueError as e:
+        parser.error(str(e))
+
+    results: Dict[str, Any] = {}
+    for n_items in sizes:
+        label = size_label(n_items)
+        data_dir = os.path.join(args.data_dir, f"{label}-seed{args.seed}")
+        start = time.perf_counter()
+        write_catalogs(data_dir, n_items, args.seed)
+        print(f"[{label}] catalogs ready in {time.perf_counter() - start:.1f}s ({data_dir})")
+
+        neighbor_k = args.neighbor_k if n_items <= args.max_neighbor_items else 0
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            result = pool.submit(
+                run_size, data_dir, n_items, args.queries, args.batch_size, neighbor_k, args.retrieval, args.seed,
+                args.time_budget, args.build_workers
+            ).result()
+        results[label] = result
+
+        latency = result["query_ms"]
+        print(f"[{label}] build {result['build_s']:.2f}s, "
+              f"query p50/p95/p99 {latency['p50']:.2f}/{latency['p95']:.2f}/{latency['p99']:.2f} ms, "
+              f"batch {result['batch_rps']:.0f} req/s, peak RSS {result['peak_rss_mb'] or 0:.0f} MB")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print("\n".join(compare(json.load(f), report)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+from typing import Any, Dict, Iterator, List
+
+from app.services.recommender import DATA_FILES
+
+# Bump whenever generated items change, so cached catalogs are regenerated
+GENERATOR_VERSION = 1
+
+# Catalog sizes the benchmark suite runs at by default
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# Words shared by every category, so cross-category token overlap behaves like real data
+ADJECTIVES = [
+    "lost", "dark", "silent", "golden", "broken", "hidden", "last", "wild", "little", "secret",
+    "endless", "burning", "frozen", "crimson", "electric", "forgotten", "midnight", "ancient",
+    "quiet", "bright", "hollow", "savage", "gentle", "restless", "distant", "falling", "rising",
+    "iron", "paper", "velvet", "neon", "lonely", "perfect", "strange", "final", "first", "brave",
+    "cold", "sweet", "shadow", "silver", "empty", "haunted", "infinite", "sacred", "stolen",
+]
+NOUNS = [
+    "kingdom", "heart", "river", "city", "dream", "night", "star", "road", "garden", "empire",
+    "ocean", "storm", "mountain", "shadow", "fire", "sky", "island", "forest", "light", "world",
+    "house", "war", "game", "song", "legend", "journey", "machine", "winter", "summer", "moon",
+    "sun", "crown", "door", "mirror", "bridge", "ghost", "hunter", "queen", "king", "child",
+    "soldier", "stranger", "planet", "signal", "desert", "harbor", "tower", "memory", "promise",
+    "secret", "valley", "frontier", "horizon", "voyage", "dragon", "knight", "witch", "detective",
+]
+THEMES = [
+    "love", "loss", "revenge", "friendship", "survival", "betrayal", "redemption", "freedom",
+    "identity", "power", "family", "ambition", "courage", "grief", "hope", "memory", "justice",
+    "coming of age", "the end of the world", "a family secret", "an unlikely friendship",
+]
+
+# Genres and genre flavour words per category
+GENRES: Dict[str, Dict[str, List[str]]] = {
+    "books": {
+        "Fantasy": ["magic", "quest", "dragons", "wizard", "epic"],
+        "Sci-Fi": ["space", "future", "dystopian", "robots", "alien"],
+        "Mystery": ["murder", "detective", "clues", "investigation", "whodunit"],
+        "Romance": ["love", "romantic", "passion", "heartwarming", "relationship"],
+        "Thriller": ["suspense", "conspiracy", "chase", "danger", "twist"],
+        "Historical": ["history", "war", "period", "empire", "century"],
+        "Horror": ["terror", "haunted", "creepy", "nightmare", "supernatural"],
+        "Biography": ["life", "true", "memoir", "inspiring", "story"],
+        "Drama": ["family", "classic", "literary", "emotional", "novel"],
+        "Young Adult": ["teen", "school", "coming-of-age", "friendship", "adventure"],
+    },
+    "movies": {
+        "Action": ["explosive", "fight", "heist", "chase", "hero"],
+        "Comedy": ["funny", "hilarious", "satire", "comedy", "quirky"],
+        "Drama": ["emotional", "family", "powerful", "character", "story"],
+        "Sci-Fi": ["space", "future", "alien", "time", "technology"],
+        "Horror": ["terror", "haunted", "slasher", "creepy", "supernatural"],
+        "Animation": ["animated", "family", "colorful", "magical", "adventure"],
+        "Thriller": ["suspense", "psychological", "twist", "crime", "conspiracy"],
+        "Romance": ["love", "romantic", "wedding", "relationship", "heartfelt"],
+        "Documentary": ["true", "real", "investigation", "nature", "history"],
+        "Fantasy": ["magic", "quest", "epic", "dragons", "kingdom"],
+    },
+    "songs": {
+        "Rock": ["guitar", "anthem", "loud", "riff", "band"],
+        "Pop": ["catchy", "dance", "chart", "upbeat", "hit"],
+        "Hip-Hop": ["rap", "beats", "flow", "street", "verse"],
+        "Jazz": ["smooth", "saxophone", "swing", "improvised", "trumpet"],
+        "Country": ["acoustic", "heartland", "truck", "southern", "ballad"],
+        "Electronic": ["synth", "club", "bass", "dance", "ambient"],
+        "R&B": ["soul", "smooth", "groove", "love", "vocal"],
+        "Folk": ["acoustic", "storytelling", "banjo", "traditional", "ballad"],
+        "Classical": ["orchestral", "symphony", "piano", "concerto", "strings"],
+        "Metal": ["heavy", "distorted", "aggressive", "riff", "drums"],
+    },
+    "games": {
+        "RPG": ["quest", "leveling", "party", "story", "fantasy"],
+        "Adventure": ["exploration", "puzzle", "story", "journey", "world"],
+        "Puzzle": ["logic", "brain", "relaxing", "levels", "clever"],
+        "Platformer": ["jumping", "levels", "retro", "precise", "collectibles"],
+        "Shooter": ["guns", "multiplayer", "competitive", "combat", "squad"],
+        "Strategy": ["tactics", "empire", "resources", "turn-based", "war"],
+        "Sandbox": ["building", "crafting", "open", "creative", "survival"],
+        "Sports": ["football", "league", "team", "season", "competitive"],
+        "Racing": ["cars", "speed", "tracks", "drift", "arcade"],
+        "Simulation": ["management", "life", "city", "farming", "realistic"],
+    },
+}
+
+# Release years and rating scale per category
+YEARS = {"books": (1800, 2024), "movies": (1930, 2024), "songs": (1955, 2024), "games": (1980, 2024)}
+MAX_RATING = {"books": 5.0, "movies": 10.0, "songs": 5.0, "games": 10.0}
+
+DESCRIPTION_NOUNS = {"books": "novel", "movies": "film", "songs": "track", "games": "game"}
+
+
+def _zipf_weights(n: int, exponent: float = 1.1) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def generate_items(category: str, n_items: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield ``n_items`` synthetic items of a category, deterministically for a given seed
+
+    Title words, genres and description words follow Zipf-like frequencies,
+    so a few words are very common and most are rare, as in real catalogs.
+    """
+    if category not in GENRES:
+        raise ValueError(f"Invalid category. Available: {list(GENRES)}")
+
+    rng = np.random.default_rng([seed, list(GENRES).index(category)])
+    genres = list(GENRES[category])
+    first_year, last_year = YEARS[category]
+    noun = DESCRIPTION_NOUNS[category]
+
+    # Draw every random column up front in blocks, then format rows one at a time
+    block = 10_000
+    for start in range(0, n_items, block):
+        size = min(block, n_items - start)
+        adjectives = rng.choice(len(ADJECTIVES), size=(size, 2), p=_zipf_weights(len(ADJECTIVES)))
+        nouns = rng.choice(len(NOUNS), size=(size, 2), p=_zipf_weights(len(NOUNS)))
+        patterns = rng.integers(0, 5, size=size)
+        genre_ids = rng.choice(len(genres), size=size, p=_zipf_weights(len(genres), 0.8))
+        flavours = rng.integers(0, 5, size=(size, 2))
+        themes = rng.integers(0, len(THEMES), size=size)
+        years = rng.integers(first_year, last_year + 1, size=size)
+        ratings = np.round(np.clip(rng.normal(0.75, 0.12, size=size), 0.2, 1.0) * MAX_RATING[category], 1)
+        missing = rng.random(size=(size, 3)) < 0.02
+
+        for row in range(size):
+            adjective, other_adjective = ADJECTIVES[adjectives[row, 0]], ADJECTIVES[adjectives[row, 1]]
+            if other_adjective == adjective:
+                other_adjective = "new"
+            first, second = NOUNS[nouns[row, 0]], NOUNS[nouns[row, 1]]
+            title = [
+                f"The {adjective} {first}",
+                f"{first} of the {second}",
+                f"{adjective} {first} {row % 9 + 2}",
+                f"{adjective} {other_adjective} {second}",
+                f"A {first} in the {adjective} {second}",
+            ][patterns[row]].title()
+
+            genre = genres[genre_ids[row]]
+            words = GENRES[category][genre]
+            description = (
+                f"{words[flavours[row, 0]].capitalize()} {genre.lower()} {noun} about "
+                f"{THEMES[themes[row]]}, {words[flavours[row, 1]]} and a {adjective} {second}"
+            )
+
+            yield {
+                "id": f"{category[:-1]}_{start + row + 1}",
+                "title": title,
+                "genre": genre,
+                "year": None if missing[row, 0] else int(years[row]),
+                "rating": None if missing[row, 1] else float(ratings[row]),
+                "description": None if missing[row, 2] else description,
+            }
+
+
+def write_catalogs(directory: str, n_items: int, seed: int = 0) -> Dict[str, str]:
+    """Write one ``<category>.jsonl`` file per category, skipping files already generated
+
+    A ``manifest.json`` records the size, seed and generator version, so a
+    directory is reused only when it holds exactly the requested catalogs.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, "manifest.json")
+    manifest = {"n_items": n_items, "seed": seed, "version": GENERATOR_VERSION}
+
+    paths = {
+        category: os.path.join(directory, os.path.splitext(os.path.basename(file_path))[0] + ".jsonl")
+        for category, file_path in DATA_FILES.items()
+    }
+    if os.path.exists(manifest_path) and all(os.path.exists(path) for path in paths.values()):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            if json.load(f) == manifest:
+                return paths
+
+    for category, path in paths.items():
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            for item in generate_items(category, n_items, seed):
+                f.write(json.dumps(item))
+                f.write("\n")
+        os.replace(f"{path}.tmp", path)
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    return paths
+
+
+@contextmanager
+def temporary_catalogs(n_items: int, seed: int = 0) -> Iterator[str]:
+    """Temporary directory holding freshly written catalogs, removed on exit"""
+    with tempfile.TemporaryDirectory() as directory:
+        write_catalogs(directory, n_items, seed)
+        yield directory
+
+
+def sample_queries(n_queries: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Seeded mix of recommendation requests across every category pair
+
+    Preferences mix exact titles, single title words, genre names and
+    misspelled words, so every matching path of the service is exercised.
+    """
+    rng = np.random.default_rng([seed, 1 << 16])
+    categories = list(GENRES)
+    queries = []
+    for _ in range(n_queries):
+        source, target = rng.choice(len(categories), size=2, replace=False)
+        source_category = categories[source]
+
+        preferences = []
+        for kind in rng.integers(0, 4, size=rng.integers(1, 4)):
+            adjective = ADJECTIVES[rng.integers(len(ADJECTIVES))]
+            noun = NOUNS[rng.integers(len(NOUNS))]
+            if kind == 0:
+                preferences.append(f"The {adjective} {noun}".title())
+            elif kind == 1:
+                preferences.append(noun)
+            elif kind == 2:
+                preferences.append(list(GENRES[source_category])[rng.integers(len(GENRES[source_category]))])
+            else:
+                cut = rng.integers(1, len(noun))
+                preferences.append(noun[:cut] + noun[cut + 1:])
+
+        queries.append({
+            "source_category": source_category,
+            "target_category": categories[target],
+            "preferences": preferences,
+            "limit": 10,
+        })
+    return queries
+
+
+def main():
+    """Write synthetic catalogs for every category
+
+    Usage, from the backend directory::
+
+        python -m benchmarks.synthetic path/to/data --items 100000 --seed 0
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate synthetic recommender catalogs")
+    parser.add_argument("directory", help="Directory to write <category>.jsonl files to")
+    parser.add_argument("--items", type=int, default=SIZES["1k"], help="Items per category")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    for category, path in write_catalogs(args.directory, args.items, args.seed).items():
+        print(f"{category}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for the approximate nearest-neighbor (LSH) retrieval mode
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from backend.app.services.ann import RandomProjectionLSH, recall_at_k
+from backend.app.services.recommender import RecommenderService
+
+
+def clustered_matrix(n_items=4000, n_features=2000, n_clusters=40, seed=0):
+    """L2-normalized sparse rows drawn around a few sparse cluster centers"""
+    rng = np.random.default_rng(seed)
+    centers = sparse.random(n_clusters, n_features, density=0.01, random_state=seed, format='csr')
+    labels = rng.integers(0, n_clusters, n_items)
+    noise = sparse.random(n_items, n_features, density=0.002, random_state=seed + 1, format='csr')
+    return normalize(sparse.csr_matrix(centers[labels] + noise * 0.3))
+
+
+def test_lsh_recall_and_candidate_pruning():
+    """LSH must find most exact neighbors while scoring only a fraction of the catalog"""
+    print("🧪 Testing LSH recall on a clustered catalog...")
+
+    matrix = clustered_matrix()
+    index = RandomProjectionLSH.build(matrix, n_tables=8, n_probes=2)
+
+    report = recall_at_k(index, matrix[:200], k=10)
+    candidates = np.mean([len(index.candidates(matrix[row])) for row in range(200)])
+    print(f"bits={index.n_bits} recall@10={report['recall']:.3f} "
+          f"mean candidates={candidates:.0f}/{len(index)}")
+
+    assert report["recall"] >= 0.9
+    assert candidates < len(index) / 2
+
+    # More probes never lose candidates
+    assert set(index.candidates(matrix[0], n_probes=0)) <= set(index.candidates(matrix[0], n_probes=4))
+    print("✅ LSH recall and pruning working")
+
+
+def test_lsh_retrieval_mode_matches_exact_on_small_catalogs():
+    """On the bundled catalogs every probed bucket set covers the catalog, so matches are exact"""
+    print("\n🧪 Testing LSH retrieval mode against the exact path...")
+
+    exact = RecommenderService()
+    approximate = RecommenderService(retrieval="lsh")
+    assert set(approximate.ann_indexes) == {"books", "movies", "songs", "games"}
+
+    for category, store in exact.item_stores.items():
+        for preference in ["epic adventure", "dystopian fiction", "rock ballad", "puzzle", "xyzzy"]:
+            _, expected = exact._match_preference(preference, store)
+            _, actual = approximate._match_preference(
+                preference, approximate.item_stores[category], approximate.ann_indexes[category]
+            )
+            assert np.allclose(sorted(score for _, score in actual), sorted(score for _, score in expected))
+
+    recommendations = approximate.get_recommendations("books", "movies", ["epic adventure"], limit=5)
+    assert len(recommendations) == 5
+    print("✅ LSH retrieval mode working")
+
+
+def test_invalid_retrieval_mode():
+    """Unknown retrieval modes are rejected"""
+    print("\n🧪 Testing invalid retrieval mode...")
+
+    try:
+        RecommenderService(retrieval="faiss", lazy=True)
+        assert False, "Expected a ValueError"
+    except ValueError as e:
+        print(f"Rejected: {e}")
+
+    print("✅ Invalid retrieval mode rejected")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Approximate Retrieval")
+    print("=" * 50)
+
+    test_lsh_recall_and_candidate_pruning()
+    test_lsh_retrieval_mode_matches_exact_on_small_catalogs()
+    test_invalid_retrieval_mode()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for batch recommendations
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backend.app.services.recommender import RecommenderService
+from backend.app.models.recommendation import RecommendationRequest
+
+CATEGORIES = ["books", "movies", "songs", "games"]
+QUERIES = [["harry potter"], ["minecraft movie"], ["fantasy", "zelda"], ["xyzzy"]]
+
+
+def build_requests():
+    return [
+        RecommendationRequest(source_category=source, target_category=target, preferences=preferences, limit=5)
+        for source in CATEGORIES for target in CATEGORIES for preferences in QUERIES
+    ]
+
+
+def test_batch_matches_individual_requests():
+    """Grouped batch scoring must return exactly what single requests return"""
+    print("🧪 Comparing batch results with individual requests...")
+
+    for mode in ("token_overlap", "shared_space"):
+        batch_service = RecommenderService(cross_category_mode=mode, cache_size=0)
+        single_service = RecommenderService(cross_category_mode=mode, cache_size=0)
+
+        requests = build_requests()
+        results = batch_service.get_recommendations_batch(requests)
+        assert len(results) == len(requests)
+
+        for request, result in zip(requests, results):
+            expected = single_service.get_recommendations(
+                request.source_category, request.target_category, request.preferences, request.limit
+            )
+            assert result.error is None
+            assert result.response.recommendations == expected
+
+    print(f"✅ {len(requests)} batch results match individual requests")
+
+
+def test_batch_reports_per_item_errors():
+    """One invalid request must not fail the rest of the batch"""
+    print("\n🧪 Testing per-item batch errors...")
+
+    recommender = RecommenderService()
+    results = recommender.get_recommendations_batch([
+        RecommendationRequest(source_category="books", target_category="movies", preferences=["dune"]),
+        RecommendationRequest(source_category="invalid", target_category="movies", preferences=["dune"]),
+        RecommendationRequest(source_category="books", target_category="movies", preferences=["  "]),
+    ])
+
+    assert results[0].response is not None and results[0].error is None
+    assert results[1].response is None and "Invalid category" in results[1].error
+    assert results[2].response is None and "non-empty" in results[2].error
+    print(f"✅ Errors reported per item: {[result.error for result in results]}")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Batch Recommendations")
+    print("=" * 50)
+
+    test_batch_matches_individual_requests()
+    test_batch_reports_per_item_errors()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for the synthetic catalogs and the benchmark runner
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backend.benchmarks.synthetic import generate_items, sample_queries, write_catalogs
+from backend.benchmarks.run import compare, run_size
+
+
+def test_generator_is_seeded():
+    """The same seed must produce the same catalog, and a different seed a different one"""
+    print("🧪 Testing seeded catalog generation...")
+
+    first = list(generate_items("movies", 500, seed=3))
+    again = list(generate_items("movies", 500, seed=3))
+    other = list(generate_items("movies", 500, seed=4))
+
+    assert first == again
+    assert first != other
+    assert len({item["id"] for item in first}) == 500
+    assert len({item["genre"] for item in first}) > 5
+    assert all(item["title"] and set(item) == {"id", "title", "genre", "year", "rating", "description"}
+               for item in first)
+    print(f"Sample: {first[0]}")
+    print("✅ Generation is deterministic")
+
+
+def test_benchmark_small_catalog():
+    """A tiny run must report every metric and diff against itself as unchanged"""
+    print("\n🧪 Testing benchmark run on a small catalog...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_catalogs(tmp, 300, seed=1)
+        assert sorted(paths) == ["books", "games", "movies", "songs"]
+        result = run_size(tmp, 300, n_queries=30, batch_size=10, neighbor_k=5,
+                          retrieval="exact", seed=1, time_budget=60.0)
+
+    assert result["queries"] == 30 and result["batch_requests"] == 30
+    assert set(result["query_ms"]) == {"p50", "p95", "p99", "mean", "max"}
+    assert result["query_ms"]["p50"] <= result["query_ms"]["p99"]
+    assert set(result["json_ms"]) == set(result["query_ms"])
+    assert result["empty_results"] < 30
+    assert result["build_s"] > 0 and result["batch_rps"] > 0
+    print(f"p50 {result['query_ms']['p50']:.2f} ms, batch {result['batch_rps']:.0f} req/s")
+
+    report = {"results": {"300": result}}
+    lines = compare(report, report)
+    assert len(lines) > 1 and all(line.endswith("+0.0%") for line in lines[1:])
+    assert len(sample_queries(20, seed=1)) == 20
+    print("✅ Benchmark metrics reported")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Benchmarks")
+    print("=" * 50)
+
+    test_generator_is_seeded()
+    test_benchmark_small_catalog()
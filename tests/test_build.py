@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the parallel category build and its stage timings
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backend.app.services import recommender
+from backend.app.services.recommender import RecommenderService
+from backend.app.services.build import BUILD_STAGES
+from backend.benchmarks.synthetic import temporary_catalogs
+
+QUERIES = [
+    ("books", "movies", ["dragon"]),
+    ("games", "songs", ["night river"]),
+    ("movies", "books", ["The Lost Kingdom", "space"]),
+]
+
+
+def parallel_service(data_dir, **kwargs) -> RecommenderService:
+    """Service that builds every category in worker processes, however small"""
+    service = RecommenderService(data_dir=data_dir, lazy=True, build_workers=2, **kwargs)
+    service.parallel_build_min_items = 0
+    return service
+
+
+def test_parallel_build_matches_sequential():
+    """Categories built in worker processes serve the same recommendations"""
+    print("🧪 Testing the parallel build...")
+
+    with temporary_catalogs(300, seed=3) as data_dir:
+        sequential = RecommenderService(data_dir=data_dir)
+        parallel = parallel_service(data_dir)
+
+        reports = {}
+        parallel.load_all(progress=lambda category, timings: reports.setdefault(category, timings))
+        print(f"Stage timings: {reports}")
+
+        assert sorted(reports) == sorted(parallel.categories)
+        for timings in reports.values():
+            assert set(BUILD_STAGES) <= set(timings)
+        assert "merge" in parallel.build_timings["books"]
+        assert parallel.metrics.build_seconds.value(category="games", stage="neighbors") > 0
+        assert parallel.index_status()["ready"]
+        assert set(parallel.token_vocabulary.index) == set(sequential.token_vocabulary.index)
+
+        for query in QUERIES:
+            assert parallel.get_recommendations_json(*query, limit=20) == sequential.get_recommendations_json(*query, limit=20)
+
+        # Updates after a parallel build use the shared vocabulary like any other
+        parallel.add_item("movies", {"id": "movie_new", "title": "Dragon Night Returns"})
+        sequential.add_item("movies", {"id": "movie_new", "title": "Dragon Night Returns"})
+        assert parallel.get_recommendations_json(*QUERIES[0], limit=20) == sequential.get_recommendations_json(*QUERIES[0], limit=20)
+    print("✅ Parallel build matches")
+
+
+def test_parallel_build_with_snapshot():
+    """Parallel builds are published to the snapshot; current snapshots are attached, not rebuilt"""
+    print("\n🧪 Testing the parallel build with a snapshot...")
+
+    with temporary_catalogs(200, seed=4) as data_dir, tempfile.TemporaryDirectory() as index_dir:
+        builder = parallel_service(data_dir, index_dir=index_dir)
+        built = {}
+        builder.load_all(progress=lambda category, timings: built.setdefault(category, timings))
+        assert all(built.values())
+
+        reader = parallel_service(data_dir, index_dir=index_dir)
+        attached = {}
+        reader.load_all(progress=lambda category, timings: attached.setdefault(category, timings))
+        print(f"Second start: {attached}")
+        assert sorted(attached) == sorted(built) and not any(attached.values())
+
+        for query in QUERIES:
+            assert reader.get_recommendations_json(*query) == builder.get_recommendations_json(*query)
+    print("✅ Snapshot reused")
+
+
+def test_failed_parallel_build_is_reported():
+    """A parallel build that raises leaves its categories failed, and a later load retries them"""
+    print("\n🧪 Testing a failed parallel build...")
+
+    def broken_build(*args, **kwargs):
+        raise RuntimeError("worker died")
+
+    with temporary_catalogs(200, seed=4) as data_dir:
+        service = parallel_service(data_dir)
+        original = recommender.build_categories
+        recommender.build_categories = broken_build
+        try:
+            service.load_all()
+            assert False, "Expected the build error to be raised"
+        except RuntimeError:
+            pass
+        finally:
+            recommender.build_categories = original
+        print(f"After the failure: {service.index_status()}")
+        assert set(service.index_status()["categories"].values()) == {"failed"}
+
+        service.load_all()
+        assert service.index_status()["ready"]
+    print("✅ Failed build reported")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing the Parallel Build")
+    print("=" * 50)
+
+    test_parallel_build_matches_sequential()
+    test_parallel_build_with_snapshot()
+    test_failed_parallel_build_is_reported()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for the recommendation result cache
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backend.app.services.recommender import RecommenderService
+from backend.app.services.cache import LRUCache
+
+
+def test_lru_eviction_and_ttl():
+    """Entries are evicted least-recently-used first and expire after the TTL"""
+    print("🧪 Testing LRU eviction and TTL...")
+
+    cache = LRUCache(maxsize=2, ttl=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+    expiring = LRUCache(maxsize=2, ttl=0.01)
+    expiring.put("a", 1)
+    time.sleep(0.02)
+    assert expiring.get("a") is None
+
+    print(f"✅ LRU cache stats: {cache.stats()}")
+
+
+def test_normalized_requests_hit_cache():
+    """Reordered, re-cased and padded preferences share one cache entry"""
+    print("\n🧪 Testing normalized cache hits...")
+
+    recommender = RecommenderService()
+    first = recommender.get_recommendations("books", "movies", ["Harry Potter", "dune"], limit=5)
+    second = recommender.get_recommendations("books", "movies", [" dune ", "harry potter"], limit=3)
+    deeper = recommender.get_recommendations("books", "movies", ["harry potter", "Dune"], limit=20)
+
+    stats = recommender.result_cache.stats()
+    print(f"Cache stats: {stats}")
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    assert [rec.id for rec in second] == [rec.id for rec in first[:3]]
+    assert [rec.id for rec in deeper[:5]] == [rec.id for rec in first]
+    print("✅ Normalized requests served from cache")
+
+
+def test_reload_invalidates_category():
+    """Reloading a category drops every cached ranking that touches it"""
+    print("\n🧪 Testing cache invalidation on reload...")
+
+    recommender = RecommenderService()
+    recommender.get_recommendations("books", "movies", ["harry potter"], limit=5)
+    recommender.get_recommendations("songs", "games", ["rock"], limit=5)
+
+    recommender.reload_category("movies")
+    assert len(recommender.result_cache._cache) == 1
+
+    recommender.get_recommendations("books", "movies", ["harry potter"], limit=5)
+    assert recommender.result_cache.stats()["misses"] == 3
+    print("✅ Reload invalidated cached rankings for movies")
+
+
+def test_preference_matches_shared_across_targets():
+    """Resolved preferences are reused by every target category and dropped when the source changes"""
+    print("\n🧪 Testing the preference match cache...")
+
+    recommender = RecommenderService(cache_size=0)
+    recommender.get_recommendations("books", "movies", ["Harry Potter", "dune"], limit=5)
+    recommender.get_recommendations("books", "games", [" harry potter"], limit=5)
+    recommender.get_recommendations("books", "songs", ["DUNE", "harry potter"], limit=5)
+
+    stats = recommender.preference_cache.stats()
+    print(f"Preference cache stats: {stats}")
+    assert stats["misses"] == 2 and stats["hits"] == 3
+    assert stats["categories"]["books"]["size"] == 2
+    assert recommender.metrics.preference_cache_lookups.value(result="hit") == 3
+
+    cached = recommender.get_recommendations("books", "movies", ["harry potter"], limit=5)
+    fresh = RecommenderService(preference_cache_size=0).get_recommendations("books", "movies", ["harry potter"], limit=5)
+    assert [rec.model_dump() for rec in cached] == [rec.model_dump() for rec in fresh]
+
+    # Only the updated category loses its matches
+    recommender.get_recommendations("movies", "books", ["matrix"], limit=5)
+    recommender.add_item("books", {"id": "book_new", "title": "Harry Potter and the Cursed Child"})
+    assert recommender.preference_cache.stats()["categories"]["books"]["size"] == 0
+    assert recommender.preference_cache.stats()["categories"]["movies"]["size"] == 1
+
+    results = recommender.get_recommendations("books", "movies", ["harry potter"], limit=5)
+    assert results, "Expected matches against the updated catalog"
+    print("✅ Preference matches reused and invalidated")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Result Cache")
+    print("=" * 50)
+
+    test_lru_eviction_and_ttl()
+    test_normalized_requests_hit_cache()
+    test_reload_invalidates_category()
+    test_preference_matches_shared_across_targets()
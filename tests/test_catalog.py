@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for the columnar catalog store
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import numpy as np
+
+from backend.app.services.catalog import Catalog, StringColumn, load_catalog
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'backend', 'data')
+
+
+def test_string_column_round_trip():
+    """Packed strings must decode back to the originals, including non-ASCII text"""
+    print("🧪 Testing packed string column...")
+
+    values = ["The Hobbit", "", "Amélie", "千と千尋の神隠し", "Pokémon Red"]
+    column = StringColumn.from_strings(values)
+    assert len(column) == len(values)
+    assert list(column) == values
+    assert column[3] == values[3]
+    print("✅ String column round trip working")
+
+
+def test_catalog_columns():
+    """Years, ratings and genre codes are NumPy arrays; missing fields come back as None"""
+    print("\n🧪 Testing catalog columns...")
+
+    catalog = Catalog.from_records([
+        {"id": "a", "title": "Alpha", "genre": "Rock", "year": 1971, "rating": 4.5, "description": "First"},
+        {"id": "b", "title": "Beta", "genre": "Pop", "year": 1985, "rating": 3.25, "description": "Second"},
+        {"id": "c", "title": "Gamma", "genre": "Rock"},
+    ])
+
+    assert catalog.genre_codes.dtype == np.uint16
+    assert catalog.genre_names == ["Rock", "Pop"]
+    assert catalog.genres == ["Rock", "Pop", "Rock"]
+    assert catalog.years.dtype == np.int32 and catalog.ratings.dtype == np.float64
+    assert catalog.record(1) == {
+        "id": "b", "title": "Beta", "genre": "Pop", "year": 1985, "rating": 3.25, "description": "Second"
+    }
+    assert catalog.record(2) == {
+        "id": "c", "title": "Gamma", "genre": "Rock", "year": None, "rating": None, "description": None
+    }
+    print("✅ Catalog columns working")
+
+
+def test_nulls_round_trip():
+    """Missing and empty genres and descriptions stay distinct through take, concat and record"""
+    print("\n🧪 Testing missing versus empty strings...")
+
+    records = [
+        {"id": "a", "title": "Alpha", "genre": None, "description": ""},
+        {"id": "b", "title": "Beta", "genre": "", "description": None},
+        {"id": "c", "title": "Gamma", "genre": "Rock", "description": "Third"},
+    ]
+    catalog = Catalog.from_records(records)
+    expected = [{**record, "year": None, "rating": None} for record in records]
+    assert list(catalog.records()) == expected
+    assert Catalog.from_records([records[2]]).descriptions.nulls is None
+
+    reordered = catalog.take(np.array([2, 1, 0]))
+    assert list(reordered.records()) == expected[::-1]
+    merged = Catalog.concat([Catalog.from_records(records[2:]), catalog])
+    assert list(merged.records()) == expected[2:] + expected
+    print("✅ Missing values preserved")
+
+
+def test_jsonl_matches_json():
+    """Streaming a JSON Lines file must produce the same catalog as the JSON array file"""
+    print("\n🧪 Testing streaming JSONL loader...")
+
+    for category in ["books", "movies", "songs", "games"]:
+        json_path = os.path.join(DATA_DIR, f"{category}.json")
+        with open(json_path, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            jsonl_path = os.path.join(tmp, f"{category}.jsonl")
+            with open(jsonl_path, 'w', encoding='utf-8') as f:
+                for item in items:
+                    f.write(json.dumps(item) + "\n")
+                f.write("\n")
+
+            from_json = load_catalog(json_path)
+            from_jsonl = load_catalog(jsonl_path)
+
+        assert list(from_jsonl.records()) == list(from_json.records())
+        print(f"{category}: {len(from_jsonl)} items, {from_jsonl.nbytes} bytes of columns")
+
+    print("✅ JSONL and JSON catalogs match")
+
+
+def test_invalid_jsonl_line_reports_position():
+    """A malformed line must fail with its line number"""
+    print("\n🧪 Testing malformed JSONL...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "broken.ndjson")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"id": "a", "title": "Alpha"}\n{"id": "b",\n')
+        try:
+            load_catalog(path)
+            assert False, "Expected a ValueError"
+        except ValueError as e:
+            print(f"Rejected: {e}")
+            assert "broken.ndjson:2" in str(e)
+
+    print("✅ Malformed line reported")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Columnar Catalog")
+    print("=" * 50)
+
+    test_string_column_round_trip()
+    test_catalog_columns()
+    test_nulls_round_trip()
+    test_jsonl_matches_json()
+    test_invalid_jsonl_line_reports_position()
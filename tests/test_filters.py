@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for filtering recommendations by genre, year and rating
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backend.app.services.recommender import RecommenderService
+from backend.app.models.recommendation import RecommendationFilters, RecommendationRequest
+from backend.benchmarks.synthetic import temporary_catalogs
+
+QUERY = ("books", "movies", ["The Lost Kingdom", "dragon"])
+FILTERS = [
+    RecommendationFilters(min_year=2000, min_rating=8.0),
+    RecommendationFilters(genres=["drama", "SCI-FI"]),
+    RecommendationFilters(genres=["Drama"], max_year=1990),
+    RecommendationFilters(min_year=2010, max_year=2012, min_rating=9.5),
+    RecommendationFilters(genres=["No Such Genre"]),
+]
+
+
+def passes(item, filters: RecommendationFilters) -> bool:
+    if filters.genres is not None and (item.genre or "").lower() not in [genre.lower() for genre in filters.genres]:
+        return False
+    if (filters.min_year is not None or filters.max_year is not None) and item.year is None:
+        return False
+    if filters.min_year is not None and item.year < filters.min_year:
+        return False
+    if filters.max_year is not None and item.year > filters.max_year:
+        return False
+    if filters.min_rating is not None and (item.rating is None or item.rating < filters.min_rating):
+        return False
+    return True
+
+
+def assert_filtered_ranking(service, n_items):
+    """Filtered results equal the unfiltered full ranking with non-matching items dropped"""
+    full = service.get_recommendations(*QUERY, limit=n_items)
+    for filters in FILTERS:
+        for limit in (5, 20):
+            expected = [item for item in full if passes(item, filters)][:limit]
+            actual = service.get_recommendations(*QUERY, limit=limit, filters=filters)
+            assert [item.model_dump() for item in actual] == [item.model_dump() for item in expected], filters
+            print(f"{filters.model_dump(exclude_none=True)} limit={limit}: {len(actual)} items")
+
+
+def test_filters_match_post_filtering():
+    """Filtering before scoring gives the same items and scores as filtering a full ranking"""
+    print("🧪 Testing filtered rankings...")
+
+    with temporary_catalogs(400, seed=5) as data_dir:
+        service = RecommenderService(data_dir=data_dir, cache_size=0)
+        assert_filtered_ranking(service, 400)
+    print("✅ Filtered rankings match")
+
+
+def test_filters_in_shared_space():
+    """The joint TF-IDF space scores only the filtered targets too"""
+    print("\n🧪 Testing filtered rankings in the shared space...")
+
+    with temporary_catalogs(200, seed=5) as data_dir:
+        for precompute_affinity in (False, True):
+            service = RecommenderService(
+                data_dir=data_dir, cache_size=0, cross_category_mode="shared_space",
+                precompute_affinity=precompute_affinity, affinity_k=200
+            )
+            assert_filtered_ranking(service, 200)
+    print("✅ Shared space filtering matches")
+
+
+def test_filters_in_cache_and_batch():
+    """Filters are part of the cache key, and batch requests with different filters are ranked apart"""
+    print("\n🧪 Testing filters with the result cache and batches...")
+
+    with temporary_catalogs(400, seed=5) as data_dir:
+        service = RecommenderService(data_dir=data_dir)
+    unfiltered = service.get_recommendations(*QUERY, limit=5)
+    filtered = service.get_recommendations(*QUERY, limit=5, filters=FILTERS[0])
+    assert [item.id for item in unfiltered] != [item.id for item in filtered]
+    assert service.result_cache.stats()["misses"] == 2
+
+    requests = [RecommendationRequest(source_category=QUERY[0], target_category=QUERY[1], preferences=QUERY[2],
+                                      limit=5, filters=filters) for filters in [None] + FILTERS]
+    results = service.get_recommendations_batch(requests)
+    for request, result in zip(requests, results):
+        expected = service.get_recommendations(*QUERY, limit=5, filters=request.filters)
+        assert [item.id for item in result.response.recommendations] == [item.id for item in expected]
+
+    try:
+        RecommendationFilters(min_year=2010, max_year=2000)
+        assert False, "Expected an inverted year range to be rejected"
+    except ValueError:
+        pass
+    assert RecommendationFilters().key() is None
+    assert RecommendationFilters(genres=["Drama", "sci-fi"]).key() == RecommendationFilters(genres=["SCI-FI", "drama"]).key()
+    print("✅ Cache and batch filtering working")
+
+
+def test_selective_filters_narrow_candidates():
+    """Narrower filters leave fewer candidates to score, and rankings only ever come from them"""
+    print("\n🧪 Testing filter selectivity...")
+
+    with temporary_catalogs(1000, seed=5) as data_dir:
+        service = RecommenderService(data_dir=data_dir, cache_size=0)
+    movies = service.categories["movies"]
+    preferences = ["the", "night", "river", "kingdom"]
+    assert service._filter_candidates(movies, None) is None
+
+    counts = [len(movies)]
+    for label, filters in [
+        ("year >= 1990", RecommendationFilters(min_year=1990)),
+        ("year >= 1990, rating >= 7", RecommendationFilters(min_year=1990, min_rating=7.0)),
+        ("drama, 2015-2016, rating >= 7",
+         RecommendationFilters(genres=["Drama"], min_year=2015, max_year=2016, min_rating=7.0)),
+    ]:
+        candidates = service._filter_candidates(movies, filters)
+        results = service.get_recommendations("books", "movies", preferences, limit=20, filters=filters)
+        candidate_ids = {movies.catalog.ids[idx] for idx in candidates}
+        print(f"{label}: {len(candidates)} candidates, {len(results)} results")
+        assert len(candidates) < counts[-1]
+        assert len(results) <= min(20, len(candidates))
+        assert all(item.id in candidate_ids for item in results)
+        counts.append(len(candidates))
+    print("✅ Selective filters narrow the candidates")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Recommendation Filters")
+    print("=" * 50)
+
+    test_filters_match_post_filtering()
+    test_filters_in_shared_space()
+    test_filters_in_cache_and_batch()
+    test_selective_filters_narrow_candidates()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for stage timings and the Prometheus metrics registry
+"""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backend.app.services.metrics import MetricsRegistry, RecommenderMetrics, collect_timings
+from backend.app.services.worker_pool import WorkerPool
+from backend.app.services.recommender import RecommenderService
+
+
+def test_prometheus_rendering():
+    """Histograms render cumulative buckets, _sum and _count; label values are escaped"""
+    print("🧪 Testing Prometheus text rendering...")
+
+    registry = MetricsRegistry()
+    latency = registry.histogram("demo_seconds", "Demo latency", ["stage"], buckets=(0.1, 1.0))
+    requests = registry.counter("demo_total", "Demo requests", ["path"])
+    latency.observe(0.05, stage="a")
+    latency.observe(0.5, stage="a")
+    latency.observe(5.0, stage="a")
+    requests.inc(path='say "hi"')
+
+    text = registry.render()
+    print(text)
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="a"} 3' in text
+    assert 'demo_total{path="say \\"hi\\""} 1.0' in text
+
+    try:
+        requests.inc(other="x")
+        assert False, "Expected a ValueError for unknown labels"
+    except ValueError:
+        pass
+    print("✅ Rendering working")
+
+
+def test_spans_reach_worker_threads():
+    """Spans recorded on a worker pool thread land in the calling request's timings"""
+    print("\n🧪 Testing stage timings across the worker pool...")
+
+    metrics = RecommenderMetrics()
+    pool = WorkerPool(max_workers=2)
+
+    def work():
+        with metrics.span("score"):
+            return sum(range(1000))
+
+    async def handler():
+        with collect_timings() as timings:
+            with metrics.span("service"):
+                await pool.run(work)
+        return timings
+
+    timings = asyncio.run(handler())
+    pool.shutdown()
+
+    print(f"X-Timing: {timings.header()}")
+    assert [stage for stage, _ in timings.stages] == ["score", "service"]
+    assert timings.totals()["service"] >= timings.totals()["score"]
+    assert metrics.stage_seconds.count(stage="score") == 1
+    print("✅ Worker spans collected")
+
+
+def test_service_counters():
+    """Cache lookups, matching paths and catalog sizes are counted by the service"""
+    print("\n🧪 Testing service counters...")
+
+    service = RecommenderService()
+    metrics = service.metrics
+
+    service.get_recommendations("books", "movies", ["Hobbit"], limit=3)
+    service.get_recommendations("books", "movies", ["hobbit"], limit=3)
+    service.get_recommendations("books", "movies", ["qqqqzzzz"], limit=3)
+
+    assert metrics.cache_lookups.value(result="hit") == 1
+    assert metrics.cache_lookups.value(result="miss") == 2
+    assert metrics.preference_matches.value(path="title") == 1
+    assert metrics.preference_matches.value(path="none") == 1
+    assert metrics.unmatched_requests.value() == 1
+    assert metrics.catalog_items.value(category="games") == len(service.categories["games"])
+    for stage in ("validate", "cache", "match", "score", "build_items"):
+        assert metrics.stage_seconds.count(stage=stage) > 0, stage
+    print("✅ Service counters working")
+
+
+def test_process_pool_metrics_reach_parent():
+    """Counters and histograms recorded in worker processes are merged into the parent's /metrics"""
+    print("\n🧪 Testing metrics from a process pool...")
+
+    parent = RecommenderService(lazy=True)
+    pool = WorkerPool(kind="process", max_workers=1, service_factory=RecommenderService)
+
+    async def requests():
+        for _ in range(2):
+            await pool.call_service(parent, "get_recommendations_json", source_category="books",
+                                    target_category="movies", preferences=["Hobbit"], limit=3)
+
+    asyncio.run(requests())
+    pool.shutdown()
+
+    metrics = parent.metrics
+    print(f"Cache lookups: hit {metrics.cache_lookups.value(result='hit')}, "
+          f"miss {metrics.cache_lookups.value(result='miss')}")
+    assert metrics.cache_lookups.value(result="hit") == 1
+    assert metrics.cache_lookups.value(result="miss") == 1
+    assert metrics.preference_matches.value(path="title") == 1
+    assert metrics.stage_seconds.count(stage="score") == 1
+    assert metrics.catalog_items.value(category="movies") > 0
+    assert 'recommender_cache_lookups_total{result="hit"} 1.0' in metrics.render()
+    print("✅ Worker metrics merged")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Metrics")
+    print("=" * 50)
+
+    test_prometheus_rendering()
+    test_spans_reach_worker_threads()
+    test_service_counters()
+    test_process_pool_metrics_reach_parent()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for the sparse top-k neighbor index
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from backend.app.services.recommender import RecommenderService
+from backend.app.services.neighbors import NeighborIndex
+
+
+def test_neighbors_match_dense_similarity():
+    """Chunked top-k neighbors must agree with the dense cosine similarity matrix"""
+    print("🧪 Comparing neighbor index with dense cosine similarity...")
+
+    recommender = RecommenderService()
+
+    for category, store in recommender.item_stores.items():
+        # TF-IDF rows are L2-normalised, so the dot product is the cosine similarity
+        dense = (store.tfidf_matrix @ store.tfidf_matrix.T).toarray()
+        assert np.allclose(dense, cosine_similarity(store.tfidf_matrix, store.tfidf_matrix))
+        index = NeighborIndex.build(store.tfidf_matrix, k=5, chunk_size=7)
+
+        assert index.indices.dtype == np.int32 and index.scores.dtype == np.float32
+        for item_idx in range(len(store)):
+            row = dense[item_idx].copy()
+            row[item_idx] = -np.inf
+            expected = [idx for idx in np.lexsort((np.arange(len(row)), -row))[:5] if row[idx] > 0]
+
+            neighbor_ids, neighbor_scores = index.neighbors(item_idx)
+            assert list(neighbor_ids) == expected, f"{category}[{item_idx}]: {list(neighbor_ids)} != {expected}"
+            assert np.allclose(neighbor_scores, row[expected], atol=1e-6)
+
+    print("✅ Neighbor index matches dense similarity")
+
+
+def test_similar_items_lookup():
+    """More-like-this lookup by item id"""
+    print("\n🧪 Testing similar item lookup...")
+
+    recommender = RecommenderService()
+    similar = recommender.get_similar_items("movies", "movie_1", limit=3)
+
+    print(f"Found {len(similar)} items similar to movie_1:")
+    for i, rec in enumerate(similar, 1):
+        print(f"  {i}. {rec.title} (Score: {rec.similarity_score:.3f})")
+    assert len(similar) <= 3
+    assert all(rec.id != "movie_1" for rec in similar)
+
+    try:
+        recommender.get_similar_items("movies", "missing_item")
+        print("❌ Should have raised error for unknown item")
+    except ValueError as e:
+        print(f"✅ Correctly handled unknown item: {e}")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Neighbor Index")
+    print("=" * 50)
+
+    test_neighbors_match_dense_similarity()
+    test_similar_items_lookup()
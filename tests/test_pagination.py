@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test script for cursor pagination and NDJSON streaming of long result lists
+"""
+
+import sys
+import os
+import json
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backend.app import main
+from backend.app.services.recommender import RecommenderService
+from backend.app.models.recommendation import RecommendationPage, RecommendationStreamRequest
+from backend.benchmarks.synthetic import temporary_catalogs
+
+QUERY = ("books", "movies", ["The Lost Kingdom", "dragon"])
+
+
+def synthetic_service(**kwargs) -> RecommenderService:
+    """Service over 400 synthetic items per category, deep enough for several pages"""
+    # Catalogs are read when the service is built, so the directory can go right after
+    with temporary_catalogs(400, seed=2) as directory:
+        return RecommenderService(data_dir=directory, **kwargs)
+
+
+def test_pages_cover_the_full_ranking():
+    """Following next_cursor yields the deep ranking once, page by page, as valid RecommendationPage JSON"""
+    print("🧪 Testing cursor pagination...")
+
+    service = synthetic_service(page_max_results=150)
+    full = [json.loads(line) for line in service.get_recommendations_ndjson(*QUERY, limit=150).splitlines()]
+
+    page = RecommendationPage.model_validate_json(service.get_recommendation_page(*QUERY, page_size=40))
+    items = list(page.recommendations)
+    pages = 1
+    while page.next_cursor:
+        body = service.get_next_page(page.next_cursor, page_size=40)
+        page = RecommendationPage.model_validate_json(body)
+        assert body == page.model_dump_json().encode()
+        items.extend(page.recommendations)
+        pages += 1
+
+    print(f"{pages} pages, {len(items)} items")
+    assert page.total_count == len(full) == len(items) == 150
+    assert [item.model_dump() for item in items] == full
+    assert len(service.result_cache._cache) == 0, "Deep rankings must not fill the result cache"
+    print("✅ Pages cover the ranking")
+
+
+def test_cursor_expiry():
+    """Unknown cursors and cursors of a replaced index are rejected"""
+    print("\n🧪 Testing cursor expiry...")
+
+    service = synthetic_service(page_max_results=60)
+    first = json.loads(service.get_recommendation_page(*QUERY, page_size=10))
+    cursor = first["next_cursor"]
+    assert json.loads(service.get_next_page(cursor, page_size=10))["recommendations"]
+
+    for bad in ("nonsense", "unknown.10", cursor.split(".")[0] + ".9999"):
+        try:
+            service.get_next_page(bad)
+            assert False, f"Expected a ValueError for {bad}"
+        except ValueError as e:
+            print(f"{bad}: {e}")
+
+    service.delete_item("movies", first["recommendations"][0]["id"])
+    try:
+        service.get_next_page(cursor)
+        assert False, "Expected the cursor to expire after an update"
+    except ValueError:
+        pass
+    print("✅ Stale cursors rejected")
+
+
+def test_stream_prefix_matches_deep_ranking():
+    """A shallow chunk followed by the deep tail equals one deep ranking"""
+    print("\n🧪 Testing NDJSON streaming chunks...")
+
+    service = synthetic_service()
+    full = service.get_recommendations_ndjson(*QUERY, limit=300)
+    head = service.get_recommendations_ndjson(*QUERY, limit=20)
+    tail = service.get_recommendations_ndjson(*QUERY, limit=300, offset=20)
+
+    assert head + tail == full
+    assert full.count(b"\n") == 300
+
+    # An update between the passes of a named stream does not reach its deeper pass
+    head = service.get_recommendations_ndjson(*QUERY, limit=20, stream="s1")
+    service.add_item("movies", {"id": "movie_new", "title": "The Lost Kingdom Dragon"})
+    tail = service.get_recommendations_ndjson(*QUERY, limit=300, offset=20, stream="s1")
+    assert head + tail == full
+    assert b"movie_new" in service.get_recommendations_ndjson(*QUERY, limit=300)
+
+    try:
+        service.get_recommendations_ndjson(*QUERY, limit=300, offset=20, stream="s1")
+        assert False, "Expected a finished stream to be rejected"
+    except ValueError:
+        pass
+    print("✅ Stream chunks consistent")
+
+
+def test_stream_failure_ends_with_error_line():
+    """A deeper pass that raises ends the stream with an error record, not a short list"""
+    print("\n🧪 Testing a failing stream...")
+
+    service = synthetic_service()
+    original = main.recommender_service
+
+    class FailingTail:
+        def get_recommendations_ndjson(self, *args, offset: int = 0, **kwargs):
+            if offset:
+                raise RuntimeError("index unavailable")
+            return service.get_recommendations_ndjson(*args, offset=offset, **kwargs)
+
+    async def read_stream() -> bytes:
+        request = RecommendationStreamRequest(
+            source_category=QUERY[0], target_category=QUERY[1], preferences=QUERY[2], limit=100
+        )
+        response = await main.stream_recommendations(request)
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    main.recommender_service = FailingTail()
+    try:
+        lines = asyncio.run(read_stream()).splitlines()
+    finally:
+        main.recommender_service = original
+
+    print(f"Last line: {lines[-1]}")
+    assert len(lines) == 21
+    assert all("similarity_score" in json.loads(line) for line in lines[:20])
+    assert json.loads(lines[-1]) == {"error": "index unavailable"}
+    print("✅ Stream failure reported")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Pagination and Streaming")
+    print("=" * 50)
+
+    test_pages_cover_the_full_ranking()
+    test_cursor_expiry()
+    test_stream_prefix_matches_deep_ranking()
+    test_stream_failure_ends_with_error_line()
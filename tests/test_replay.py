@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script for request logging and the replay load-test harness
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import httpx
+from fastapi import FastAPI, HTTPException, Request, Response
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backend.app.services.request_log import RequestLog, RequestLogMiddleware, read_request_log
+from backend.benchmarks.replay import lookup_counts, hit_ratios, run_replay, write_sample_log
+
+
+def stub_app() -> FastAPI:
+    """Stand-in API: /recommend fails for the "busy" preference and counts cache lookups in /metrics"""
+    app = FastAPI()
+    seen = set()
+    counts = {"hit": 0, "miss": 0}
+
+    @app.post("/recommend")
+    async def recommend(request: Request):
+        try:
+            body = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Body is not JSON")
+        if "busy" in body.get("preferences", []):
+            raise HTTPException(status_code=503, detail="Server busy, please retry")
+        key = json.dumps(body, sort_keys=True)
+        counts["hit" if key in seen else "miss"] += 1
+        seen.add(key)
+        return {"recommendations": [], "total_count": 0}
+
+    @app.get("/metrics")
+    async def metrics():
+        lines = [f'recommender_cache_lookups_total{{result="{result}"}} {float(count)}'
+                 for result, count in counts.items()]
+        return Response(content="\n".join(lines) + "\n", media_type="text/plain")
+
+    return app
+
+
+def logged_requests(app, requests) -> list:
+    """Send requests through the logging middleware and return the log entries"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "requests.jsonl")
+        log = RequestLog(path)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=RequestLogMiddleware(app, log)),
+                                   base_url="http://test")
+
+        async def send():
+            async with client:
+                for method, url, content in requests:
+                    await client.request(method, url, content=content, headers={"Content-Type": "application/json"})
+
+        asyncio.run(send())
+        log.close()
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"request_id": "cut sh')
+        return list(read_request_log(path))
+
+
+def test_request_log_middleware():
+    """Ranking POSTs are logged with their body, status and timing; other requests are not"""
+    print("🧪 Testing the request log middleware...")
+
+    body = {"source_category": "books", "target_category": "movies", "preferences": ["dragon"], "limit": 5}
+    entries = logged_requests(stub_app(), [
+        ("POST", "/recommend", json.dumps(body)),
+        ("GET", "/metrics", None),
+        ("POST", "/recommend", json.dumps({**body, "preferences": ["busy"]})),
+        ("POST", "/recommend", "not json"),
+    ])
+    print(f"Logged: {[(entry['path'], entry['status']) for entry in entries]}")
+
+    assert [entry["path"] for entry in entries] == ["/recommend"] * 3
+    assert entries[0]["body"] == body and entries[0]["status"] == 200
+    assert entries[1]["status"] == 503
+    assert entries[2]["body"] == "not json" and entries[2]["status"] == 422
+    assert all(entry["duration_ms"] >= 0 and entry["request_id"] for entry in entries)
+    assert entries[0]["time"] <= entries[1]["time"] <= entries[2]["time"]
+    print("✅ Requests logged")
+
+
+def test_replay_report():
+    """A replay reports every request, its errors and the cache hit ratio from /metrics"""
+    print("\n🧪 Testing a closed-loop replay...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sample.jsonl")
+        write_sample_log(path, 30, seed=1)
+        entries = list(read_request_log(path))
+    entries = entries + entries[:10] + [{"path": "/recommend", "body": {"preferences": ["busy"]}}]
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_app()), base_url="http://test")
+    result = asyncio.run(run_replay(client, entries, concurrency=4, warmup=5))
+    print(f"Result: {result}")
+
+    assert result["requests"] == len(entries) - 5
+    assert result["errors"] == {"503": 1}
+    assert abs(result["error_rate"] - 1 / result["requests"]) < 1e-9
+    assert result["latency_ms"]["p50"] <= result["latency_ms"]["p95"] <= result["latency_ms"]["p99"]
+    # 25 first sightings after the 5 warm-up requests, then 10 repeats that hit
+    assert abs(result["hit_ratio"]["result_cache"] - 10 / 35) < 1e-9
+    assert result["hit_ratio"]["tables"] is None
+
+    counts = lookup_counts('recommender_table_lookups_total{result="hit"} 3.0\nother_total 1\n')
+    assert counts == {"recommender_table_lookups_total": {"hit": 3.0}}
+    assert hit_ratios({}, counts)["tables"] == 1.0
+    print("✅ Replay report working")
+
+
+def test_paced_replay():
+    """A paced replay sends requests no faster than the requested rate"""
+    print("\n🧪 Testing a rate-limited replay...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sample.jsonl")
+        write_sample_log(path, 20, seed=2, rate=10.0)
+        entries = list(read_request_log(path))
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_app()), base_url="http://test")
+    paced = asyncio.run(run_replay(client, entries, concurrency=2, rate=100.0))
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_app()), base_url="http://test")
+    recorded = asyncio.run(run_replay(client, entries, concurrency=2, speed=4.0))
+    print(f"rate 100/s: {paced['duration_s']:.2f}s, recorded timing x4: {recorded['duration_s']:.2f}s")
+
+    assert paced["duration_s"] >= 19 / 100
+    assert paced["throughput_rps"] <= 100 * 20 / 19
+    assert recorded["duration_s"] >= 1.9 / 4
+    print("✅ Pacing working")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Request Replay")
+    print("=" * 50)
+
+    test_request_log_middleware()
+    test_replay_report()
+    test_paced_replay()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test script comparing the vectorized scoring engine with the original per-row loop
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import numpy as np
+import pandas as pd
+
+from backend.app.services import scoring
+from backend.app.services.recommender import RecommenderService
+
+CATEGORIES = ["books", "movies", "songs", "games"]
+QUERIES = [
+    ["harry potter"],
+    ["minecraft movie"],
+    ["fantasy"],
+    ["zelda", "matrix"],
+    ["epic adventure"],
+    ["xyzzy"],
+]
+
+
+def reference_scores(recommender, source_category, target_category, preferences):
+    """Per-row scoring loop as originally written in get_recommendations"""
+    source_df = pd.DataFrame(recommender.data[source_category].records())
+    target_df = pd.DataFrame(recommender.data[target_category].records())
+    valid_preferences = [p.strip() for p in preferences if p.strip()]
+
+    preference_scores = []
+    for preference in valid_preferences:
+        preference_scores.extend(recommender._match_preference(
+            preference, recommender.item_stores[source_category])[1])
+    if not preference_scores:
+        preference_scores = [(idx, 0.1) for idx in range(len(source_df))]
+
+    results = []
+    for _, target_item in target_df.iterrows():
+        target_text = f"{target_item['title']} {target_item['genre']} {target_item['description']}"
+        max_score = 0
+        for source_idx, source_score in preference_scores:
+            source_item = source_df.iloc[source_idx]
+            source_text = f"{source_item['title']} {source_item['genre']} {source_item['description']}"
+            for preference in valid_preferences:
+                title_overlap = len(set(preference.lower().split()) & set(target_item['title'].lower().split()))
+                if title_overlap > 0:
+                    max_score = max(max_score, min(0.9, 0.3 + (title_overlap * 0.2)))
+            source_words = set(source_text.lower().split())
+            target_words = set(target_text.lower().split())
+            intersection = len(source_words & target_words)
+            union = len(source_words | target_words)
+            jaccard = intersection / union if union > 0 else 0
+            overlap = intersection / len(source_words) if source_words else 0
+            max_score = max(max_score, ((jaccard * 0.4) + (overlap * 0.6)) * source_score)
+        if max_score > 0:
+            results.append((target_item['id'], float(max_score)))
+
+    results.sort(key=lambda x: x[1], reverse=True)
+    return results
+
+
+def brute_force_scores(source_store, target_store, preference_scores, preferences):
+    """Final score of every target, one source and one target at a time over word sets"""
+    if not preference_scores:
+        return np.zeros(len(target_store.texts))
+
+    weights = {}
+    for source_idx, source_score in preference_scores:
+        weights[int(source_idx)] = max(source_score, weights.get(int(source_idx), float('-inf')))
+    source_words = {idx: scoring.tokenize(source_store.texts[idx]) for idx in weights}
+
+    scores = []
+    for text, title in zip(target_store.texts, target_store.catalog.titles):
+        target_words = scoring.tokenize(text)
+        score = 0.0
+        for preference in preferences:
+            title_overlap = len(scoring.tokenize(preference) & scoring.tokenize(title))
+            if title_overlap > 0:
+                score = max(score, min(0.9, 0.3 + (title_overlap * 0.2)))
+        for idx, weight in weights.items():
+            intersection = len(source_words[idx] & target_words)
+            union = len(source_words[idx] | target_words)
+            jaccard = intersection / union if union > 0 else 0.0
+            overlap = intersection / len(source_words[idx]) if source_words[idx] else 0.0
+            score = max(score, ((jaccard * 0.4) + (overlap * 0.6)) * weight)
+        scores.append(score)
+    return np.array(scores)
+
+
+def test_vectorized_scores_match_reference():
+    """Vectorized ranking must reproduce the original scores exactly"""
+    print("🧪 Comparing vectorized scores with the reference loop...")
+
+    recommender = RecommenderService()
+
+    for source_category in CATEGORIES:
+        for target_category in CATEGORIES:
+            for preferences in QUERIES:
+                expected = reference_scores(recommender, source_category, target_category, preferences)[:20]
+                actual = [
+                    (rec.id, rec.similarity_score)
+                    for rec in recommender.get_recommendations(source_category, target_category, preferences, limit=20)
+                ]
+                assert actual == expected, f"{source_category}->{target_category} {preferences}: {actual} != {expected}"
+
+    print("✅ Vectorized scores match the reference loop")
+
+
+def test_shared_space_affinity_matches_direct_product():
+    """Precomputed affinity tables must reproduce the direct shared-space product"""
+    print("\n🧪 Comparing shared-space affinity tables with the direct product...")
+
+    direct = RecommenderService(cross_category_mode="shared_space")
+    tabled = RecommenderService(cross_category_mode="shared_space", precompute_affinity=True, affinity_k=50)
+
+    for source_category in CATEGORIES:
+        for target_category in CATEGORIES:
+            for preferences in QUERIES:
+                expected = direct.get_recommendations(source_category, target_category, preferences, limit=10)
+                actual = tabled.get_recommendations(source_category, target_category, preferences, limit=10)
+                assert len(actual) == len(expected)
+                for got, want in zip(actual, expected):
+                    assert abs(got.similarity_score - want.similarity_score) < 1e-6
+
+    print("✅ Affinity tables match the direct product")
+
+
+def test_pruned_top_k_matches_full_ranking():
+    """Early-terminated top-k ranking must equal ranking brute-force scores of every target"""
+    print("\n🧪 Comparing pruned top-k ranking with brute-force scoring...")
+
+    recommender = RecommenderService()
+    rng = np.random.default_rng(0)
+    source_store, target_store = recommender.item_stores["books"], recommender.item_stores["movies"]
+    source, target = source_store.tokens, target_store.tokens
+
+    batch_scores = []
+    for _ in range(50):
+        n_sources = int(rng.integers(0, len(source) + 1))
+        sources = rng.choice(len(source), n_sources, replace=False)
+        weights = rng.choice([1.0, 0.5, 0.3, 0.1], n_sources)
+        batch_scores.append(list(zip(sources, weights)))
+    batch_preferences = [["harry potter"] if i % 3 == 0 else ["dune"] for i in range(len(batch_scores))]
+
+    full = [
+        brute_force_scores(source_store, target_store, preference_scores, preferences)
+        for preference_scores, preferences in zip(batch_scores, batch_preferences)
+    ]
+    for limit in (1, 3, 20, 100):
+        for block_size in (1, 4, 32):
+            rankings = scoring.rank_targets_batch(source, target, batch_scores, batch_preferences, limit, block_size)
+            for row, (top, top_scores) in zip(full, rankings):
+                expected = scoring.rank_scores(row, limit)
+                assert np.array_equal(top, expected)
+                assert np.allclose(top_scores, row[expected], rtol=0, atol=1e-12)
+
+    # One strong exact match settles the top 1 before the weaker sources are ever scored
+    computed = []
+    original = scoring.cross_category_similarity
+    scoring.cross_category_similarity = lambda s, t, indices: computed.extend(indices) or original(s, t, indices)
+    try:
+        preference_scores = [(0, 1.0)] + [(idx, 0.1) for idx in range(1, len(source))]
+        scoring.rank_targets_batch(source, target, [preference_scores], [["the lord of the rings"]], 1, block_size=1)
+    finally:
+        scoring.cross_category_similarity = original
+    print(f"Sources scored: {len(computed)} of {len(source)}")
+    assert len(computed) < len(source)
+
+    print("✅ Pruned top-k ranking matches brute-force scoring")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Vectorized Scoring")
+    print("=" * 50)
+
+    test_vectorized_scores_match_reference()
+    test_shared_space_affinity_matches_direct_product()
+    test_pruned_top_k_matches_full_ranking()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the pre-encoded response serialization path
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backend.app.services import serialization
+from backend.app.services.recommender import RecommenderService
+from backend.app.models.recommendation import RecommendationResponse
+
+CATEGORIES = ["books", "movies", "songs", "games"]
+PREFERENCES = [["The Hobbit"], ["matrix", "zelda"], ["fantasy adventure"], ["qqqqzzzz"], ["ring"]]
+
+
+def model_json(service, source, target, preferences, limit) -> bytes:
+    """The response as the models serialize it"""
+    recommendations = service.get_recommendations(source, target, preferences, limit)
+    return RecommendationResponse(
+        recommendations=recommendations,
+        source_category=source,
+        target_category=target,
+        total_count=len(recommendations)
+    ).model_dump_json().encode()
+
+
+def assert_matches_models(service):
+    checked = 0
+    for source in CATEGORIES:
+        for target in CATEGORIES:
+            if source == target:
+                continue
+            for preferences in PREFERENCES:
+                for limit in (1, 5, 20):
+                    fast = service.get_recommendations_json(source, target, preferences, limit)
+                    assert fast == model_json(service, source, target, preferences, limit), (source, target, preferences)
+                    checked += 1
+    return checked
+
+
+def test_fast_path_is_byte_identical():
+    """Pre-encoded responses must equal model_dump_json of the equivalent models"""
+    print("🧪 Testing pre-encoded responses...")
+
+    service = RecommenderService()
+    checked = assert_matches_models(service)
+    print(f"✅ {checked} responses byte-identical")
+
+
+def test_fast_path_after_updates():
+    """Encoded items follow incremental updates, including missing fields and non-ASCII text"""
+    print("\n🧪 Testing pre-encoded responses after catalog updates...")
+
+    service = RecommenderService(cache_size=0)
+    service.add_item("movies", {"id": "movie_new", "title": "Amélie \"Ring\" Quest", "genre": None})
+    service.update_item("movies", "movie_1", {"title": "The Ring Returns", "genre": "Fantasy", "year": 2003,
+                                              "rating": 9.0, "description": "Line one\nline two"})
+    service.delete_item("movies", "movie_2")
+
+    index = service.categories["movies"]
+    encoded = index.encoded_items.raw(index.store.positions["movie_new"])
+    print(encoded.decode())
+    assert encoded.startswith('"id":"movie_new","title":"Amélie \\"Ring\\" Quest"'.encode())
+    assert len(index.encoded_items) == len(index.catalog)
+    assert_matches_models(service)
+
+    service.compact("movies")
+    assert_matches_models(service)
+    print("✅ Updated catalogs encode correctly")
+
+
+def test_without_orjson():
+    """The pydantic-core encoder fallback must produce the same bytes"""
+    print("\n🧪 Testing the encoder fallback...")
+
+    saved = serialization.orjson
+    serialization.orjson = None
+    try:
+        service = RecommenderService()
+        assert_matches_models(service)
+    finally:
+        serialization.orjson = saved
+    print("✅ Fallback encoder byte-identical")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Response Serialization")
+    print("=" * 50)
+
+    test_fast_path_is_byte_identical()
+    test_fast_path_after_updates()
+    test_without_orjson()
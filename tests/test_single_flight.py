@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for coalescing concurrent identical requests
+"""
+
+import sys
+import os
+import time
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backend.app.services.single_flight import SingleFlight
+from backend.app.services.recommender import RecommenderService
+
+
+def run_concurrently(n, fn):
+    """Start ``fn`` on ``n`` threads at once and return the outcome of each call"""
+    barrier = threading.Barrier(n)
+
+    def call():
+        barrier.wait()
+        try:
+            return fn()
+        except BaseException as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        return [future.result() for future in [executor.submit(call) for _ in range(n)]]
+
+
+def test_concurrent_callers_share_one_call():
+    """Callers of a key that is being computed wait for it and get the same result"""
+    print("🧪 Testing shared results...")
+
+    flight = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return ["ranking"]
+
+    results = run_concurrently(8, lambda: flight.do("key", compute))
+    print(f"{len(calls)} computation(s) for 8 callers")
+    assert len(calls) == 1
+    assert all(value is results[0][0] for value, _ in results)
+    assert sum(shared for _, shared in results) == 7
+    assert len(flight) == 0
+
+    # Once finished, the key computes again
+    assert flight.do("key", compute) == (["ranking"], False)
+    print("✅ Results shared")
+
+
+def test_errors_reach_every_caller():
+    """An exception from the running call is raised to its waiters too"""
+    print("\n🧪 Testing error propagation...")
+
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.2)
+        raise ValueError("Invalid category")
+
+    results = run_concurrently(4, lambda: flight.do("key", fail))
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.leaders == 1 and flight.followers == 3
+    print("✅ Errors propagated")
+
+
+def test_cancelled_call_is_retried():
+    """Waiters of a cancelled call compute the result themselves instead of failing"""
+    print("\n🧪 Testing cancellation...")
+
+    flight = SingleFlight()
+    calls = []
+
+    def cancelled_first():
+        calls.append(1)
+        time.sleep(0.2)
+        if len(calls) == 1:
+            raise CancelledError()
+        return "done"
+
+    results = run_concurrently(4, lambda: flight.do("key", cancelled_first))
+    print(f"Outcomes: {results}")
+    assert sum(isinstance(result, CancelledError) for result in results) == 1
+    assert [result for result in results if not isinstance(result, CancelledError)].count(("done", False)) == 1
+    assert len(calls) == 2
+    print("✅ Cancelled call retried by a waiter")
+
+
+def test_service_coalesces_identical_requests():
+    """Identical concurrent requests rank once even with the result cache disabled"""
+    print("\n🧪 Testing request coalescing in the service...")
+
+    recommender = RecommenderService(cache_size=0)
+    rank_batch = recommender._rank_batch
+    calls = []
+
+    def slow_rank_batch(*args, **kwargs):
+        calls.append(1)
+        time.sleep(0.2)
+        return rank_batch(*args, **kwargs)
+
+    recommender._rank_batch = slow_rank_batch
+    results = run_concurrently(
+        6, lambda: recommender.get_recommendations("books", "movies", ["Harry Potter", "dune"], limit=5)
+    )
+    expected = RecommenderService(coalesce=False).get_recommendations("books", "movies", ["dune", "harry potter"], limit=5)
+
+    print(f"{len(calls)} ranking(s) for 6 requests")
+    assert len(calls) == 1
+    assert recommender.metrics.coalesced_requests.value() == 5
+    for result in results:
+        assert [rec.model_dump() for rec in result] == [rec.model_dump() for rec in expected]
+
+    # Invalid requests fail during validation, before any coalescing
+    results = run_concurrently(3, lambda: recommender.get_recommendations("books", "nowhere", ["dune"], limit=5))
+    assert all(isinstance(result, ValueError) for result in results)
+    print("✅ Identical requests coalesced")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Request Coalescing")
+    print("=" * 50)
+
+    test_concurrent_callers_share_one_call()
+    test_errors_reach_every_caller()
+    test_cancelled_call_is_retried()
+    test_service_coalesces_identical_requests()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test script for index snapshots and lazy category loading
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import numpy as np
+
+from backend.app.services import recommender as recommender_module
+from backend.app.services.recommender import RecommenderService
+from backend.benchmarks.synthetic import temporary_catalogs
+
+CATEGORIES = ["books", "movies", "songs", "games"]
+
+
+def is_mapped(array):
+    """True when an array (or the array it views) is backed by a memory-mapped file"""
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+def test_snapshot_round_trip():
+    """A service loaded from a snapshot must answer exactly like a freshly built one"""
+    print("🧪 Testing snapshot round trip...")
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        built = RecommenderService(index_dir=index_dir)
+        loaded = RecommenderService(index_dir=index_dir, lazy=True)
+
+        assert not loaded.index_status()["ready"]
+        for source_category in CATEGORIES:
+            for target_category in CATEGORIES:
+                for preferences in (["harry potter"], ["fantasy"], ["hary poter"]):
+                    expected = built.get_recommendations(source_category, target_category, preferences, limit=10)
+                    actual = loaded.get_recommendations(source_category, target_category, preferences, limit=10)
+                    assert actual == expected
+        assert loaded.index_status()["ready"]
+
+        # Loaded arrays are memory-mapped rather than copied
+        assert isinstance(loaded.neighbor_indexes["books"].indices, np.memmap)
+        assert loaded.get_similar_items("books", "book_1") == built.get_similar_items("books", "book_1")
+
+    print("✅ Snapshot answers match a fresh build")
+
+
+def test_lazy_loading_builds_only_requested_categories():
+    """Lazy services build a category on first use only"""
+    print("\n🧪 Testing lazy category loading...")
+
+    recommender = RecommenderService(lazy=True)
+    recommender.get_recommendations("books", "movies", ["dune"], limit=3)
+
+    status = recommender.index_status()
+    print(f"Index status: {status}")
+    assert status["categories"] == {"books": "ready", "movies": "ready", "songs": "pending", "games": "pending"}
+    print("✅ Only requested categories were built")
+
+
+def test_stale_snapshot_is_rebuilt():
+    """Changing build parameters invalidates the stored content hash"""
+    print("\n🧪 Testing stale snapshot detection...")
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        RecommenderService(index_dir=index_dir, neighbor_k=5)
+        rebuilt = RecommenderService(index_dir=index_dir, neighbor_k=2)
+        assert rebuilt.neighbor_indexes["books"].k == 2
+        assert rebuilt.snapshot.read_manifest("books")["neighbor_k"] == 2
+
+    print("✅ Stale snapshot was rebuilt")
+
+
+def test_read_only_workers_attach_to_published_snapshot():
+    """Read-only services never build and map the builder's files instead"""
+    print("\n🧪 Testing read-only snapshot attach...")
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        worker = RecommenderService(index_dir=index_dir, lazy=True, read_only=True)
+        try:
+            worker.get_recommendations("books", "movies", ["dune"], limit=3)
+            assert False, "Expected a missing snapshot to fail"
+        except ValueError as e:
+            print(f"Missing snapshot rejected: {e}")
+        assert worker.index_status()["categories"]["books"] == "failed"
+
+        builder = RecommenderService(index_dir=index_dir)
+        worker = RecommenderService(index_dir=index_dir, lazy=True, read_only=True)
+        assert (worker.get_recommendations("songs", "books", ["rock"], limit=5)
+                == builder.get_recommendations("songs", "books", ["rock"], limit=5))
+
+        # Every per-item array, title postings included, is a read-only mapping
+        store = worker.item_stores["songs"]
+        for array in (store.tfidf_matrix.data, store.tokens.text_matrix.indices,
+                      store.title_index.grams.postings, store.title_index.tokens.offsets):
+            assert is_mapped(array)
+            assert not array.flags.writeable
+
+    print("✅ Read-only workers attach without building")
+
+
+def test_unchanged_catalogs_attach_without_parsing():
+    """Catalogs, item ids, encoded items and attributes come from the snapshot while the files are unchanged"""
+    print("\n🧪 Testing attach without parsing the catalogs...")
+
+    parsed = []
+    original = recommender_module.load_catalog
+
+    def counting_load(path):
+        parsed.append(path)
+        return original(path)
+
+    with temporary_catalogs(200, seed=6) as data_dir, tempfile.TemporaryDirectory() as index_dir:
+        builder = RecommenderService(data_dir=data_dir, index_dir=index_dir)
+        recommender_module.load_catalog = counting_load
+        try:
+            worker = RecommenderService(data_dir=data_dir, index_dir=index_dir, read_only=True)
+        finally:
+            recommender_module.load_catalog = original
+        print(f"Files parsed by the worker: {parsed}")
+        assert parsed == []
+
+        for category in CATEGORIES:
+            catalog = worker.data[category]
+            assert list(catalog.records()) == list(builder.data[category].records())
+            positions, expected = worker.item_stores[category].positions, builder.item_stores[category].positions
+            for item_id in ("missing", builder.data[category].ids[0], builder.data[category].ids[199]):
+                assert positions.get(item_id) == expected.get(item_id)
+
+            index = worker.categories[category]
+            for array in (catalog.ids.buffer.obj, catalog.titles.offsets, catalog.years, catalog.ratings,
+                          catalog.genre_codes, index.store.positions.order, index.encoded_items.offsets,
+                          index.attributes.year_order, index.attributes.genre_order):
+                assert is_mapped(array)
+            assert bytes(index.encoded_items.buffer) == bytes(builder.categories[category].encoded_items.buffer)
+        assert (worker.get_recommendations_json("books", "movies", ["dragon"], limit=20)
+                == builder.get_recommendations_json("books", "movies", ["dragon"], limit=20))
+
+        # Changing a file changes its stamp, so the catalog is read and the category rebuilt
+        songs_file = os.path.join(data_dir, "songs.jsonl")
+        with open(songs_file, 'a', encoding='utf-8') as f:
+            f.write('{"id": "song_new", "title": "Dragon Night River"}\n')
+        rebuilt = RecommenderService(data_dir=data_dir, index_dir=index_dir)
+        assert "song_new" in rebuilt.item_stores["songs"].positions
+        assert rebuilt.snapshot.read_manifest("songs")["source"]["size"] == os.path.getsize(songs_file)
+
+    print("✅ Unchanged catalogs attached from the snapshot")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Index Snapshots")
+    print("=" * 50)
+
+    test_snapshot_round_trip()
+    test_lazy_loading_builds_only_requested_categories()
+    test_stale_snapshot_is_rebuilt()
+    test_read_only_workers_attach_to_published_snapshot()
+    test_unchanged_catalogs_attach_without_parsing()
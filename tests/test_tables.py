@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the precomputed recommendation tables
+"""
+
+import sys
+import os
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backend.app.services.recommender import RecommenderService
+from backend.app.services.tables import RecommendationTables, build_table
+from backend.app.services.scoring import cross_category_similarity
+from backend.app.models.recommendation import RecommendationFilters, RecommendationRequest
+from backend.benchmarks.synthetic import temporary_catalogs
+
+QUERIES = [
+    ("books", "movies", ["The Lost Kingdom"]),
+    ("books", "movies", ["The Lost Kingdom", "dragon"]),
+    ("games", "songs", ["night river", "zzqx"]),
+    ("movies", "books", ["kingdm"]),
+    ("songs", "songs", ["heart"]),
+]
+
+
+@contextmanager
+def services_with_tables(n_items=300, top_n=30):
+    """A live service and one serving from tables built for the same catalogs, removed on exit"""
+    with temporary_catalogs(n_items, seed=6) as data_dir, tempfile.TemporaryDirectory() as directory:
+        tables_dir = os.path.join(directory, "tables")
+        live = RecommenderService(data_dir=data_dir, cache_size=0)
+        RecommendationTables(tables_dir).save(live.categories, top_n)
+        tabled = RecommenderService(data_dir=data_dir, cache_size=0, tables_dir=tables_dir)
+        yield live, tabled, tables_dir
+
+
+def test_table_rows():
+    """Each row holds the best positive similarities of one source item, best first"""
+    print("🧪 Testing table rows...")
+
+    with services_with_tables() as (live, _, _):
+        source, target = live.categories["books"].store.tokens, live.categories["movies"].store.tokens
+        table = build_table(source, target, top_n=10, max_block_cells=1000)
+
+        similarities = cross_category_similarity(source, target, np.arange(len(source)))
+        for row in range(len(source)):
+            indices, scores = table.neighbors(row)
+            assert len(indices) <= 10
+            assert np.all(scores > 0) and np.all(np.diff(scores) <= 0)
+            np.testing.assert_allclose(scores, similarities[row, indices], rtol=1e-6)
+            if len(indices) == 10:
+                assert scores[-1] >= np.sort(similarities[row])[-10] * (1 - 1e-6)
+    print(f"✅ {len(source)} rows, {table.nbytes} bytes")
+
+
+def test_tables_match_live_scoring():
+    """Rankings served from the tables equal live ones, for every depth and with filters"""
+    print("\n🧪 Testing rankings served from the tables...")
+
+    with services_with_tables() as (live, tabled, _):
+        for query in QUERIES:
+            for limit in (5, 20, 100):
+                for filters in (None, RecommendationFilters(min_year=2000), RecommendationFilters(genres=["Drama"])):
+                    expected = live.get_recommendations_json(*query, limit=limit, filters=filters)
+                    assert tabled.get_recommendations_json(*query, limit=limit, filters=filters) == expected, query
+
+        requests = [RecommendationRequest(source_category=source, target_category=target, preferences=preferences)
+                    for source, target, preferences in QUERIES]
+        for served, expected in zip(tabled.get_recommendations_batch(requests), live.get_recommendations_batch(requests)):
+            assert served.model_dump() == expected.model_dump()
+
+        hits = tabled.metrics.table_lookups.value(result="hit")
+        misses = tabled.metrics.table_lookups.value(result="miss")
+        print(f"Table hits: {hits}, live fallbacks: {misses}")
+        assert hits > 0
+    print("✅ Tables match live scoring")
+
+
+def test_stale_tables_are_ignored():
+    """Tables are skipped once a category changes, and picked up again after a rebuild"""
+    print("\n🧪 Testing stale tables...")
+
+    with services_with_tables() as (live, tabled, tables_dir):
+        item = {"id": "movie_new", "title": "The Lost Kingdom Returns", "description": "A lost kingdom"}
+        live.add_item("movies", item)
+        tabled.add_item("movies", item)
+
+        hits = tabled.metrics.table_lookups.value(result="hit")
+        assert tabled.get_recommendations_json(*QUERIES[0]) == live.get_recommendations_json(*QUERIES[0])
+        assert tabled.metrics.table_lookups.value(result="hit") == hits
+        assert tabled.tables.table("books", "movies", tabled.categories["books"], tabled.categories["movies"]) is None
+        assert tabled.tables.table("books", "games", tabled.categories["books"], tabled.categories["games"]) is not None
+
+        # Rebuilding from the updated categories makes them current again
+        RecommendationTables(tables_dir).save(tabled.categories, 30)
+        tabled.tables.reload()
+        assert tabled.get_recommendations_json(*QUERIES[1]) == live.get_recommendations_json(*QUERIES[1])
+        assert tabled.metrics.table_lookups.value(result="hit") == hits + 1
+
+        missing = RecommendationTables(os.path.join(tables_dir, "missing"))
+        assert missing.table("books", "movies", tabled.categories["books"], tabled.categories["movies"]) is None
+    print("✅ Stale tables ignored")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Precomputed Recommendation Tables")
+    print("=" * 50)
+
+    test_table_rows()
+    test_tables_match_live_scoring()
+    test_stale_tables_are_ignored()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test script for the title lookup index
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import pandas as pd
+
+from backend.app.services.recommender import RecommenderService
+
+
+def test_substring_matches_agree_with_pandas():
+    """Title index must return the same items as a case-insensitive substring scan"""
+    print("🧪 Comparing title index with pandas substring scan...")
+
+    recommender = RecommenderService()
+
+    for category, catalog in recommender.data.items():
+        df = pd.DataFrame(catalog.records())
+        title_index = recommender.item_stores[category].title_index
+        queries = ["the", "a", "x", "of the", "HARRY", "rin", "ing ", "e h", "minecraft"] + list(df['title'])
+        for query in queries:
+            expected = list(df.index[df['title'].str.contains(query, case=False, regex=False)])
+            actual = list(title_index.substring_matches(query))
+            assert actual == expected, f"{category} '{query}': {actual} != {expected}"
+
+    print("✅ Title index matches the substring scan")
+
+
+def test_fuzzy_title_matches():
+    """Typos should still resolve to the intended title"""
+    print("\n🧪 Testing typo-tolerant title lookup...")
+
+    recommender = RecommenderService()
+    books = pd.DataFrame(recommender.data["books"].records())
+    title_index = recommender.item_stores["books"].title_index
+
+    matches = title_index.fuzzy_matches("hary poter")
+    print(f"'hary poter' -> {[(books.iloc[idx]['title'], round(score, 2)) for idx, score in matches]}")
+    assert matches and "Harry Potter" in books.iloc[matches[0][0]]['title']
+
+    assert title_index.fuzzy_matches("xyzzy") == []
+    print("✅ Typo-tolerant lookup working")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Title Index")
+    print("=" * 50)
+
+    test_substring_matches_agree_with_pandas()
+    test_fuzzy_title_matches()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental catalog updates and compaction
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import numpy as np
+from scipy import sparse
+
+from backend.app.services.recommender import RecommenderService
+from backend.app.services.neighbors import NeighborIndex
+from backend.app.services.title_index import TitleIndex
+from backend.app.services.scoring import TokenIncidence
+from backend.app.services.item_store import combined_texts
+
+DUNE = {"id": "movie_dune", "title": "Dune Part Two", "genre": "Sci-Fi", "year": 2024, "rating": 8.6,
+        "description": "Epic desert science fiction adventure"}
+
+
+def test_incremental_indexes_match_rebuild():
+    """After adds and updates every derived index must equal one built from scratch on the same vectors"""
+    print("🧪 Testing incremental index maintenance...")
+
+    recommender = RecommenderService()
+    recommender.add_item("movies", DUNE)
+    recommender.update_item("movies", "movie_2", {
+        "title": "Harry Potter and the Goblet of Fire", "genre": "Fantasy", "year": 2005, "rating": 7.7,
+        "description": "Magical tournament adventure"
+    })
+
+    index = recommender.categories["movies"]
+    store = index.store
+    assert store.catalog.record(1)["title"] == "Harry Potter and the Goblet of Fire"
+    assert store.catalog.record(len(store) - 1)["id"] == "movie_dune"
+
+    rebuilt = NeighborIndex.build(store.tfidf_matrix, k=recommender.neighbor_k)
+    assert np.array_equal(rebuilt.indptr, index.neighbor_index.indptr)
+    assert np.array_equal(rebuilt.indices, index.neighbor_index.indices)
+    assert np.allclose(rebuilt.scores, index.neighbor_index.scores)
+
+    titles = TitleIndex.build(store.catalog.titles)
+    assert titles.grams.keys == store.title_index.grams.keys
+    assert np.array_equal(titles.grams.postings, store.title_index.grams.postings)
+
+    tokens = TokenIncidence.from_texts(combined_texts(store.catalog), list(store.catalog.titles),
+                                       recommender.token_vocabulary)
+    assert (tokens.text_matrix != store.tokens.text_matrix).nnz == 0
+
+    recommendations = recommender.get_recommendations("books", "movies", ["dune"], limit=3)
+    assert recommendations[0].id == "movie_dune"
+    print("✅ Incremental indexes match a rebuild")
+
+
+def test_updates_keep_missing_fields():
+    """An update with no genre and an empty description serves exactly those values"""
+    print("\n🧪 Testing missing fields in updates...")
+
+    recommender = RecommenderService()
+    recommender.update_item("movies", "movie_3", {"title": "The Matrix", "genre": None, "description": ""})
+    record = recommender.categories["movies"].store.catalog.record(2)
+    assert record["genre"] is None and record["description"] == ""
+
+    served = [item for item in recommender.get_recommendations("books", "movies", ["matrix"], limit=10)
+              if item.id == "movie_3"]
+    assert served and served[0].genre is None and served[0].description == ""
+    print("✅ Missing fields kept")
+
+
+def test_delete_and_compaction():
+    """Deleted items disappear immediately; compaction refits and clears pending changes"""
+    print("\n🧪 Testing delete and compaction...")
+
+    recommender = RecommenderService()
+    n_movies = len(recommender.categories["movies"])
+    assert recommender.delete_item("movies", "movie_1") == n_movies - 1
+
+    index = recommender.categories["movies"]
+    assert "movie_1" not in index.store.positions
+    assert index.pending_changes == 1
+    for item in recommender.get_similar_items("movies", "movie_2", limit=20):
+        assert item.id != "movie_1"
+
+    assert recommender.compact_pending() == ["movies"]
+    assert recommender.categories["movies"].pending_changes == 0
+    assert recommender.compact_pending() == []
+
+    for bad_call in (
+        lambda: recommender.delete_item("movies", "movie_1"),
+        lambda: recommender.add_item("movies", {"id": "movie_2", "title": "Duplicate"}),
+        lambda: recommender.add_item("movies", {"id": "movie_new"}),
+        lambda: recommender.update_item("podcasts", "x", {"title": "y"}),
+    ):
+        try:
+            bad_call()
+            assert False, "Expected a ValueError"
+        except ValueError as e:
+            print(f"Rejected: {e}")
+
+    print("✅ Delete and compaction working")
+
+
+def test_readers_see_consistent_snapshots():
+    """Requests running during updates must never fail or mix catalog versions"""
+    print("\n🧪 Testing reads during concurrent updates...")
+
+    recommender = RecommenderService(cache_size=0)
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                for item in recommender.get_recommendations("books", "movies", ["adventure"], limit=10):
+                    assert item.id and item.title
+                recommender.get_similar_items("movies", "movie_3", limit=5)
+            except Exception as e:
+                errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for i in range(20):
+        recommender.add_item("movies", {**DUNE, "id": f"movie_extra_{i}", "title": f"Adventure {i}"})
+        if i % 2:
+            recommender.delete_item("movies", f"movie_extra_{i - 1}")
+    recommender.compact("movies")
+    done.set()
+    for reader in readers:
+        reader.join()
+
+    assert not errors, errors
+    print(f"✅ No reader errors, {len(recommender.categories['movies'])} movies after updates")
+
+
+def test_shared_space_updates_are_projected():
+    """Updates in shared_space mode project the changed rows into the fitted space; compaction refits it"""
+    print("\n🧪 Testing updates with a shared space...")
+
+    def dense(vectors):
+        matrix = vectors.expanded()
+        return matrix.toarray() if sparse.issparse(matrix) else matrix
+
+    for options in ({}, {"precompute_affinity": True}, {"retrieval": "lsh"},
+                    {"vector_dtype": "int8", "svd_components": 16}):
+        recommender = RecommenderService(cache_size=0, cross_category_mode="shared_space", **options)
+        query = ("books", "movies", ["science fiction"])
+        recommender.get_recommendations(*query, limit=5)
+        fitted = recommender.shared_space
+
+        recommender.add_item("movies", DUNE)
+        recommender.update_item("movies", "movie_2", {"title": "Harry Potter", "genre": "Sci-Fi",
+                                                      "description": "Space wizard adventure"})
+        recommender.delete_item("movies", "movie_5")
+        results = recommender.get_recommendations(*query, limit=20)
+
+        # No refit: same vocabulary, with the changed rows projected exactly as a full projection would
+        space = recommender.shared_space
+        assert space.vectorizer is fitted.vectorizer
+        assert space.versions == {category: index.version for category, index in recommender.categories.items()}
+        expected = fitted.replaced("movies", recommender.categories["movies"].catalog, 0)
+        np.testing.assert_allclose(dense(space.vectors["movies"]), dense(expected.vectors["movies"]), atol=1e-6)
+        assert not any("movies" in pair for pair in space.affinity)
+        if options.get("precompute_affinity"):
+            # Tables of unchanged pairs are kept; the movies pairs are scored by product until the refit
+            assert ("books", "songs") in space.affinity
+        assert "movie_5" not in [item.id for item in results]
+
+        assert recommender.compact_pending() == ["movies"]
+        refitted = recommender.shared_space
+        assert refitted.vectorizer is not fitted.vectorizer
+        assert refitted.versions == {category: index.version for category, index in recommender.categories.items()}
+        if options.get("precompute_affinity"):
+            assert ("books", "movies") in refitted.affinity
+        print(f"{options}: {[item.id for item in recommender.get_recommendations(*query, limit=3)]}")
+
+    print("✅ Shared-space updates projected")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Incremental Catalog Updates")
+    print("=" * 50)
+
+    test_incremental_indexes_match_rebuild()
+    test_updates_keep_missing_fields()
+    test_delete_and_compaction()
+    test_readers_see_consistent_snapshots()
+    test_shared_space_updates_are_projected()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for reduced-precision and SVD-projected shared-space vectors
+"""
+
+import sys
+import os
+import numpy as np
+from scipy import sparse
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backend.app.services.recommender import RecommenderService
+from backend.app.services.shared_space import storage_report
+from backend.app.services.vectors import VECTOR_DTYPES, ItemVectors
+from backend.app.models.recommendation import RecommendationFilters
+from backend.benchmarks.synthetic import temporary_catalogs
+
+QUERIES = [
+    ("books", "movies", ["The Lost Kingdom", "dragon"]),
+    ("games", "songs", ["night river"]),
+]
+
+
+def test_compressed_vectors():
+    """Every storage type keeps rows close to the originals and shrinks them"""
+    print("🧪 Testing compressed item vectors...")
+
+    rng = np.random.default_rng(0)
+    matrix = sparse.random(200, 500, density=0.02, format='csr', random_state=0)
+    matrix.data[matrix.indptr[7]:matrix.indptr[8]] = 0
+    matrix.eliminate_zeros()
+    dense = rng.standard_normal((200, 16))
+    positions = np.array([5, 7, 0, 199, 5])
+    tolerances = {"float64": 0.0, "float32": 1e-6, "float16": 1e-3, "int8": 1 / 127}
+
+    for original in (matrix, dense):
+        sizes = []
+        for dtype in VECTOR_DTYPES:
+            vectors = ItemVectors.compress(original, dtype)
+            expanded = vectors.expanded()
+            expanded = expanded.toarray() if sparse.issparse(expanded) else expanded
+            reference = original.toarray() if sparse.issparse(original) else original
+            peaks = np.abs(reference).max(axis=1, keepdims=True)
+            assert np.all(np.abs(expanded - reference) <= tolerances[dtype] * peaks + 1e-12), dtype
+
+            subset = vectors.expanded(positions)
+            subset = subset.toarray() if sparse.issparse(subset) else subset
+            np.testing.assert_array_equal(subset, expanded[positions])
+
+            queries = vectors.expanded(np.array([1, 2]))
+            np.testing.assert_allclose(vectors.similarities(queries, positions),
+                                       (queries @ vectors.expanded(positions).T).toarray()
+                                       if sparse.issparse(queries) else queries @ subset.T, rtol=1e-5)
+            sizes.append(vectors.nbytes)
+        print(f"{'sparse' if sparse.issparse(original) else 'dense'} bytes by dtype: {sizes}")
+        assert sizes == sorted(sizes, reverse=True)
+
+    try:
+        ItemVectors.compress(matrix, "bfloat16")
+        assert False, "Expected an unknown dtype to be rejected"
+    except ValueError:
+        pass
+    print("✅ Compressed vectors working")
+
+
+def test_compressed_shared_space():
+    """The shared space serves from compressed and projected vectors, with every retrieval option"""
+    print("\n🧪 Testing compressed shared spaces...")
+
+    with temporary_catalogs(300, seed=8) as data_dir:
+        full = RecommenderService(data_dir=data_dir, cache_size=0, cross_category_mode="shared_space")
+        for options in (
+            {"vector_dtype": "float32"},
+            {"vector_dtype": "int8"},
+            {"vector_dtype": "float16", "svd_components": 32},
+            {"vector_dtype": "int8", "precompute_affinity": True},
+            {"vector_dtype": "float16", "svd_components": 16, "retrieval": "lsh"},
+        ):
+            service = RecommenderService(data_dir=data_dir, cache_size=0, cross_category_mode="shared_space", **options)
+            for query in QUERIES:
+                results = service.get_recommendations(*query, limit=10)
+                assert results and all(item.similarity_score > 0 for item in results)
+                if options == {"vector_dtype": "float32"}:
+                    expected = full.get_recommendations(*query, limit=10)
+                    assert [item.id for item in results] == [item.id for item in expected]
+
+                # Scoring only the filtered targets matches filtering the full ranking
+                filters = RecommendationFilters(min_year=2000)
+                ranked = service.get_recommendations(*query, limit=300)
+                filtered = service.get_recommendations(*query, limit=10, filters=filters)
+                expected_ids = [item.id for item in ranked if item.year is not None and item.year >= 2000][:10]
+                if "retrieval" not in options and "precompute_affinity" not in options:
+                    assert [item.id for item in filtered] == expected_ids
+            print(f"{options}: {service.shared_space.nbytes} bytes")
+
+        try:
+            RecommenderService(data_dir=data_dir, lazy=True, vector_dtype="float8")
+            assert False, "Expected an unknown vector_dtype to be rejected"
+        except ValueError:
+            pass
+
+        # The per-category TF-IDF matrices are never compressed, so the settings need the shared space
+        for options in ({"vector_dtype": "int8"}, {"svd_components": 32}):
+            try:
+                RecommenderService(data_dir=data_dir, lazy=True, **options)
+                assert False, "Expected vector settings outside shared_space to be rejected"
+            except ValueError as e:
+                print(f"Rejected: {e}")
+    print("✅ Compressed shared spaces working")
+
+
+def test_storage_report():
+    """The report compares memory and accuracy against the full-precision space"""
+    print("\n🧪 Testing the storage report...")
+
+    with temporary_catalogs(300, seed=8) as data_dir:
+        service = RecommenderService(data_dir=data_dir, cache_size=0)
+    texts = {category: index.store.texts for category, index in service.categories.items()}
+    report = storage_report(texts, [("float64", None), ("float16", None), ("int8", None), ("float32", 32)],
+                            k=10, n_queries=50)
+    for row in report:
+        print(row)
+
+    assert report[0]["memory_ratio"] == 1.0 and report[0]["recall"] == 1.0 and report[0]["score_error"] == 0.0
+    assert report[1]["memory_ratio"] < 0.6 and report[1]["recall"] > 0.95
+    assert report[2]["memory_ratio"] < report[1]["memory_ratio"] and report[2]["recall"] > 0.9
+    assert report[3]["svd_components"] == 32 and 0 <= report[3]["recall"] <= 1
+    print("✅ Storage report working")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Shared-Space Vector Storage")
+    print("=" * 50)
+
+    test_compressed_vectors()
+    test_compressed_shared_space()
+    test_storage_report()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the bounded scoring worker pool
+"""
+
+import sys
+import os
+import asyncio
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fastapi import HTTPException
+
+from backend.app import main
+from backend.app.services.worker_pool import WorkerPool, PoolSaturatedError, PoolTimeoutError
+
+
+def test_pool_rejects_when_saturated():
+    """Submissions beyond workers + queue must fail fast"""
+    print("🧪 Testing pool saturation...")
+
+    pool = WorkerPool(max_workers=1, max_pending=1, timeout=5)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        try:
+            await pool.run(release.wait)
+            print("❌ Should have rejected the third request")
+            assert False
+        except PoolSaturatedError as e:
+            print(f"✅ Correctly rejected request: {e}")
+        release.set()
+        return await asyncio.gather(*running)
+
+    assert asyncio.run(scenario()) == [True, True]
+    assert pool.rejected == 1 and pool.in_flight == 0
+    pool.shutdown()
+
+
+def test_pool_times_out_slow_calls():
+    """A call exceeding the timeout raises without blocking the caller"""
+    print("\n🧪 Testing pool timeout...")
+
+    pool = WorkerPool(max_workers=1, max_pending=0, timeout=0.05)
+    release = threading.Event()
+
+    async def scenario():
+        try:
+            await pool.run(release.wait)
+            assert False
+        except PoolTimeoutError as e:
+            print(f"✅ Correctly timed out: {e}")
+        release.set()
+
+    asyncio.run(scenario())
+    assert pool.timed_out == 1
+    pool.shutdown()
+
+
+def test_similar_items_run_on_the_pool():
+    """The similar-items endpoint goes through the pool, with its 404 and 503 responses"""
+    print("\n🧪 Testing similar items on the pool...")
+
+    original = main.worker_pool
+    main.worker_pool = WorkerPool(max_workers=1, max_pending=0, timeout=5)
+    release = threading.Event()
+
+    async def scenario():
+        response = await main.get_similar_items("books", "book_1", limit=3)
+        assert response.total_count == 3 and response.source_category == "books"
+
+        for item_id, status_code in (("book_missing", 404), ("book_1", 503)):
+            if status_code == 503:
+                busy = asyncio.ensure_future(main.worker_pool.run(release.wait))
+                await asyncio.sleep(0.05)
+            try:
+                await main.get_similar_items("books", item_id, limit=3)
+                assert False, f"Expected a {status_code}"
+            except HTTPException as e:
+                print(f"✅ {item_id}: {e.status_code} {e.detail}")
+                assert e.status_code == status_code
+        release.set()
+        await busy
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        main.worker_pool.shutdown()
+        main.worker_pool = original
+
+
+if __name__ == "__main__":
+    print("🔍 Testing Worker Pool")
+    print("=" * 50)
+
+    test_pool_rejects_when_saturated()
+    test_pool_times_out_slow_calls()
+    test_similar_items_run_on_the_pool()